@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Argo CLI: one entry point for the data and model pipeline
+Each subcommand imports its heavy dependencies only when it runs, so an
+ingestion cron job never pays for xgboost, mlflow or sklearn
+Run: python argo.py <ingest|stream|quality|features|train|backtest|trade|pipeline|registry|cache> [options]
+"""
+
+import argparse
+import logging
+import sys
+
+# Module each subcommand imports when it runs; scripts/check_import_time.py budgets these
+SUBCOMMAND_MODULES = {
+    'ingest': 'datapipeline.ingest.alpaca_bars',
+    'stream': 'datapipeline.ingest.alpaca_stream',
+    'quality': 'datapipeline.quality',
+    'features': 'run_features',
+    'train': 'models.train_model_optimized',
+    'backtest': 'models.backtest_with_slippage',
+    'pipeline': 'datapipeline.pipeline',
+    'registry': 'models.registry',
+    'cache': 'datapipeline.hot_cache',
+    'trade': 'services.execution_engine',
+}
+
+
+def cmd_ingest(args):
+    from datapipeline.ingest.alpaca_bars import main
+
+    symbols = args.symbols.split(',') if args.symbols else None
+    main(symbols=symbols, lookback_days=args.lookback_days, cache=not args.no_cache)
+    return 0
+
+
+def cmd_stream(args):
+    from datapipeline.ingest.alpaca_stream import main
+
+    symbols = args.symbols.split(',') if args.symbols else None
+    summary = main(symbols=symbols, url=args.url, batch_rows=args.batch_rows, flush_ms=args.flush_ms,
+                   duration=args.duration, cache=not args.no_cache)
+    return 0 if not summary['pending'] else 1
+
+
+def cmd_quality(args):
+    from datapipeline.quality import main
+
+    argv = ['--days', str(args.days), '--z', str(args.z), '--output', args.output]
+    for flag, value in (('--symbols', args.symbols), ('--csv', args.csv)):
+        if value:
+            argv += [flag, value]
+    return main(argv)
+
+
+def cmd_features(args):
+    from run_features import main
+
+    symbols = args.symbols.split(',') if args.symbols else None
+    result = main(symbols=symbols, output_csv=args.output, cross_sectional=args.cross_sectional,
+                  cache=not args.no_cache, skip_quarantined=not args.include_quarantined)
+    return 0 if result is not None else 1
+
+
+def cmd_train(args):
+    from models.train_model_optimized import OptimizedModelTrainer, FEATURE_COLS
+
+    trainer = OptimizedModelTrainer(
+        features_csv=args.features_csv,
+        feature_cols=args.feature_cols.split(',') if args.feature_cols else FEATURE_COLS,
+        target_col=args.target_col,
+        profile_dir=args.profile_dir,
+        tracking=not args.no_tracking,
+        tracking_uri=args.tracking_uri,
+    )
+    success = trainer.run()
+    if args.update_baseline:
+        trainer.profiler.write_trace(trainer.baseline_path)
+        print(f"✓ Stage timing baseline updated: {trainer.baseline_path}")
+    if args.fail_on_regression and trainer.validation_results.get('profile_regressions'):
+        return 2
+    return 0 if success else 1
+
+
+def cmd_backtest(args):
+    from models.backtest_with_slippage import backtest_saved_model
+    from models.train_model_optimized import FEATURE_COLS
+
+    results = backtest_saved_model(
+        args.model,
+        args.features_csv,
+        feature_cols=args.feature_cols.split(',') if args.feature_cols else FEATURE_COLS,
+        target_col=args.target_col,
+        slippage_bp=args.slippage_bp,
+    )
+    print(f"Backtest (NO slippage):  Sharpe = {results['no_slippage_sharpe']:.2f}")
+    print(f"Reality ({args.slippage_bp}bp slippage): Sharpe = {results['sharpe']:.2f}")
+    print(f"Trades: {results['num_trades']}, total PnL: {results['total_pnl']:.4f}")
+    return 0
+
+
+def cmd_trade(args):
+    from services.execution_engine import main
+
+    summary = main(symbols=args.symbols.split(',') if args.symbols else None, model_ref=args.model,
+                   quantity=args.quantity, poll_interval=args.poll_interval, duration=args.duration,
+                   metrics_port=args.metrics_port, drift_path=args.drift_path)
+    return 0 if not summary['failed'] else 1
+
+
+def cmd_pipeline(args):
+    from datapipeline.pipeline import build_pipeline
+
+    dag = build_pipeline(
+        symbols=args.symbols.split(',') if args.symbols else None,
+        ingest=args.ingest,
+        lookback_days=args.lookback_days,
+        cache_dir=args.cache_dir,
+        max_workers=args.workers,
+        cross_sectional=args.cross_sectional,
+        cache=not args.no_cache,
+    )
+    results = dag.run(targets=args.targets.split(',') if args.targets else None,
+                      force=args.force.split(',') if args.force else ())
+    print(dag.report())
+    train = results.get('train')
+    return 0 if train is None or train['success'] else 1
+
+
+def cmd_registry(args):
+    from models.registry import main
+
+    argv = ['--root', args.root, args.action] + args.args
+    return main(argv)
+
+
+def cmd_cache(args):
+    from datapipeline.hot_cache import main
+
+    argv = ['--bars', str(args.bars)] + (['--symbols', args.symbols] if args.symbols else [])
+    return main(argv)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='argo', description="Argo auto-trade pipeline")
+    parser.add_argument('-v', '--verbose', action='store_true', help='debug logging')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='fetch Alpaca minute bars into ClickHouse')
+    p.add_argument('--symbols', help='comma-separated symbols (default: $DATA_SYMBOLS)')
+    p.add_argument('--lookback-days', type=int, help='days of history (default: $DATA_LOOKBACK_DAYS)')
+    p.add_argument('--no-cache', action='store_true', help='skip the Redis hot-cache write-through')
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser('stream', help='stream live minute bars from Alpaca into ClickHouse')
+    p.add_argument('--symbols', help='comma-separated symbols (default: $DATA_SYMBOLS)')
+    p.add_argument('--url', help='WebSocket URL (default: $ALPACA_STREAM_URL or Alpaca\'s $ALPACA_DATA_FEED feed)')
+    p.add_argument('--batch-rows', type=int, default=500, help='bars per ClickHouse insert')
+    p.add_argument('--flush-ms', type=int, default=1000, help='max milliseconds a bar waits before insert')
+    p.add_argument('--duration', type=float, help='stop after this many seconds (default: run until Ctrl-C)')
+    p.add_argument('--no-cache', action='store_true', help='skip the Redis hot-cache write-through')
+    p.set_defaults(func=cmd_stream)
+
+    p = sub.add_parser('quality', help='scan market_data for gaps, duplicates, bad OHLC and spikes')
+    p.add_argument('--symbols', help='comma-separated symbols (default: every symbol in the window)')
+    p.add_argument('--days', type=int, default=365, help='window length ending now')
+    p.add_argument('--csv', help='scan a long-format bars CSV instead of ClickHouse')
+    p.add_argument('--z', type=float, default=10.0, help='robust z-score spike threshold')
+    p.add_argument('--output', default='monitoring/data_quality.json', help='report and quarantine list')
+    p.set_defaults(func=cmd_quality)
+
+    p = sub.add_parser('features', help='compute indicator features from ClickHouse bars')
+    p.add_argument('--symbols', help='comma-separated symbols')
+    p.add_argument('--output', default='datapipeline/features/features_output.csv')
+    p.add_argument('--no-cache', action='store_true', help='skip the Redis hot-cache write-through')
+    p.add_argument('--include-quarantined', action='store_true',
+                   help='also process symbols on the data-quality quarantine list')
+    p.add_argument('--cross-sectional', action='store_true',
+                   help='add rank / relative-return / beta / correlation columns (datapipeline/cross_sectional.py)')
+    p.set_defaults(func=cmd_features)
+
+    for name, func, help_text in (
+        ('train', cmd_train, 'train and validate the XGBoost model'),
+        ('backtest', cmd_backtest, 'slippage backtest of a saved model on the hold-out split'),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--features-csv', default='datapipeline/features/features_output.csv')
+        p.add_argument('--feature-cols', help='comma-separated feature columns')
+        p.add_argument('--target-col', default='target')
+        p.set_defaults(func=func)
+        if name == 'train':
+            p.add_argument('--profile-dir', help='write a cProfile .prof file per stage here')
+            p.add_argument('--update-baseline', action='store_true', help='store this run as the timing baseline')
+            p.add_argument('--fail-on-regression', action='store_true',
+                           help='exit 2 if a stage regressed against the timing baseline')
+            p.add_argument('--tracking-uri', help='MLflow tracking URI (default: $MLFLOW_TRACKING_URI or ./mlruns)')
+            p.add_argument('--no-tracking', action='store_true', help='skip MLflow logging')
+    p.add_argument('--model', default='models/artifacts/model_optimized.ubj')
+    p.add_argument('--slippage-bp', type=float, default=2)
+
+    p = sub.add_parser('trade', help='paper-trade each new bar with the pinned model')
+    p.add_argument('--symbols', help='comma-separated symbols (default: $DATA_SYMBOLS)')
+    p.add_argument('--model', default='production', help='registry pin, version or "latest"')
+    p.add_argument('--quantity', type=int, default=1, help='shares per order')
+    p.add_argument('--poll-interval', type=float, default=1.0, help='seconds between hot-cache polls')
+    p.add_argument('--duration', type=float, help='stop after this many seconds (default: run until Ctrl-C)')
+    p.add_argument('--metrics-port', type=int, help='serve Prometheus /metrics (incl. drift gauges) on this port')
+    p.add_argument('--drift-path', default='monitoring/drift/trade.json',
+                   help='live drift sketch checkpoint (one per engine process)')
+    p.set_defaults(func=cmd_trade)
+
+    p = sub.add_parser('pipeline', help='run ingest/features/train as a cached DAG')
+    p.add_argument('--symbols', help='comma-separated symbols')
+    p.add_argument('--ingest', action='store_true', help='fetch fresh bars first')
+    p.add_argument('--lookback-days', type=int)
+    p.add_argument('--targets', help='comma-separated stages to produce (default: all)')
+    p.add_argument('--force', help='comma-separated stages to re-run even if cached')
+    p.add_argument('--workers', type=int, default=4)
+    p.add_argument('--cache-dir', default='.argo_cache')
+    p.add_argument('--no-cache', action='store_true', help='skip the Redis hot-cache write-through')
+    p.add_argument('--cross-sectional', action='store_true',
+                   help='add rank / relative-return / beta / correlation columns in the combine stage')
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser('registry', help='list, show or pin registered model versions')
+    p.add_argument('--root', default='models/registry')
+    p.add_argument('action', nargs='?', default='list', choices=['list', 'show', 'pin'])
+    p.add_argument('args', nargs='*', help='show <ref> | pin <name> <ref>')
+    p.set_defaults(func=cmd_registry)
+
+    p = sub.add_parser('cache', help='print the Redis hot-cache snapshot')
+    p.add_argument('--symbols', help='comma-separated symbols (default: every cached symbol)')
+    p.add_argument('--bars', type=int, default=5, help='bars to show per symbol')
+    p.set_defaults(func=cmd_cache)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
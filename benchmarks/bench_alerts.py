@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Hot-path cost of raising an alert
+Times AlertDispatcher.submit while the worker coalesces a flapping key into a file sink
+Run: python -m benchmarks.bench_alerts
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from monitoring.alerts import AlertDispatcher, AlertSystem, FileSink
+
+
+def run(n_alerts=100_000, dedup_window=0.5):
+    """
+    Submit a burst of identical circuit-breaker alerts and time each enqueue
+
+    Returns:
+        dict: Enqueue latency percentiles (µs), dispatcher stats and alerts actually written
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        sink_path = Path(tmp) / 'alerts.jsonl'
+        dispatcher = AlertDispatcher(
+            sinks=[FileSink(sink_path)],
+            dedup_window=dedup_window,
+            rate_limits={'file': (5, 5)},
+            queue_size=n_alerts,
+        )
+        alerts = AlertSystem(dispatcher)
+
+        latencies = np.empty(n_alerts, dtype=np.int64)
+        clock = time.perf_counter_ns
+        for i in range(n_alerts):
+            t0 = clock()
+            alerts.alert_circuit_breaker(-500 - i)
+            latencies[i] = clock() - t0
+
+        alerts.close()
+        with open(sink_path) as f:
+            written = [json.loads(line) for line in f]
+
+    lat_us = latencies / 1000
+    return {
+        'alerts': n_alerts,
+        'p50_us': float(np.percentile(lat_us, 50)),
+        'p99_us': float(np.percentile(lat_us, 99)),
+        'max_us': float(lat_us.max()),
+        'stats': dict(dispatcher.stats),
+        'written': len(written),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=100_000)
+    args = parser.parse_args()
+
+    result = run(args.alerts)
+
+    print(f"=== AlertSystem.alert_circuit_breaker enqueue cost ({result['alerts']:,} alerts) ===")
+    print(f"  p50 / p99 / max:  {result['p50_us']:.2f}µs / {result['p99_us']:.2f}µs / {result['max_us']:.2f}µs")
+    print(f"  Dispatcher stats: {result['stats']}")
+    print(f"  Alerts written:   {result['written']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ClickHouse bar reads, tuple rows vs block-streamed NumPy
+Compares the old query().result_rows -> DataFrame path against
+datapipeline.clickhouse.query_frame, and serial vs pooled concurrent
+per-symbol loads. Needs a reachable ClickHouse with trading_db.market_data
+Run: python -m benchmarks.bench_clickhouse_reads
+"""
+
+import argparse
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from datapipeline import clickhouse
+
+COLUMNS = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _scan_query(limit):
+    query = f"SELECT {', '.join(COLUMNS)} FROM {clickhouse.MARKET_DATA_TABLE} ORDER BY symbol, timestamp"
+    return query + (f" LIMIT {int(limit)}" if limit else '')
+
+
+def _legacy_frame(client, query):
+    result = client.query(query)
+    return pd.DataFrame(result.result_rows, columns=COLUMNS)
+
+
+def _timed(func, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = func(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, {'seconds': elapsed, 'peak_mb': peak / 1024 / 1024}
+
+
+def run(limit=None, workers=8):
+    """
+    Time a full-table scan both ways, then per-symbol loads serially and concurrently
+
+    Returns:
+        dict: Timings and peak Python allocations per variant, or None if ClickHouse is unreachable
+    """
+    try:
+        client = clickhouse.get_client()
+        symbols = [row[0] for row in client.query(
+            f"SELECT DISTINCT symbol FROM {clickhouse.MARKET_DATA_TABLE} ORDER BY symbol").result_rows]
+    except Exception as e:
+        print(f"⚠️ ClickHouse unreachable, skipping: {e}")
+        return None
+
+    query = _scan_query(limit)
+    legacy, legacy_stats = _timed(_legacy_frame, client, query)
+    streamed, streamed_stats = _timed(clickhouse.query_frame, query)
+    rows = 0 if streamed is None else len(streamed)
+
+    t0 = time.perf_counter()
+    for symbol in symbols:
+        clickhouse.load_bars(symbol)
+    serial_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(clickhouse.load_bars, symbols))
+    concurrent_s = time.perf_counter() - t0
+
+    clickhouse.close_client()
+    return {
+        'rows': rows,
+        'rows_match': len(legacy) == rows,
+        'result_rows': legacy_stats,
+        'np_stream': streamed_stats,
+        'symbols': len(symbols),
+        'serial_s': serial_s,
+        'concurrent_s': concurrent_s,
+        'workers': workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--limit', type=int, default=None, help='cap the scan at this many rows')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent per-symbol loads')
+    args = parser.parse_args()
+
+    result = run(args.limit, args.workers)
+    if result is None:
+        return
+
+    print(f"=== Full scan of {clickhouse.MARKET_DATA_TABLE} ({result['rows']:,} rows) ===")
+    for name in ('result_rows', 'np_stream'):
+        r = result[name]
+        print(f"  {name:12s} {r['seconds']:8.3f}s  peak Python allocations {r['peak_mb']:8.1f}MB")
+    if not result['rows_match']:
+        print("  ⚠️ Row counts differ between the two paths")
+    print(f"=== load_bars for {result['symbols']} symbols ===")
+    print(f"  serial       {result['serial_s']:8.3f}s")
+    print(f"  {result['workers']} threads    {result['concurrent_s']:8.3f}s (one pooled client)")
+
+
+if __name__ == '__main__':
+    main()
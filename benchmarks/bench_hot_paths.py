@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Pipeline hot paths on synthetic bars
+Ingest insert, feature computation, walk-forward split, regime clustering,
+XGBoost fit/predict, slippage backtest and pre-trade risk checks
+Run: python -m benchmarks.run_all --scale 10k,1m
+"""
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import FakeClickHouseClient, alpaca_bar_dicts, bars_fixture, benchmark
+
+# Small enough that 1M-row fits finish in seconds; the shape of the trees is what matters here
+XGB_BENCH_PARAMS = {'max_depth': 5, 'n_estimators': 50, 'learning_rate': 0.05, 'subsample': 0.8,
+                    'colsample_bytree': 0.8, 'random_state': 42, 'tree_method': 'hist', 'n_jobs': -1}
+
+
+def _feature_frame(n_rows):
+    """Bars plus random standardized feature columns and a binary target"""
+    from run_features import FEATURE_COLS
+
+    df = bars_fixture(n_rows)
+    rng = np.random.default_rng(7)
+    # float32 keeps the 10M-row frame within a few GB
+    values = rng.standard_normal((len(df), len(FEATURE_COLS)), dtype=np.float32)
+    features = pd.DataFrame(values, columns=FEATURE_COLS)
+    out = pd.concat([df, features], axis=1)
+    out['target'] = (out['close'] > out['open']).astype(int)
+    return out, FEATURE_COLS
+
+
+@benchmark('ingest.insert_bars', max_rows=1_000_000)
+def bench_insert_bars(n_rows):
+    from datapipeline.ingest.alpaca_bars import AlpacaDataIngester
+
+    # Skip __init__: it needs Alpaca credentials and a live ClickHouse
+    ingester = AlpacaDataIngester.__new__(AlpacaDataIngester)
+    ingester.ch_client = FakeClickHouseClient()
+    ingester.cache = False
+    df = bars_fixture(n_rows)
+    batches = [(symbol, alpaca_bar_dicts(group)) for symbol, group in df.groupby('symbol', sort=False)]
+
+    def run():
+        for symbol, bars in batches:
+            ingester.insert_bars(bars, symbol)
+
+    return run, n_rows
+
+
+@benchmark('features.compute_features')
+def bench_compute_features(n_rows):
+    from run_features import compute_features
+
+    df = bars_fixture(n_rows)
+    frames = [group.reset_index(drop=True) for _, group in df.groupby('symbol', sort=False)]
+
+    def run():
+        for frame in frames:
+            compute_features(frame)
+
+    return run, n_rows
+
+
+@benchmark('features.standardize')
+def bench_standardize(n_rows):
+    from run_features import standardize
+
+    df, cols = _feature_frame(n_rows)
+    return (lambda: standardize(df, cols)), n_rows
+
+
+@benchmark('train.prepare_data_walk_forward')
+def bench_walk_forward(n_rows):
+    from models.data_preparation import prepare_data_walk_forward
+
+    df, cols = _feature_frame(n_rows)
+    return (lambda: prepare_data_walk_forward(df, cols, 'target')), n_rows
+
+
+@benchmark('train.classify_regimes', max_rows=1_000_000, repeat=1)
+def bench_classify_regimes(n_rows):
+    from models.regime_detector import MarketRegimeDetector
+
+    returns = bars_fixture(n_rows)['close'].pct_change()
+    detector = MarketRegimeDetector()
+    return (lambda: detector.classify_regimes(returns)), n_rows
+
+
+@benchmark('train.xgboost_fit', max_rows=1_000_000, repeat=1)
+def bench_xgboost_fit(n_rows):
+    import xgboost as xgb
+
+    df, cols = _feature_frame(n_rows)
+    X = df[cols].to_numpy(dtype=np.float32)
+    y = df['target'].to_numpy()
+    return (lambda: xgb.XGBClassifier(**XGB_BENCH_PARAMS).fit(X, y)), n_rows
+
+
+@benchmark('train.xgboost_predict')
+def bench_xgboost_predict(n_rows):
+    import xgboost as xgb
+
+    df, cols = _feature_frame(n_rows)
+    X = df[cols].to_numpy(dtype=np.float32)
+    fit_rows = min(n_rows, 100_000)
+    model = xgb.XGBClassifier(**XGB_BENCH_PARAMS).fit(X[:fit_rows], df['target'].to_numpy()[:fit_rows])
+    return (lambda: model.predict_proba(X)), n_rows
+
+
+@benchmark('backtest.realistic_slippage')
+def bench_slippage_backtest(n_rows):
+    from models.backtest_with_slippage import backtest_with_realistic_slippage
+
+    close = bars_fixture(n_rows)['close'].to_numpy()
+    predictions = np.random.default_rng(3).integers(-1, 2, size=len(close))
+    return (lambda: backtest_with_realistic_slippage(predictions, close, slippage_bp=2)), n_rows
+
+
+def _guardrails():
+    from models.risk_guardrails import RiskGuardrails
+
+    # Checks never write state, so no snapshot file (or temp directory) is needed
+    guardrails = RiskGuardrails(snapshot_path=None)
+    # No rejections, so the benchmark measures the checks rather than warning logs
+    guardrails.MAX_TRADES_PER_DAY = 10 ** 12
+    return guardrails
+
+
+@benchmark('risk.check_can_trade', max_rows=1_000_000)
+def bench_check_can_trade(n_rows):
+    guardrails = _guardrails()
+    symbols = bars_fixture(n_rows)['symbol'].tolist()
+    confidences = np.random.default_rng(5).uniform(0.6, 1.0, size=n_rows).tolist()
+
+    def run():
+        check = guardrails.check_can_trade
+        for symbol, confidence in zip(symbols, confidences):
+            check(symbol, confidence)
+
+    return run, n_rows
+
+
+@benchmark('risk.check_batch')
+def bench_check_batch(n_rows):
+    guardrails = _guardrails()
+    symbols = bars_fixture(n_rows)['symbol'].to_numpy()
+    confidences = np.random.default_rng(5).uniform(0.6, 1.0, size=n_rows)
+    sizes = np.ones(n_rows)
+    return (lambda: guardrails.check_batch(symbols, confidences, sizes)), n_rows
+
+
+@benchmark('panel.from_long')
+def bench_panel_from_long(n_rows):
+    from datapipeline.panel import Panel
+
+    df = bars_fixture(n_rows)
+    return (lambda: Panel.from_long(df)), n_rows
+
+
+@benchmark('panel.rolling_std_rank')
+def bench_panel_rolling(n_rows):
+    from datapipeline.panel import Panel, cs_rank, pct_change, rolling_std
+
+    close = Panel.from_long(bars_fixture(n_rows)).field('close')
+    return (lambda: cs_rank(rolling_std(pct_change(close), 20))), n_rows
+
+
+@benchmark('features.cross_sectional')
+def bench_cross_sectional(n_rows):
+    from datapipeline.cross_sectional import compute_cross_sectional
+    from datapipeline.panel import Panel
+
+    panel = Panel.from_long(bars_fixture(n_rows), fields=('close', 'volume'))
+    return (lambda: compute_cross_sectional(panel, memory_budget_mb=256)), n_rows
+
+
+@benchmark('quality.scan_frame')
+def bench_quality_scan(n_rows):
+    from datapipeline.quality import scan_frame
+
+    df = bars_fixture(n_rows)
+    return (lambda: scan_frame(df)), n_rows
+
+
+@benchmark('labels.triple_barrier')
+def bench_triple_barrier(n_rows):
+    from datapipeline.labeling import label_frame
+
+    df = bars_fixture(n_rows)
+    return (lambda: label_frame(df)), n_rows
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: RiskGuardrails.check_can_trade latency under contention
+Many reader threads hammer the check while one writer records trades,
+plus check_batch against a per-symbol loop over the same signal vector
+Run: python -m benchmarks.bench_risk_guardrails
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from models.risk_guardrails import RiskGuardrails
+
+
+def run(n_threads=8, calls_per_thread=50_000, n_symbols=500, writes=2_000):
+    """
+    Measure per-call check latency with concurrent readers and a trade-recording writer
+
+    Returns:
+        dict: Latency percentiles (µs) and aggregate throughput
+    """
+    # Keep rejection warnings out of the measurement
+    logging.getLogger('models.risk_guardrails').setLevel(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        guardrails = RiskGuardrails(snapshot_path=Path(tmp) / 'risk_state.json')
+        guardrails.MAX_TRADES_PER_DAY = writes * 10
+
+        symbols = [f'SYM{i:04d}' for i in range(n_symbols)]
+        latencies = np.empty((n_threads, calls_per_thread), dtype=np.int64)
+        start_barrier = threading.Barrier(n_threads + 1)
+
+        def reader(idx):
+            rng = random.Random(idx)
+            picks = [rng.choice(symbols) for _ in range(calls_per_thread)]
+            out = latencies[idx]
+            clock = time.perf_counter_ns
+            start_barrier.wait()
+            for i, symbol in enumerate(picks):
+                t0 = clock()
+                guardrails.check_can_trade(symbol, 0.6)
+                out[i] = clock() - t0
+
+        def writer():
+            rng = random.Random(-1)
+            start_barrier.wait()
+            for _ in range(writes):
+                guardrails.record_trade(rng.choice(symbols), rng.uniform(-1, 1))
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(n_threads)]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+
+        wall_start = time.perf_counter()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - wall_start
+
+    lat_us = latencies.ravel() / 1000
+    return {
+        'threads': n_threads,
+        'calls': int(lat_us.size),
+        'p50_us': float(np.percentile(lat_us, 50)),
+        'p99_us': float(np.percentile(lat_us, 99)),
+        'p999_us': float(np.percentile(lat_us, 99.9)),
+        'max_us': float(lat_us.max()),
+        'checks_per_sec': lat_us.size / wall,
+        'trades_recorded': writes,
+    }
+
+
+def run_batch(n_symbols=500, repeats=200):
+    """
+    Compare one check_batch call against a check_can_trade loop over the same signals
+
+    Returns:
+        dict: Mean time per signal vector (µs) for both paths
+    """
+    logging.getLogger('models.risk_guardrails').setLevel(logging.CRITICAL)
+
+    rng = np.random.default_rng(42)
+    symbols = [f'SYM{i:04d}' for i in range(n_symbols)]
+    confidences = rng.uniform(0.4, 0.8, n_symbols)
+    sizes = rng.integers(0, 100, n_symbols)
+
+    guardrails = RiskGuardrails(snapshot_path=None)
+    for symbol in symbols[:n_symbols // 10]:
+        guardrails.record_trade(symbol, -150)
+    guardrails.MAX_TRADES_PER_DAY = guardrails.trades_today + n_symbols // 4
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        guardrails.check_batch(symbols, confidences, sizes)
+    batch_us = (time.perf_counter() - t0) / repeats * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for symbol, confidence in zip(symbols, confidences):
+            guardrails.check_can_trade(symbol, confidence)
+    loop_us = (time.perf_counter() - t0) / repeats * 1e6
+
+    return {'symbols': n_symbols, 'batch_us': batch_us, 'loop_us': loop_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--calls', type=int, default=50_000, help='check calls per thread')
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--writes', type=int, default=2_000)
+    args = parser.parse_args()
+
+    result = run(args.threads, args.calls, args.symbols, args.writes)
+
+    print("=== RiskGuardrails.check_can_trade under contention ===")
+    print(f"  Threads:       {result['threads']} readers + 1 writer ({result['trades_recorded']} trades)")
+    print(f"  Calls:         {result['calls']:,}")
+    print(f"  p50 / p99:     {result['p50_us']:.2f}µs / {result['p99_us']:.2f}µs")
+    print(f"  p99.9 / max:   {result['p999_us']:.2f}µs / {result['max_us']:.2f}µs")
+    print(f"  Throughput:    {result['checks_per_sec']:,.0f} checks/sec")
+
+    batch = run_batch(args.symbols)
+    print(f"\n=== check_batch vs check_can_trade loop ({batch['symbols']} symbols) ===")
+    print(f"  check_batch:   {batch['batch_us']:.1f}µs per vector")
+    print(f"  loop:          {batch['loop_us']:.1f}µs per vector")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Streaming bar ingestion against the local mock Alpaca server
+Streams synthetic bars through StreamingIngester into a recording fake
+ClickHouse client, optionally dropping the connection to exercise backfill,
+then checks that every generated bar was inserted exactly once
+Run: python -m benchmarks.bench_stream_ingest --seconds 10 --drop-every 15
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from collections import Counter
+
+from benchmarks.common import FakeClickHouseClient
+from scripts.mock_alpaca import MockAlpaca
+
+
+class RecordingClickHouseClient(FakeClickHouseClient):
+    def __init__(self):
+        super().__init__()
+        self.keys = Counter()
+
+    def insert(self, table, data, column_names=None, **kwargs):
+        super().insert(table, data, column_names, **kwargs)
+        self.keys.update((row[1], row[0]) for row in data)
+
+
+async def _run(n_symbols, interval, seconds, drop_every, batch_rows, flush_ms, port):
+    from datapipeline.ingest.alpaca_stream import StreamingIngester
+
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    mock = MockAlpaca(symbols, interval=interval, drop_every=drop_every)
+    stream_url, data_url = await mock.start(port=port)
+    os.environ['ALPACA_DATA_URL'] = data_url
+
+    client = RecordingClickHouseClient()
+    ingester = StreamingIngester(symbols, url=stream_url, batch_rows=batch_rows, flush_ms=flush_ms, cache=False,
+                                 client=client, report_interval=seconds)
+    summary = await ingester.run(duration=seconds)
+    await mock.stop()
+
+    # Bars generated after the ingester stopped listening are not expected
+    expected = {
+        (symbol, bar['t']) for symbol, bars in mock.history.items() for bar in bars
+        if symbol in ingester.last_bar and bar['t'] <= ingester.last_bar[symbol].strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+    }
+    inserted = {(symbol, ts.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z') for symbol, ts in client.keys}
+    return {
+        **summary,
+        'generated': mock.stats['bars'],
+        'drops': mock.stats['drops'],
+        'missing': len(expected - inserted),
+        'duplicated': sum(1 for count in client.keys.values() if count > 1),
+    }
+
+
+def run(n_symbols=100, interval=0.2, seconds=10.0, drop_every=0, batch_rows=500, flush_ms=250, port=8765):
+    """
+    Returns:
+        dict: StreamingIngester.summary() plus generated/missing/duplicated bar counts
+    """
+    os.environ.setdefault('ALPACA_API_KEY', 'mock')
+    os.environ.setdefault('ALPACA_SECRET_KEY', 'mock')
+    logging.getLogger('datapipeline.ingest.alpaca_stream').setLevel(logging.WARNING)
+    return asyncio.run(_run(n_symbols, interval, seconds, drop_every, batch_rows, flush_ms, port))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=0.2, help='seconds between mock bars')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--drop-every', type=int, default=0, help='mock drops the connection every N bars')
+    parser.add_argument('--batch-rows', type=int, default=500)
+    parser.add_argument('--flush-ms', type=int, default=250)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    r = run(args.symbols, args.interval, args.seconds, args.drop_every, args.batch_rows, args.flush_ms, args.port)
+
+    print(f"=== Streaming ingest ({args.symbols} symbols, bar every {args.interval}s, {args.seconds:.0f}s) ===")
+    print(f"  Bars: {r['generated']:,} generated, {r['received']:,} live + {r['backfilled']:,} backfilled, "
+          f"{r['inserted']:,} inserted in {r['batches']} batches")
+    print(f"  Connection drops: {r['drops']}, reconnects: {r['reconnects']}, duplicates skipped: {r['duplicates']}")
+    for name in ('bar_latency', 'commit_latency'):
+        s = r[name]
+        if s['count']:
+            print(f"  {name:15s} p50={s['p50_ms']:7.1f}ms  p99={s['p99_ms']:7.1f}ms  max={s['max_ms']:7.1f}ms")
+    marker = '✓' if not r['missing'] and not r['duplicated'] else '❌'
+    print(f"  {marker} {r['missing']} bars missing, {r['duplicated']} inserted twice")
+
+
+if __name__ == '__main__':
+    main()
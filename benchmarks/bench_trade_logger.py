@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Order-path cost of TradeLogger.log_trade
+Compares the buffered logger against the old open/append/close per trade
+Run: python -m benchmarks.bench_trade_logger
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from monitoring.trade_logger import TradeLogger
+
+
+def _legacy_log_trade(log_file, symbol, action, quantity, price, confidence, reason):
+    trade = {
+        'timestamp': datetime.now().isoformat(),
+        'symbol': symbol,
+        'action': action,
+        'quantity': quantity,
+        'price': price,
+        'confidence': confidence,
+        'reason': reason,
+    }
+    with open(log_file, 'a') as f:
+        f.write(json.dumps(trade) + '\n')
+    return trade
+
+
+def _percentiles(latencies_ns):
+    lat_us = np.asarray(latencies_ns) / 1000
+    return {
+        'p50_us': float(np.percentile(lat_us, 50)),
+        'p99_us': float(np.percentile(lat_us, 99)),
+        'max_us': float(lat_us.max()),
+    }
+
+
+def run(n_trades=20_000, fsync='batch', parquet=False):
+    """
+    Time each log call on the order path for the legacy and buffered loggers
+
+    Returns:
+        dict: Latency percentiles per variant plus the buffered logger's drain time
+    """
+    logging.getLogger('monitoring.trade_logger').setLevel(logging.WARNING)
+    clock = time.perf_counter_ns
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        legacy = np.empty(n_trades, dtype=np.int64)
+        for i in range(n_trades):
+            t0 = clock()
+            _legacy_log_trade(tmp / 'legacy.jsonl', 'AAPL', 'BUY', 10, 180.0 + i, 0.6, 'signal')
+            legacy[i] = clock() - t0
+
+        trade_logger = TradeLogger(
+            log_file=tmp / 'buffered.jsonl',
+            fsync=fsync,
+            parquet_dir=tmp / 'parquet' if parquet else None,
+        )
+        buffered = np.empty(n_trades, dtype=np.int64)
+        for i in range(n_trades):
+            t0 = clock()
+            trade_logger.log_trade('AAPL', 'BUY', 10, 180.0 + i, 0.6, 'signal')
+            buffered[i] = clock() - t0
+
+        t0 = time.perf_counter()
+        trade_logger.close()
+        drain_ms = (time.perf_counter() - t0) * 1000
+
+        with open(tmp / 'buffered.jsonl') as f:
+            persisted = sum(1 for _ in f)
+
+    return {
+        'trades': n_trades,
+        'legacy': _percentiles(legacy),
+        'buffered': _percentiles(buffered),
+        'drain_ms': drain_ms,
+        'persisted': persisted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trades', type=int, default=20_000)
+    parser.add_argument('--fsync', choices=['never', 'batch', 'close'], default='batch')
+    parser.add_argument('--parquet', action='store_true', help='also enable the Parquet sink')
+    args = parser.parse_args()
+
+    result = run(args.trades, args.fsync, args.parquet)
+
+    print(f"=== TradeLogger.log_trade order-path latency ({result['trades']:,} trades, fsync={args.fsync}) ===")
+    for name in ('legacy', 'buffered'):
+        r = result[name]
+        print(f"  {name:10s} p50={r['p50_us']:8.2f}µs  p99={r['p99_us']:8.2f}µs  max={r['max_us']:10.2f}µs")
+    print(f"  Shutdown drain: {result['drain_ms']:.1f}ms, {result['persisted']:,}/{result['trades']:,} trades persisted")
+
+
+if __name__ == '__main__':
+    main()
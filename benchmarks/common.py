@@ -0,0 +1,219 @@
+"""
+Benchmark harness: synthetic bars, offline ClickHouse stand-in, timing and JSON results
+Benchmarks register with @benchmark and are run by benchmarks/run_all.py
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = BENCH_DIR / '.fixtures'
+RESULTS_DIR = BENCH_DIR / 'results'
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+_REGISTRY = []
+
+
+def benchmark(name, max_rows=None, repeat=3):
+    """
+    Register `func(rows) -> (callable, rows_processed)` as a benchmark
+
+    The setup function builds inputs outside the timed region and returns
+    the zero-argument callable to time. Scales above max_rows are skipped.
+    """
+    def decorator(setup):
+        _REGISTRY.append({'name': name, 'setup': setup, 'max_rows': max_rows, 'repeat': repeat})
+        return setup
+    return decorator
+
+
+def registered():
+    return list(_REGISTRY)
+
+
+def synthetic_bars(n_rows, n_symbols=None, seed=42):
+    """
+    Long-format minute bars (timestamp, symbol, open, high, low, close, volume)
+
+    Prices follow a per-symbol geometric random walk; rows are ordered by
+    symbol, then timestamp, like trading_db.market_data's sort key.
+    """
+    if n_symbols is None:
+        n_symbols = max(5, min(500, n_rows // 2_000))
+    per_symbol = -(-n_rows // n_symbols)
+    rng = np.random.default_rng(seed)
+
+    log_ret = rng.normal(0, 0.001, size=(n_symbols, per_symbol)).astype(np.float64)
+    close = 100 * np.exp(np.cumsum(log_ret, axis=1))
+    open_ = close * np.exp(rng.normal(0, 0.0005, size=close.shape))
+    spread = np.abs(rng.normal(0, 0.001, size=close.shape)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(100, 10_000, size=close.shape).astype(np.float64)
+
+    start = np.datetime64('2025-01-02T14:30')
+    timestamps = start + np.arange(per_symbol).astype('timedelta64[m]')
+    symbols = np.array([f'SYM{i:04d}' for i in range(n_symbols)])
+
+    df = pd.DataFrame({
+        'timestamp': np.tile(timestamps, n_symbols),
+        'symbol': np.repeat(symbols, per_symbol),
+        'open': open_.ravel(),
+        'high': high.ravel(),
+        'low': low.ravel(),
+        'close': close.ravel(),
+        'volume': volume.ravel(),
+    })
+    return df.iloc[:n_rows].reset_index(drop=True)
+
+
+def bars_fixture(n_rows):
+    """Synthetic bars cached as a Parquet fixture, so repeated runs skip generation"""
+    path = FIXTURE_DIR / f"bars_{n_rows}.parquet"
+    if path.exists():
+        return pd.read_parquet(path)
+    df = synthetic_bars(n_rows)
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, index=False)
+    return df
+
+
+def alpaca_bar_dicts(df):
+    """Convert bars to the JSON shape Alpaca's REST API returns"""
+    ts = (pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%dT%H:%M:%SZ')).tolist()
+    return [
+        {'t': t, 'o': o, 'h': h, 'l': l, 'c': c, 'v': v, 'n': 0, 'vw': c}
+        for t, o, h, l, c, v in zip(ts, df['open'].tolist(), df['high'].tolist(), df['low'].tolist(),
+                                    df['close'].tolist(), df['volume'].tolist())
+    ]
+
+
+class FakeClickHouseClient:
+    """Offline stand-in for clickhouse_connect clients: records inserts, answers nothing"""
+
+    def __init__(self):
+        self.inserted_rows = 0
+
+    def insert(self, table, data, column_names=None, **kwargs):
+        self.inserted_rows += len(data)
+
+    def close(self):
+        pass
+
+
+def time_callable(func, repeat):
+    """Run func `repeat` times; returns per-run wall times in seconds"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def run_suite(scales, only=None):
+    """
+    Run every registered benchmark at every requested scale
+
+    Returns:
+        list: One result dict per (benchmark, scale) that ran
+    """
+    results = []
+    for scale in scales:
+        n_rows = SCALES[scale]
+        for bench in registered():
+            if only and not any(pattern in bench['name'] for pattern in only):
+                continue
+            if bench['max_rows'] and n_rows > bench['max_rows']:
+                print(f"  - {bench['name']:32s} {scale:>4s}  skipped (max {bench['max_rows']:,} rows)")
+                continue
+
+            func, rows = bench['setup'](n_rows)
+            repeat = bench['repeat'] if n_rows <= 1_000_000 else 1
+            times = time_callable(func, repeat)
+            best = min(times)
+            result = {
+                'name': bench['name'],
+                'scale': scale,
+                'rows': rows,
+                'repeat': repeat,
+                'min_s': best,
+                'median_s': statistics.median(times),
+                'rows_per_s': rows / best if best > 0 else None,
+            }
+            results.append(result)
+            print(f"  ✓ {bench['name']:32s} {scale:>4s}  {best * 1000:10.2f}ms  {result['rows_per_s'] or 0:14,.0f} rows/s")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def write_results(results, path=None, extras=None):
+    """Store results with commit and machine metadata for trend comparison"""
+    commit = git_commit()
+    payload = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'host': platform.node(),
+        'results': results,
+    }
+    if extras:
+        payload['extras'] = extras
+    if path is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return Path(path)
+
+
+def latest_results(exclude=None):
+    files = sorted(p for p in RESULTS_DIR.glob('*.json') if p != exclude)
+    return files[-1] if files else None
+
+
+def compare_results(current, baseline_path, tolerance=0.10):
+    """
+    Print per-benchmark speed change against an earlier results file
+
+    Returns:
+        list: (name, scale, ratio) for benchmarks slower than baseline by more than tolerance
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r['name'], r['scale']): r for r in baseline['results']}
+
+    print(f"\n=== Compared with {Path(baseline_path).name} (commit {baseline['commit']}) ===")
+    slower = []
+    for r in current:
+        prev = old.get((r['name'], r['scale']))
+        if prev is None:
+            continue
+        ratio = r['min_s'] / prev['min_s'] if prev['min_s'] > 0 else float('inf')
+        marker = '⚠️' if ratio > 1 + tolerance else '  '
+        print(f"  {marker} {r['name']:32s} {r['scale']:>4s}  {prev['min_s'] * 1000:10.2f}ms → "
+              f"{r['min_s'] * 1000:10.2f}ms  ({ratio:.2f}x)")
+        if ratio > 1 + tolerance:
+            slower.append((r['name'], r['scale'], ratio))
+    return slower
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner: every registered hot-path benchmark at the requested scales
+Runs offline (synthetic Parquet fixtures, fake ClickHouse client), writes
+benchmarks/results/<time>_<commit>.json and compares against the previous run
+Run: python -m benchmarks.run_all [--scale 10k,1m,10m] [--only risk,train] [--contention] [--fail-on-regression]
+"""
+
+import argparse
+import logging
+import sys
+
+from benchmarks import bench_hot_paths  # noqa: F401  (registers benchmarks)
+from benchmarks.common import SCALES, compare_results, latest_results, run_suite, write_results
+
+
+def run_contention():
+    """Threaded hot-path scenarios from the standalone bench_* scripts, at reduced sizes"""
+    from benchmarks import bench_alerts, bench_risk_guardrails, bench_trade_logger
+
+    extras = {
+        'risk_guardrails.contention': bench_risk_guardrails.run(calls_per_thread=20_000),
+        'risk_guardrails.batch': bench_risk_guardrails.run_batch(),
+        'trade_logger': bench_trade_logger.run(n_trades=10_000),
+        'alerts': bench_alerts.run(n_alerts=50_000),
+    }
+    for name, result in extras.items():
+        print(f"  ✓ {name}")
+    return extras
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the argo benchmark suite")
+    parser.add_argument('--scale', default='10k,1m', help=f"comma-separated subset of {','.join(SCALES)}")
+    parser.add_argument('--only', help='comma-separated substrings of benchmark names to run')
+    parser.add_argument('--contention', action='store_true', help='also run the threaded bench_* scenarios')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--compare', help='results file to compare against (default: most recent)')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='slowdown flagged as regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    scales = args.scale.split(',')
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s) {unknown}; choose from {list(SCALES)}")
+
+    # Library code logs per call on some paths; keep the output to the benchmark table
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"=== Hot paths ({', '.join(scales)}) ===")
+    results = run_suite(scales, only=args.only.split(',') if args.only else None)
+
+    extras = None
+    if args.contention:
+        print("\n=== Contention scenarios ===")
+        extras = run_contention()
+
+    previous = args.compare or latest_results()
+    path = write_results(results, args.output, extras=extras)
+    print(f"\n✓ Results written to {path}")
+
+    if previous is None:
+        return 0
+    slower = compare_results(results, previous, tolerance=args.tolerance)
+    if slower and args.fail_on_regression:
+        print(f"\n❌ {len(slower)} benchmark(s) slower than {previous}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
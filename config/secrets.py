@@ -1,22 +1,279 @@
-import boto3
+"""
+Secret retrieval with a process-wide TTL cache
+Secrets are fetched once per TTL through a pluggable backend and refreshed
+in the background shortly before they expire, so callers never wait on AWS
+after the first fetch
+
+Backend selection (ARGO_SECRETS_BACKEND):
+    aws  - AWS Secrets Manager (default), one shared boto3 client per region
+    env  - JSON in environment variables, e.g. ARGO_SECRET_ALPACA_PAPER_TRADING='{...}'
+    file - JSON file mapping secret name -> secret dict (ARGO_SECRETS_FILE, default config/secrets.local.json)
+
+Secrets that are not JSON objects (e.g. a bare API token) are returned as-is.
+"""
+
 import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = int(os.getenv('ARGO_SECRETS_TTL', 300))
+DEFAULT_REFRESH_AHEAD = int(os.getenv('ARGO_SECRETS_REFRESH_AHEAD', 30))
+DEFAULT_IDLE_TTL = int(os.getenv('ARGO_SECRETS_IDLE_TTL', 3600))
+
+
+def _parse(value):
+    """JSON secrets become dicts/lists; anything else (a bare token) stays a string"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def _copy(value):
+    """Hand callers a copy of dict secrets so they cannot mutate the cached one"""
+    return dict(value) if isinstance(value, dict) else value
+
+
+class AwsSecretsBackend:
+    """AWS Secrets Manager with lazily created, shared clients"""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, region):
+        client = self._clients.get(region)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(region)
+                if client is None:
+                    import boto3
+
+                    client = self._clients[region] = boto3.client('secretsmanager', region_name=region)
+        return client
+
+    def fetch(self, secret_name, region):
+        client = self.client(region)
+        try:
+            response = client.get_secret_value(SecretId=secret_name)
+            return _parse(response['SecretString'])
+        except client.exceptions.ResourceNotFoundException:
+            raise RuntimeError(f"Secret '{secret_name}' not found in AWS Secrets Manager")
+        except Exception as e:
+            raise RuntimeError(f"Failed to retrieve secret: {e}")
+
+
+class EnvSecretsBackend:
+    """Secrets as JSON in environment variables, for CI and offline runs"""
+
+    def __init__(self, prefix='ARGO_SECRET_'):
+        self.prefix = prefix
+
+    def fetch(self, secret_name, region=None):
+        var = self.prefix + secret_name.upper().replace('-', '_').replace('/', '_')
+        value = os.getenv(var)
+        if value is None:
+            raise RuntimeError(f"Secret '{secret_name}' not found in environment ({var})")
+        return _parse(value)
+
+
+class FileSecretsBackend:
+    """Secrets from a local JSON file, for tests and offline runs"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('ARGO_SECRETS_FILE', 'config/secrets.local.json')
+
+    def fetch(self, secret_name, region=None):
+        try:
+            with open(self.path) as f:
+                secrets = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise RuntimeError(f"Failed to retrieve secret: cannot read {self.path} ({e})")
+        if secret_name not in secrets:
+            raise RuntimeError(f"Secret '{secret_name}' not found in {self.path}")
+        return secrets[secret_name]
+
+
+BACKENDS = {
+    'aws': AwsSecretsBackend,
+    'env': EnvSecretsBackend,
+    'file': FileSecretsBackend,
+}
+
+
+class SecretCache:
+    """
+    TTL cache in front of a secrets backend
+
+    A daemon thread re-fetches each entry refresh_ahead seconds before it
+    expires. If a background refresh fails, the old value is kept until the
+    entry actually expires, after which get() fetches synchronously.
+    Entries not read for idle_ttl seconds are dropped instead of refreshed,
+    so a secret fetched once is not polled for the life of the process.
+    Concurrent misses on the same secret share a single backend fetch.
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, refresh_ahead=DEFAULT_REFRESH_AHEAD, idle_ttl=DEFAULT_IDLE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.idle_ttl = idle_ttl
+        self._entries = {}
+        self._cond = threading.Condition()
+        self._refresher = None
+        self._inflight = {}
+        self._closed = False
+
+    def get(self, secret_name, region):
+        key = (secret_name, region)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry['expires']:
+            entry['last_read'] = now
+            return _copy(entry['value'])
+
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry['expires']:
+                entry['last_read'] = now
+                return _copy(entry['value'])
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {'done': threading.Event(), 'value': None, 'error': None}
+
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return _copy(flight['value'])
+
+        try:
+            value = flight['value'] = self.backend.fetch(secret_name, region)
+            self._store(key, value, read=True)
+            return _copy(value)
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+            flight['done'].set()
+
+    def close(self):
+        """Stop the background refresher and drop all entries"""
+        with self._cond:
+            self._closed = True
+            self._entries.clear()
+            self._cond.notify_all()
+        if self._refresher is not None and self._refresher is not threading.current_thread():
+            self._refresher.join(timeout=5)
+
+    def invalidate(self, secret_name=None, region=None):
+        """Drop one entry (or everything) so the next get() fetches fresh"""
+        with self._cond:
+            if secret_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((secret_name, region), None)
+
+    def _store(self, key, value, read=False, refresh=False):
+        now = time.monotonic()
+        with self._cond:
+            previous = self._entries.get(key)
+            if self._closed or (refresh and previous is None):
+                # Closed, or invalidated while the background refresh was fetching
+                return
+            if read or previous is None:
+                last_read = now
+            else:
+                last_read = previous['last_read']
+            self._entries[key] = {
+                'value': value,
+                'expires': now + self.ttl,
+                'refresh_at': now + self.ttl - self.refresh_ahead,
+                'last_read': last_read,
+            }
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name='SecretRefresher', daemon=True)
+                self._refresher.start()
+            self._cond.notify()
+
+    def _refresh_loop(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                due = [k for k, e in self._entries.items() if e['refresh_at'] <= now]
+                idle = [k for k in due if now - self._entries[k]['last_read'] >= self.idle_ttl]
+                for key in idle:
+                    # Nobody has asked for it lately: let it lapse rather than keep polling the backend
+                    del self._entries[key]
+                    logger.debug(f"Dropped idle secret '{key[0]}' from cache")
+                due = [k for k in due if k not in idle]
+                if not due:
+                    next_at = min((e['refresh_at'] for e in self._entries.values()), default=None)
+                    self._cond.wait(None if next_at is None else next_at - now)
+                    continue
+
+            for key in due:
+                try:
+                    self._store(key, self.backend.fetch(*key), refresh=True)
+                except Exception as e:
+                    logger.warning(f"⚠️ Background refresh of secret '{key[0]}' failed: {e}")
+                    with self._cond:
+                        entry = self._entries.get(key)
+                        if entry is None:
+                            continue
+                        now = time.monotonic()
+                        if entry['expires'] <= now:
+                            # Past hard expiry: let the next get() fetch synchronously
+                            del self._entries[key]
+                        else:
+                            entry['refresh_at'] = min(now + max(self.refresh_ahead / 3, 1), entry['expires'])
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_secret_cache():
+    """Process-wide SecretCache, built on first use from ARGO_SECRETS_BACKEND"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend_name = os.getenv('ARGO_SECRETS_BACKEND', 'aws')
+                if backend_name not in BACKENDS:
+                    raise RuntimeError(f"Unknown ARGO_SECRETS_BACKEND '{backend_name}' (expected {sorted(BACKENDS)})")
+                _cache = SecretCache(BACKENDS[backend_name]())
+    return _cache
+
+
+def set_secret_backend(backend, ttl=DEFAULT_TTL, refresh_ahead=DEFAULT_REFRESH_AHEAD, idle_ttl=DEFAULT_IDLE_TTL):
+    """Swap the process-wide backend (e.g. FileSecretsBackend or a stub in tests), stopping the old cache"""
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, SecretCache(backend, ttl=ttl, refresh_ahead=refresh_ahead, idle_ttl=idle_ttl)
+    if previous is not None:
+        previous.close()
+    return _cache
+
 
 def get_secret(secret_name, region='us-west-2'):
     """
-    Retrieve secret from AWS Secrets Manager
+    Retrieve secret from the configured backend (AWS Secrets Manager by default), cached for the TTL
 
     Args:
         secret_name: Name of the secret (e.g., 'alpaca-paper-trading')
         region: AWS region
 
     Returns:
-        dict: Parsed secret JSON
+        dict: Parsed secret JSON (or the raw string for non-JSON secrets)
     """
-    client = boto3.client('secretsmanager', region_name=region)
-    try:
-        response = client.get_secret_value(SecretId=secret_name)
-        return json.loads(response['SecretString'])
-    except client.exceptions.ResourceNotFoundException:
-        raise RuntimeError(f"Secret '{secret_name}' not found in AWS Secrets Manager")
-    except Exception as e:
-        raise RuntimeError(f"Failed to retrieve secret: {e}")
+    return get_secret_cache().get(secret_name, region)
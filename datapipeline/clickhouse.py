@@ -0,0 +1,166 @@
+"""
+ClickHouse access: one pooled client per process, parameterized queries and block-streamed reads
+Configuration comes from the environment (CLICKHOUSE_HOST / PORT / USER / PASSWORD,
+CLICKHOUSE_COMPRESSION, CLICKHOUSE_POOL_SIZE). Reads stream ClickHouse blocks
+through Arrow into NumPy, so a multi-GB scan never materializes Python tuples
+"""
+
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MARKET_DATA_TABLE = 'trading_db.market_data'
+BAR_COLUMNS = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
+
+# Matches docker-compose.yml; set CLICKHOUSE_PASSWORD anywhere else
+_DEV_PASSWORD = 'password123'
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client_settings(**overrides):
+    """Keyword arguments for clickhouse_connect.get_client, from the environment plus overrides"""
+    settings = {
+        'host': os.getenv('CLICKHOUSE_HOST', 'localhost'),
+        'port': int(os.getenv('CLICKHOUSE_PORT', 8123)),
+        'username': os.getenv('CLICKHOUSE_USER', 'default'),
+        'password': os.getenv('CLICKHOUSE_PASSWORD', _DEV_PASSWORD),
+        # lz4 compresses result blocks and inserts over HTTP at little CPU cost
+        'compress': os.getenv('CLICKHOUSE_COMPRESSION', 'lz4'),
+        'connect_timeout': int(os.getenv('CLICKHOUSE_CONNECT_TIMEOUT', 10)),
+        'send_receive_timeout': int(os.getenv('CLICKHOUSE_SEND_RECEIVE_TIMEOUT', 300)),
+        'query_retries': 2,
+        # No per-client session, so one client can serve concurrent queries from many threads
+        'autogenerate_session_id': False,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def new_client(pool_size=None, **overrides):
+    """A dedicated client (caller closes it), with its own HTTP connection pool"""
+    import clickhouse_connect
+    from clickhouse_connect.driver.httputil import get_pool_manager
+
+    pool_size = pool_size or int(os.getenv('CLICKHOUSE_POOL_SIZE', 8))
+    return clickhouse_connect.get_client(pool_mgr=get_pool_manager(maxsize=pool_size, block=True),
+                                         **client_settings(**overrides))
+
+
+def get_client():
+    """
+    The process-wide shared client (created on first use)
+
+    Safe to use from multiple threads; do not close it, call close_client() at shutdown.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = new_client()
+    return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+# ---- reads ----
+
+def query_arrow_stream(query, parameters=None, settings=None, client=None):
+    """
+    Yield pyarrow RecordBatches, one per ClickHouse block
+
+    Args:
+        query: SQL with server-side placeholders, e.g. "... WHERE symbol = {symbol:String}"
+        parameters: Placeholder values
+        settings: ClickHouse query settings (e.g. {'max_block_size': 65536})
+    """
+    client = client or get_client()
+    with client.query_arrow_stream(query, parameters=parameters, settings=settings, use_strings=True) as stream:
+        for batch in stream:
+            yield batch
+
+
+def query_np_stream(query, parameters=None, settings=None, client=None):
+    """
+    Yield {column: np.ndarray} per ClickHouse block (bounded memory per step)
+
+    Numeric and DateTime64 columns convert without per-value Python objects;
+    strings become object arrays.
+    """
+    for batch in query_arrow_stream(query, parameters, settings, client):
+        yield {
+            name: column.to_numpy(zero_copy_only=False)
+            for name, column in zip(batch.schema.names, batch.columns)
+        }
+
+
+def query_numpy(query, parameters=None, settings=None, client=None):
+    """Whole result as {column: np.ndarray}, assembled from the block stream"""
+    blocks = list(query_np_stream(query, parameters, settings, client))
+    if not blocks:
+        return {}
+    return {name: np.concatenate([b[name] for b in blocks]) for name in blocks[0]}
+
+
+def query_frame(query, parameters=None, settings=None, client=None):
+    """Whole result as a DataFrame (None if empty), built from NumPy columns"""
+    import pandas as pd
+
+    columns = query_numpy(query, parameters, settings, client)
+    if not columns or not len(next(iter(columns.values()))):
+        return None
+    return pd.DataFrame(columns)
+
+
+def load_bars(symbol, start=None, end=None, columns=('timestamp', 'open', 'high', 'low', 'close', 'volume'),
+              client=None):
+    """
+    One symbol's bars in timestamp order
+
+    Returns:
+        DataFrame or None if the symbol has no rows in the range
+    """
+    where = ['symbol = {symbol:String}']
+    parameters = {'symbol': symbol}
+    if start is not None:
+        where.append('timestamp >= {start:DateTime64(3)}')
+        parameters['start'] = start
+    if end is not None:
+        where.append('timestamp < {end:DateTime64(3)}')
+        parameters['end'] = end
+    query = (f"SELECT {', '.join(columns)} FROM {MARKET_DATA_TABLE} "
+             f"WHERE {' AND '.join(where)} ORDER BY timestamp")
+    return query_frame(query, parameters, client=client)
+
+
+def symbol_stats(symbol, client=None):
+    """Row count and timestamp range of one symbol"""
+    client = client or get_client()
+    result = client.query(
+        f"SELECT count(), min(timestamp), max(timestamp) FROM {MARKET_DATA_TABLE} WHERE symbol = {{symbol:String}}",
+        parameters={'symbol': symbol},
+    )
+    rows, first, last = result.result_rows[0]
+    return {'rows': rows, 'first': str(first), 'last': str(last)}
+
+
+# ---- writes ----
+
+def insert_bars(rows, column_names=BAR_COLUMNS, table=MARKET_DATA_TABLE, client=None):
+    """Insert row-oriented bars; returns the number of rows sent"""
+    if not rows:
+        return 0
+    client = client or get_client()
+    client.insert(table, rows, column_names=list(column_names))
+    return len(rows)
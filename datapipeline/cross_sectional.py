@@ -0,0 +1,239 @@
+"""
+Cross-sectional features over a Panel of the whole universe
+Per-timestamp ranks, market- and sector-relative returns, rolling beta to an
+index proxy and average pairwise correlation. Rolling statistics use
+cumulative sums (O(T·N) for any window); work is split into time-row chunks
+(cross-sectional ops) or symbol-column chunks (rolling ops) sized to a
+memory budget, and outputs can be written straight to .npy memmaps
+
+Rolling pairwise correlations are not emitted per pair: N² columns per row do
+not fit at 1000 symbols. Instead avg_corr is each symbol's mean correlation
+with the rest of the universe, from an N x N matrix recomputed every
+corr_stride rows over the trailing corr_window rows and held in between
+(by default one snapshot per 390-bar session, so it lags up to a session).
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from datapipeline.panel import cs_rank, pct_change, rolling_mean, rolling_sum, rolling_sum_count
+
+logger = logging.getLogger(__name__)
+
+# Sectors of the symbols the mock generator produces; anything unmapped is grouped as 'other'
+SECTORS = {
+    'AAPL': 'technology',
+    'MSFT': 'technology',
+    'GOOGL': 'communication',
+    'NVDA': 'technology',
+    'TSLA': 'consumer_discretionary',
+}
+
+CS_FEATURE_COLS = [
+    'cs_rank_ret_1', 'cs_rank_ret_20', 'cs_rank_rvol',
+    'mkt_rel_ret_1', 'mkt_rel_ret_20', 'sector_rel_ret_1',
+    'beta_60', 'avg_corr',
+]
+
+# float64 temporaries alive at once per cell in the heaviest step (beta's rolling moments)
+_TEMPS_PER_CELL = 12
+
+
+def _chunk_size(total, other_dim, memory_budget_mb):
+    per_unit = max(other_dim, 1) * 8 * _TEMPS_PER_CELL
+    return int(max(1, min(total, memory_budget_mb * 1024 * 1024 // per_unit)))
+
+
+def _allocate(names, shape, out_dir):
+    if out_dir is None:
+        return {name: np.full(shape, np.nan, dtype=np.float32) for name in names}
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = {}
+    for name in names:
+        out[name] = np.lib.format.open_memmap(out_dir / f"{name}.npy", mode='w+', dtype=np.float32, shape=shape)
+        out[name][:] = np.nan
+    return out
+
+
+def market_return(returns, index_col=None):
+    """Index proxy return per timestamp: a given column, else the equal-weight universe mean"""
+    if index_col is not None:
+        return returns[:, index_col].astype(np.float64)
+    valid = np.isfinite(returns)
+    total = np.where(valid, returns, 0.0).sum(axis=1, dtype=np.float64)
+    count = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def sector_mean(returns, sector_ids):
+    """
+    Mean return of each column's sector at each timestamp, broadcast back to (T, N)
+
+    Columns are grouped with one sort and np.add.reduceat, so the cost is O(T·N)
+    regardless of how many sectors there are.
+    """
+    order = np.argsort(sector_ids, kind='stable')
+    sorted_ids = sector_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+
+    x = returns[:, order]
+    valid = np.isfinite(x)
+    sums = np.add.reduceat(np.where(valid, x, 0.0), starts, axis=1, dtype=np.float64)
+    counts = np.add.reduceat(valid, starts, axis=1, dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    group_of_sorted = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+    out = np.empty_like(means, shape=returns.shape)
+    out[:, order] = means[:, group_of_sorted]
+    return out
+
+
+def rolling_beta(returns, market, window, min_periods=None):
+    """
+    Trailing OLS beta of each column on `market` from rolling sums of r, m, r·m and m²
+
+    Only timestamps where the column has a return enter its window.
+    """
+    r = returns.astype(np.float64)
+    valid = np.isfinite(r)
+    m = np.where(valid, market[:, None], np.nan)
+    sum_r, n = rolling_sum_count(r, window, min_periods)
+    sum_m, _ = rolling_sum_count(m, window, min_periods)
+    sum_rm, _ = rolling_sum_count(r * m, window, min_periods)
+    sum_mm, _ = rolling_sum_count(m * m, window, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_rm - sum_r * sum_m / n
+        var = sum_mm - sum_m * sum_m / n
+        return np.where(var > 0, cov / var, np.nan)
+
+
+def correlation_snapshots(returns, window, stride):
+    """
+    Yield (t, N x N correlation matrix) over the trailing `window` rows, every `stride` rows
+
+    A full rolling correlation matrix is O(T·N²) memory; strided snapshots keep
+    one float32 N x N matrix alive at a time. Missing returns count as zero
+    deviation (a pairwise-complete estimate would be O(W·N²) masks per step).
+    """
+    T = returns.shape[0]
+    for t in range(window - 1, T, stride):
+        x = returns[t - window + 1:t + 1].astype(np.float64)
+        valid = np.isfinite(x)
+        n = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, np.where(valid, x, 0.0).sum(axis=0) / n, 0.0)
+            dev = np.where(valid, x - mean, 0.0)
+            norm = np.sqrt((dev * dev).sum(axis=0))
+            z = np.where(norm > 0, dev / norm, 0.0)
+        corr = (z.T @ z).astype(np.float32)
+        corr[:, norm == 0] = np.nan
+        corr[norm == 0, :] = np.nan
+        yield t, corr
+
+
+def compute_cross_sectional(panel, sectors=None, index_symbol=None, beta_window=60, momentum_window=20,
+                            volume_window=20, corr_window=390, corr_stride=390, memory_budget_mb=512,
+                            out_dir=None):
+    """
+    Cross-sectional features for every (timestamp, symbol) cell of a panel
+
+    Rolling windows need half their rows present, since missing bars are common
+    across a large universe; momentum sums treat missing bars as flat.
+
+    Args:
+        panel: datapipeline.panel.Panel with at least close (and volume for cs_rank_rvol)
+        sectors: {symbol: sector}; defaults to SECTORS, unmapped symbols share 'other'
+        index_symbol: Column to use as the market/index proxy (default: equal-weight mean)
+        beta_window: Rows in the rolling beta window
+        momentum_window: Rows in the momentum-rank and relative-return windows
+        volume_window: Rows in the relative-volume baseline
+        corr_window: Rows in each correlation snapshot
+        corr_stride: Rows between correlation snapshots (avg_corr is held in between)
+        memory_budget_mb: Target size of intermediate arrays per chunk
+        out_dir: Write each feature as <out_dir>/<name>.npy (memmap) instead of in RAM
+
+    Returns:
+        dict: {feature name: float32 (T, N) array}
+    """
+    T, N = panel.mask.shape
+    sectors = SECTORS if sectors is None else sectors
+    _, sector_ids = np.unique([sectors.get(s, 'other') for s in panel.symbols], return_inverse=True)
+    index_col = panel.symbols.index(index_symbol) if index_symbol in panel.symbols else None
+    if index_symbol is not None and index_col is None:
+        logger.warning(f"⚠️ Index proxy {index_symbol} not in panel, using the equal-weight market")
+
+    out = _allocate(CS_FEATURE_COLS, (T, N), out_dir)
+    close = panel.field('close')
+    returns = pct_change(close)
+    market = market_return(returns, index_col)
+    has_volume = 'volume' in panel.fields
+
+    # Rolling ops are independent per symbol: process column chunks over the full history
+    cols = _chunk_size(N, T, memory_budget_mb)
+    for c0 in range(0, N, cols):
+        block = slice(c0, c0 + cols)
+        r = returns[:, block]
+        out['mkt_rel_ret_20'][:, block] = rolling_sum(r - market[:, None].astype(r.dtype), momentum_window,
+                                                      momentum_window // 2)
+        out['beta_60'][:, block] = rolling_beta(r, market, beta_window, beta_window // 2)
+
+    # Cross-sectional ops are independent per timestamp: process row chunks, with
+    # enough overlap for the momentum and volume windows
+    rows = _chunk_size(T, N, memory_budget_mb)
+    lookback = max(momentum_window, volume_window)
+    for t0 in range(0, T, rows):
+        t1 = min(t0 + rows, T)
+        h0 = max(t0 - lookback, 0)
+        keep = slice(t0 - h0, None)
+
+        r = returns[h0:t1]
+        out['cs_rank_ret_1'][t0:t1] = cs_rank(r[keep])
+        out['cs_rank_ret_20'][t0:t1] = cs_rank(rolling_sum(r, momentum_window, momentum_window // 2)[keep])
+        out['mkt_rel_ret_1'][t0:t1] = (r[keep] - market[t0:t1, None])
+        out['sector_rel_ret_1'][t0:t1] = (r[keep] - sector_mean(r[keep], sector_ids))
+        if has_volume:
+            volume = panel.field('volume')[h0:t1]
+            baseline = rolling_mean(volume, volume_window, volume_window // 2)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out['cs_rank_rvol'][t0:t1] = cs_rank((volume / baseline)[keep])
+
+    avg_corr = out['avg_corr']
+    for t, corr in correlation_snapshots(returns, corr_window, corr_stride):
+        valid = np.isfinite(corr)
+        n_peers = valid.sum(axis=1) - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_corr = (np.where(valid, corr, 0.0).sum(axis=1) - 1) / n_peers
+        avg_corr[t:t + corr_stride] = np.where(n_peers > 0, mean_corr, np.nan)
+
+    # Cells with no bar stay NaN
+    for name in CS_FEATURE_COLS:
+        out[name][~panel.mask] = np.nan
+
+    return out
+
+
+def add_cross_sectional_features(df, **kwargs):
+    """
+    Compute cross-sectional features for a long (timestamp, symbol, ...) frame and add them as columns
+
+    Args:
+        df: Long frame with timestamp, symbol, close (and volume)
+        **kwargs: Passed to compute_cross_sectional
+
+    Returns:
+        DataFrame: df with CS_FEATURE_COLS added
+    """
+    from datapipeline.panel import Panel
+
+    panel = Panel.from_long(df, fields=('close', 'volume'))
+    features = compute_cross_sectional(panel, **kwargs)
+    for name, values in features.items():
+        df[name] = panel.to_rows(values)
+    logger.info(f"  ✓ {len(CS_FEATURE_COLS)} cross-sectional features for {len(panel.symbols)} symbols "
+                f"x {len(panel.timestamps)} timestamps")
+    return df
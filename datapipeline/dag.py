@@ -0,0 +1,195 @@
+"""
+Local pipeline DAG runner with content-hash caching
+Each stage's cache key hashes its own fingerprint (data ranges, config,
+hyperparameters) together with the keys of its dependencies, so a stage is
+skipped exactly when nothing upstream of it changed. Independent stages run
+concurrently on a thread pool.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """One unit of work in a PipelineDAG"""
+
+    def __init__(self, name, func, deps=(), fingerprint=None, outputs=(), cacheable=True, cache_if=None):
+        """
+        Args:
+            name: Unique stage name
+            func: callable(inputs) -> result, where inputs maps dependency name -> its result
+            deps: Names of stages whose results this stage consumes
+            fingerprint: callable() -> JSON-serializable description of this stage's inputs
+                (evaluated after deps finish, so it can observe what they changed)
+            outputs: Files the stage writes; a cache hit also requires they still exist
+            cacheable: False for stages with side effects that must always run (e.g. ingestion)
+            cache_if: callable(result) -> bool; results it rejects (e.g. a failed run) are not cached
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.fingerprint = fingerprint
+        self.outputs = tuple(Path(p) for p in outputs)
+        self.cacheable = cacheable
+        self.cache_if = cache_if
+
+
+class PipelineDAG:
+    """Dependency-ordered, cached, parallel stage runner"""
+
+    def __init__(self, cache_dir='.argo_cache', max_workers=4):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+
+    def add(self, stage):
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage '{stage.name}'")
+        self.stages[stage.name] = stage
+        return stage
+
+    def _toposort(self, targets=None):
+        order, visiting, visited = [], set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.remove(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def _cache_key(self, stage, dep_keys):
+        payload = {
+            'stage': stage.name,
+            'fingerprint': stage.fingerprint() if stage.fingerprint else None,
+            'deps': {d: dep_keys[d] for d in stage.deps},
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()[:16]
+
+    def _cache_path(self, stage, key):
+        safe_name = stage.name.replace('/', '_').replace(':', '_')
+        return self.cache_dir / safe_name / f"{key}.pkl"
+
+    def _execute(self, name, results, keys, force, t0):
+        stage = self.stages[name]
+        start = time.perf_counter()
+        key = self._cache_key(stage, keys)
+        path = self._cache_path(stage, key)
+
+        cached = (
+            stage.cacheable and name not in force and path.exists()
+            and all(p.exists() for p in stage.outputs)
+        )
+        if cached:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        else:
+            result = stage.func({d: results[d] for d in stage.deps})
+            if stage.cacheable and stage.cache_if is not None and not stage.cache_if(result):
+                # Drop any stale entry too, so the next run retries instead of reusing it
+                path.unlink(missing_ok=True)
+                logger.warning(f"⚠️ Not caching '{name}': result did not pass its cache check")
+            elif stage.cacheable:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix('.tmp')
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+
+        end = time.perf_counter()
+        timing = {'start': start - t0, 'end': end - t0, 'seconds': end - start, 'cached': cached, 'key': key}
+        logger.info(f"  {'↺ cached' if cached else '✓ ran   '} {name:24s} {timing['seconds']:8.2f}s  [{key}]")
+        return result, key, timing
+
+    def run(self, targets=None, force=()):
+        """
+        Run the stages needed for `targets` (default: all), reusing cached results
+
+        Args:
+            targets: Stage names to produce; their dependencies are included automatically
+            force: Stage names to re-run even on a cache hit
+
+        Returns:
+            dict: Stage name -> result
+        """
+        order = self._toposort(targets)
+        force = set(force)
+        results, keys, self.timings = {}, {}, {}
+        pending = list(order)
+        running = {}
+        t0 = time.perf_counter()
+
+        logger.info(f"Running {len(order)} stage(s) with {self.max_workers} worker(s)")
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            while pending or running:
+                for name in [n for n in pending if all(d in keys for d in self.stages[n].deps)]:
+                    pending.remove(name)
+                    running[pool.submit(self._execute, name, results, keys, force, t0)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name], keys[name], self.timings[name] = future.result()
+                    except Exception:
+                        logger.error(f"❌ Stage '{name}' failed")
+                        for other in running:
+                            other.cancel()
+                        raise
+
+        return results
+
+    def critical_path(self):
+        """
+        Longest chain of dependent stage durations from the last run
+
+        Returns:
+            tuple: (list of stage names, total seconds)
+        """
+        best = {}
+        for name in self._toposort(list(self.timings)):
+            deps = [d for d in self.stages[name].deps if d in best]
+            prev = max(deps, key=lambda d: best[d][1], default=None)
+            chain, total = best[prev] if prev else ([], 0.0)
+            best[name] = (chain + [name], total + self.timings[name]['seconds'])
+        return max(best.values(), key=lambda v: v[1], default=([], 0.0))
+
+    def report(self):
+        """Human-readable timing report of the last run"""
+        if not self.timings:
+            return "No stages run"
+        wall = max(t['end'] for t in self.timings.values())
+        total = sum(t['seconds'] for t in self.timings.values())
+        path, path_seconds = self.critical_path()
+        critical = set(path)
+
+        lines = ["=== PIPELINE TIMING REPORT ==="]
+        for name, t in sorted(self.timings.items(), key=lambda kv: kv[1]['start']):
+            marker = '*' if name in critical else ' '
+            status = 'cached' if t['cached'] else 'ran'
+            lines.append(f" {marker} {name:24s} {t['start']:8.2f}s → {t['end']:8.2f}s  {t['seconds']:8.2f}s  {status}")
+        lines.append(f"  Wall clock: {wall:.2f}s | Sum of stages: {total:.2f}s | Parallel speedup: {total / wall:.1f}x"
+                     if wall > 0 else f"  Wall clock: {wall:.2f}s")
+        lines.append(f"  Critical path (*): {' → '.join(path)} = {path_seconds:.2f}s")
+        return '\n'.join(lines)
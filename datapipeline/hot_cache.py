@@ -0,0 +1,397 @@
+"""
+Hot Cache: latest bars, features and model scores per symbol in Redis
+Values are fixed-layout binary (little-endian int64/float64 bars, float32
+feature vectors) rather than JSON, writes for many symbols go out in one
+pipeline, every key carries a TTL so a stalled producer shows up as missing
+data instead of stale data, and snapshot() fetches the whole universe in a
+single round trip
+Run: python argo.py cache [--symbols AAPL,MSFT]
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'argo'
+MAX_BARS = 500
+
+BAR_DTYPE = np.dtype([
+    ('timestamp', '<i8'),  # epoch milliseconds, UTC
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('vwap', '<f8'),
+])
+_FEATURE_HEADER = struct.Struct('<q')  # epoch ms, followed by float32 values
+_SCORE = struct.Struct('<qd')  # epoch ms, score, followed by the ASCII model version
+
+# Seconds a producer skips cache writes after Redis fails, so ingestion never waits on a down cache
+RETRY_AFTER = 30.0
+
+_cache = None
+_cache_lock = threading.Lock()
+_retry_at = 0.0
+
+
+def _to_ms(timestamps):
+    """Timestamps (ISO strings, datetimes, datetime64) → int64 epoch milliseconds, UTC"""
+    import pandas as pd
+
+    if np.isscalar(timestamps) or not hasattr(timestamps, '__len__'):
+        return int(pd.Timestamp(timestamps).value // 1_000_000)
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+    return np.asarray(ts.asi8 // 1_000_000, dtype=np.int64)
+
+
+def bars_from_alpaca(bars):
+    """Alpaca bar dicts ({'t', 'o', 'h', 'l', 'c', 'v', 'vw'}) → BAR_DTYPE array"""
+    out = np.empty(len(bars), dtype=BAR_DTYPE)
+    if not bars:
+        return out
+    out['timestamp'] = _to_ms([b['t'] for b in bars])
+    for field, key in (('open', 'o'), ('high', 'h'), ('low', 'l'), ('close', 'c'), ('volume', 'v')):
+        out[field] = [b[key] for b in bars]
+    out['vwap'] = [b.get('vw', 0.0) for b in bars]
+    return out
+
+
+def bars_from_frame(df):
+    """A (timestamp, open, high, low, close, volume[, vwap]) frame → BAR_DTYPE array"""
+    out = np.zeros(len(df), dtype=BAR_DTYPE)
+    out['timestamp'] = _to_ms(df['timestamp'])
+    for field in BAR_DTYPE.names[1:]:
+        if field in df.columns:
+            out[field] = df[field].to_numpy(dtype=np.float64)
+    return out
+
+
+def bars_to_frame(bars):
+    """BAR_DTYPE array → DataFrame with a datetime64 timestamp column"""
+    import pandas as pd
+
+    df = pd.DataFrame(bars)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+
+class HotCache:
+    """
+    Latest per-symbol state shared between producers and readers
+
+    Layout (all keys under <prefix>:):
+        bars:<symbol>       sorted set of BAR_DTYPE records scored by bar time (one per timestamp),
+                            capped at the newest max_bars
+        features:<symbol>   int64 timestamp + float32 vector in the order of features:cols
+        features:cols       JSON list of feature names
+        score:<symbol>      int64 timestamp, float64 score, model version
+        symbols             set of every symbol written
+    """
+
+    def __init__(self, client=None, prefix=KEY_PREFIX, max_bars=MAX_BARS, bar_ttl=24 * 3600, feature_ttl=3600,
+                 score_ttl=900):
+        """
+        Args:
+            client: redis.Redis (or fakeredis) instance; default from REDIS_HOST / REDIS_PORT / REDIS_DB
+            prefix: Key namespace
+            max_bars: Bars kept per symbol
+            bar_ttl, feature_ttl, score_ttl: Seconds each kind of key lives after its last write
+        """
+        self.client = client if client is not None else self._connect()
+        self.prefix = prefix
+        self.max_bars = max_bars
+        self.bar_ttl = bar_ttl
+        self.feature_ttl = feature_ttl
+        self.score_ttl = score_ttl
+
+    @staticmethod
+    def _connect():
+        import redis
+
+        return redis.Redis(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            db=int(os.getenv('REDIS_DB', 0)),
+            password=os.getenv('REDIS_PASSWORD') or None,
+            socket_connect_timeout=1.0,
+            socket_timeout=2.0,
+            health_check_interval=30,
+        )
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    def _pipeline(self):
+        # No MULTI/EXEC: batching is for round trips, not atomicity
+        return self.client.pipeline(transaction=False)
+
+    # ---- writes ----
+
+    def push_bars(self, bars_by_symbol):
+        """
+        Merge bars by timestamp and trim each symbol to the newest max_bars
+
+        Bars may arrive in any order (e.g. a REST backfill after live pushes); a
+        bar replaces any cached bar with the same timestamp.
+
+        Args:
+            bars_by_symbol: {symbol: BAR_DTYPE array}
+
+        Returns:
+            int: Bars written
+        """
+        pipe = self._pipeline()
+        written = 0
+        for symbol, bars in bars_by_symbol.items():
+            bars = np.ascontiguousarray(bars, dtype=BAR_DTYPE)
+            if not len(bars):
+                continue
+            # Keep the last copy of each timestamp in the batch, then the newest max_bars of those
+            _, last = np.unique(bars['timestamp'][::-1], return_index=True)
+            bars = bars[len(bars) - 1 - last][-self.max_bars:]
+            key = self._key('bars', symbol)
+            for ts in bars['timestamp'].tolist():
+                pipe.zremrangebyscore(key, ts, ts)
+            pipe.zadd(key, {record.tobytes(): int(ts) for record, ts in zip(bars, bars['timestamp'])})
+            pipe.zremrangebyrank(key, 0, -self.max_bars - 1)
+            pipe.expire(key, self.bar_ttl)
+            pipe.sadd(self._key('symbols'), symbol)
+            written += len(bars)
+        if written:
+            pipe.execute()
+        return written
+
+    def put_features(self, features_by_symbol, feature_cols):
+        """
+        Replace the current feature vector of each symbol
+
+        Args:
+            features_by_symbol: {symbol: (timestamp, values in feature_cols order)}
+            feature_cols: Feature names
+        """
+        pipe = self._pipeline()
+        pipe.set(self._key('features', 'cols'), json.dumps(list(feature_cols)))
+        for symbol, (timestamp, values) in features_by_symbol.items():
+            payload = _FEATURE_HEADER.pack(_to_ms(timestamp)) + np.asarray(values, dtype='<f4').tobytes()
+            pipe.set(self._key('features', symbol), payload, ex=self.feature_ttl)
+            pipe.sadd(self._key('symbols'), symbol)
+        pipe.execute()
+        return len(features_by_symbol)
+
+    def put_features_frame(self, df, feature_cols, time_col='timestamp', symbol_col='symbol'):
+        """Cache the latest row per symbol of a long feature frame"""
+        latest = df.sort_values(time_col, kind='stable').groupby(symbol_col, sort=False).tail(1)
+        values = latest[list(feature_cols)].to_numpy(dtype=np.float32)
+        return self.put_features(
+            {symbol: (ts, row) for symbol, ts, row in zip(latest[symbol_col], latest[time_col], values)},
+            feature_cols,
+        )
+
+    def put_scores(self, scores, timestamp=None, model_version=''):
+        """
+        Store the latest model score per symbol
+
+        Args:
+            scores: {symbol: score}
+            timestamp: Time the scores refer to (default: now)
+            model_version: Registry version that produced them
+        """
+        ts = _to_ms(timestamp) if timestamp is not None else int(time.time() * 1000)
+        version = (model_version or '').encode('ascii')
+        pipe = self._pipeline()
+        for symbol, score in scores.items():
+            pipe.set(self._key('score', symbol), _SCORE.pack(ts, float(score)) + version, ex=self.score_ttl)
+            pipe.sadd(self._key('symbols'), symbol)
+        pipe.execute()
+        return len(scores)
+
+    # ---- reads (each queues onto a pipeline, then decodes its slice of the replies) ----
+
+    def _queue_bars(self, pipe, symbols, n):
+        start = -n if n else 0
+        for symbol in symbols:
+            pipe.zrange(self._key('bars', symbol), start, -1)
+        return len(symbols)
+
+    @staticmethod
+    def _decode_bars(symbols, replies):
+        return {
+            symbol: np.frombuffer(b''.join(records), dtype=BAR_DTYPE)
+            for symbol, records in zip(symbols, replies) if records
+        }
+
+    def _queue_features(self, pipe, symbols):
+        pipe.get(self._key('features', 'cols'))
+        pipe.mget([self._key('features', s) for s in symbols])
+        return 2
+
+    @staticmethod
+    def _decode_features(symbols, replies):
+        import pandas as pd
+
+        cols_json, payloads = replies
+        cols = json.loads(cols_json) if cols_json else []
+        rows, index, stamps = [], [], []
+        for symbol, payload in zip(symbols, payloads):
+            if payload is None:
+                continue
+            stamps.append(_FEATURE_HEADER.unpack_from(payload)[0])
+            rows.append(np.frombuffer(payload, dtype='<f4', offset=_FEATURE_HEADER.size))
+            index.append(symbol)
+        df = pd.DataFrame(np.vstack(rows) if rows else np.empty((0, len(cols)), dtype=np.float32),
+                          index=pd.Index(index, name='symbol'), columns=cols)
+        df.insert(0, 'timestamp', pd.to_datetime(np.asarray(stamps, dtype=np.int64), unit='ms'))
+        return df
+
+    def _queue_scores(self, pipe, symbols):
+        pipe.mget([self._key('score', s) for s in symbols])
+        return 1
+
+    @staticmethod
+    def _decode_scores(symbols, replies):
+        import pandas as pd
+
+        records = []
+        for symbol, payload in zip(symbols, replies[0]):
+            if payload is None:
+                continue
+            ts, score = _SCORE.unpack_from(payload)
+            records.append((symbol, ts, score, payload[_SCORE.size:].decode('ascii')))
+        df = pd.DataFrame(records, columns=['symbol', 'timestamp', 'score', 'model_version']).set_index('symbol')
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+        return df
+
+    def _read(self, symbols, *parts):
+        pipe = self._pipeline()
+        counts = [queue(pipe, *args) for queue, _, args in parts]
+        replies = pipe.execute()
+        out, pos = [], 0
+        for count, (_, decode, _) in zip(counts, parts):
+            out.append(decode(symbols, replies[pos:pos + count]))
+            pos += count
+        return out
+
+    def symbols(self):
+        return sorted(s.decode() for s in self.client.smembers(self._key('symbols')))
+
+    def bars(self, symbols, n=None):
+        """
+        Last n (default: all cached) bars per symbol
+
+        Returns:
+            dict: {symbol: BAR_DTYPE array}; symbols with nothing cached are left out
+        """
+        symbols = list(symbols)
+        return self._read(symbols, (self._queue_bars, self._decode_bars, (symbols, n)))[0]
+
+    def features(self, symbols):
+        """Current feature vectors as a DataFrame indexed by symbol (timestamp + feature columns)"""
+        symbols = list(symbols)
+        return self._read(symbols, (self._queue_features, self._decode_features, (symbols,)))[0]
+
+    def scores(self, symbols):
+        """Latest scores as a DataFrame indexed by symbol (timestamp, score, model_version)"""
+        symbols = list(symbols)
+        return self._read(symbols, (self._queue_scores, self._decode_scores, (symbols,)))[0]
+
+    def snapshot(self, symbols=None, n_bars=None):
+        """
+        Bars, features and scores for many symbols in one round trip
+
+        Args:
+            symbols: Symbols to read (default: every cached symbol, which costs one extra round trip)
+            n_bars: Bars per symbol (default: all cached)
+
+        Returns:
+            dict: {'bars': {symbol: array}, 'features': DataFrame, 'scores': DataFrame}
+        """
+        symbols = list(symbols) if symbols is not None else self.symbols()
+        bars, features, scores = self._read(
+            symbols,
+            (self._queue_bars, self._decode_bars, (symbols, n_bars)),
+            (self._queue_features, self._decode_features, (symbols,)),
+            (self._queue_scores, self._decode_scores, (symbols,)),
+        )
+        return {'bars': bars, 'features': features, 'scores': scores}
+
+
+def get_cache():
+    """The process-wide HotCache (created on first use)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HotCache()
+    return _cache
+
+
+def write_through(method, *args, **kwargs):
+    """
+    Best-effort producer write, e.g. write_through('push_bars', {...})
+
+    Redis being down or not installed must never fail ingestion or feature runs:
+    the error is logged once and writes are skipped for RETRY_AFTER seconds.
+
+    Returns:
+        The method's result, or None if the write was skipped
+    """
+    global _retry_at
+    if time.monotonic() < _retry_at:
+        return None
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        _retry_at = float('inf')
+        logger.warning("⚠️ redis is not installed, hot cache disabled")
+        return None
+    try:
+        return getattr(get_cache(), method)(*args, **kwargs)
+    except RedisError as e:
+        _retry_at = time.monotonic() + RETRY_AFTER
+        logger.warning(f"⚠️ Hot cache {method} failed, skipping writes for {RETRY_AFTER:.0f}s: {e}")
+        return None
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the cached state of every symbol")
+    parser.add_argument('--symbols', help='comma-separated symbols (default: every cached symbol)')
+    parser.add_argument('--bars', type=int, default=5, help='bars to show per symbol')
+    args = parser.parse_args(argv)
+
+    from redis.exceptions import RedisError
+
+    try:
+        t0 = time.perf_counter()
+        snap = get_cache().snapshot(args.symbols.split(',') if args.symbols else None, n_bars=args.bars)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+    except RedisError as e:
+        print(f"❌ Redis unavailable: {e}")
+        return 1
+
+    print(f"=== Hot cache snapshot ({elapsed_ms:.1f}ms) ===")
+    for symbol, bars in snap['bars'].items():
+        last = bars[-1]
+        print(f"  {symbol:6s} {len(bars)} bars, last close {last['close']:.2f} "
+              f"at {np.datetime64(int(last['timestamp']), 'ms')}")
+    if len(snap['features']):
+        print("\nFeatures:")
+        print(snap['features'].to_string())
+    if len(snap['scores']):
+        print("\nScores:")
+        print(snap['scores'].to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,19 +5,59 @@ Fetches minute bars and loads into ClickHouse
 """
 import os
 import requests
-import clickhouse_connect
 from datetime import datetime, timedelta
 from typing import List, Dict
 import time
-from dotenv import load_dotenv
 
-load_dotenv()
+DATA_URL = "https://data.alpaca.markets/v2"
+
+
+def fetch_bars(symbol: str, start: str, end: str, headers: Dict, data_url: str = None,
+               timeframe: str = "1Min") -> List[Dict]:
+    """Fetch bar data from Alpaca's REST API, following pagination"""
+    url = f"{data_url or os.getenv('ALPACA_DATA_URL') or DATA_URL}/stocks/{symbol}/bars"
+    params = {
+        "start": start,
+        "end": end,
+        "timeframe": timeframe,
+        "adjustment": "raw",
+        "limit": 10000
+    }
+
+    all_bars = []
+    page_token = None
+
+    while True:
+        if page_token:
+            params['page_token'] = page_token
+
+        try:
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+
+            bars = data.get('bars') or []
+            all_bars.extend(bars)
+
+            page_token = data.get('next_page_token')
+            if not page_token:
+                break
+
+            time.sleep(0.1)
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data for {symbol}: {e}")
+            break
+
+    print(f"Fetched {len(all_bars)} bars for {symbol}")
+    return all_bars
+
 
 class AlpacaDataIngester:
-    def __init__(self):
+    def __init__(self, cache: bool = True):
         self.api_key = os.getenv('ALPACA_API_KEY')
         self.secret_key = os.getenv('ALPACA_SECRET_KEY')
-        self.data_url = "https://data.alpaca.markets/v2"
+        self.data_url = os.getenv('ALPACA_DATA_URL') or DATA_URL
 
         if not self.api_key or not self.secret_key:
             raise ValueError("ALPACA_API_KEY and ALPACA_SECRET_KEY not found in environment")
@@ -27,79 +67,33 @@ class AlpacaDataIngester:
             "APCA-API-SECRET-KEY": self.secret_key
         }
 
-        self.ch_client = clickhouse_connect.get_client(
-            host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
-            port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
-            username=os.getenv('CLICKHOUSE_USER', 'default'),
-            password=os.getenv('CLICKHOUSE_PASSWORD', 'password123')
-        )
+        from datapipeline.clickhouse import get_client
+
+        self.ch_client = get_client()
+        # Write-through of the latest bars to the Redis hot cache
+        self.cache = cache
 
     def fetch_bars(self, symbol: str, start: str, end: str, timeframe: str = "1Min") -> List[Dict]:
         """Fetch bar data from Alpaca"""
-        url = f"{self.data_url}/stocks/{symbol}/bars"
-        params = {
-            "start": start,
-            "end": end,
-            "timeframe": timeframe,
-            "adjustment": "raw",
-            "limit": 10000
-        }
+        return fetch_bars(symbol, start, end, self.headers, self.data_url, timeframe)
 
-        all_bars = []
-        page_token = None
-
-        while True:
-            if page_token:
-                params['page_token'] = page_token
-
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+    def insert_bars(self, bars: List[Dict], symbol: str) -> int:
+        """Insert bars into ClickHouse (and the tail into the hot cache)"""
+        if not bars:
+            return 0
 
-                bars = data.get('bars', [])
-                all_bars.extend(bars)
+        from datapipeline.clickhouse import insert_bars
 
-                page_token = data.get('next_page_token')
-                if not page_token:
-                    break
+        rows = [[bar['t'], symbol, bar['o'], bar['h'], bar['l'], bar['c'], bar['v'], bar.get('n', 0),
+                 bar.get('vw', 0.0)] for bar in bars]
+        inserted = insert_bars(rows, client=self.ch_client)
 
-                time.sleep(0.1)
+        if self.cache:
+            from datapipeline.hot_cache import MAX_BARS, bars_from_alpaca, write_through
 
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching data for {symbol}: {e}")
-                break
+            write_through('push_bars', {symbol: bars_from_alpaca(bars[-MAX_BARS:])})
 
-        print(f"Fetched {len(all_bars)} bars for {symbol}")
-        return all_bars
-
-    def insert_bars(self, bars: List[Dict], symbol: str) -> int:
-        """Insert bars into ClickHouse"""
-        if not bars:
-            return 0
-
-        data = []
-        for bar in bars:
-            data.append([
-                bar['t'],
-                symbol,
-                bar['o'],
-                bar['h'],
-                bar['l'],
-                bar['c'],
-                bar['v'],
-                bar.get('n', 0),
-                bar.get('vw', 0.0)
-            ])
-
-        self.ch_client.insert(
-            "trading_db.market_data",
-            data,
-            column_names=["timestamp", "symbol", "open", "high", "low",
-                         "close", "volume", "trade_count", "vwap"]
-        )
-
-        return len(data)
+        return inserted
 
     def ingest_symbols(self, symbols: List[str], start: str, end: str):
         """Ingest data for multiple symbols"""
@@ -116,16 +110,23 @@ class AlpacaDataIngester:
         return total_inserted
 
     def close(self):
-        self.ch_client.close()
+        from datapipeline.clickhouse import close_client
+
+        close_client()
 
 
-def main():
+def main(symbols: List[str] = None, lookback_days: int = None, cache: bool = True):
     """Main ingestion routine"""
-    ingester = AlpacaDataIngester()
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    ingester = AlpacaDataIngester(cache=cache)
 
-    symbols_str = os.getenv('DATA_SYMBOLS', 'AAPL,MSFT,GOOGL,TSLA,NVDA')
-    symbols = [s.strip() for s in symbols_str.split(',')]
-    lookback_days = int(os.getenv('DATA_LOOKBACK_DAYS', 7))
+    if symbols is None:
+        symbols_str = os.getenv('DATA_SYMBOLS', 'AAPL,MSFT,GOOGL,TSLA,NVDA')
+        symbols = [s.strip() for s in symbols_str.split(',')]
+    if lookback_days is None:
+        lookback_days = int(os.getenv('DATA_LOOKBACK_DAYS', 7))
 
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(days=lookback_days)
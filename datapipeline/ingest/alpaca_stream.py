@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Alpaca streaming ingestion: live minute bars over the market-data WebSocket
+Bars for the whole universe arrive on one connection, are buffered and
+inserted into ClickHouse in micro-batches (every batch_rows bars or flush_ms,
+whichever comes first). Failed inserts are retried every flush_ms with the rows
+kept in the buffer, up to max_buffer_rows; beyond that the oldest bars are
+dropped (and counted) so a ClickHouse outage cannot exhaust memory. On every
+reconnect the gap since each symbol's last bar is backfilled over REST while
+live bars keep flowing. Committed bars are written through to the Redis hot
+cache together with each symbol's recomputed feature row, which is what the
+execution engine trades on; cache failures are logged and never stop ingestion
+Run: python argo.py stream [--symbols AAPL,MSFT] [--url ws://localhost:8765/v2/iex]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from datapipeline.clickhouse import BAR_COLUMNS
+from monitoring.metrics_tracker import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+STREAM_URL = 'wss://stream.data.alpaca.markets/v2'
+BAR_SECONDS = 60  # Alpaca stamps a minute bar with its open; it is complete one minute later
+
+
+def _parse_ts(value):
+    """RFC 3339 bar timestamp (e.g. 2024-01-02T14:30:00Z) → aware datetime"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _rfc3339(dt):
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class StreamingIngester:
+    """
+    Long-running bar subscriber with micro-batched ClickHouse inserts
+
+    Latency is reported two ways: bar latency (receipt time minus the bar's
+    close, i.e. how stale a bar is when it reaches us) and end-to-end latency
+    (bar close until its batch is committed to ClickHouse).
+    """
+
+    def __init__(self, symbols: List[str], url: str = None, feed: str = None, batch_rows: int = 500,
+                 flush_ms: int = 1000, backfill: bool = True, cache: bool = True, features: bool = True,
+                 client=None, report_interval: float = 60.0, max_buffer_rows: int = 100_000):
+        """
+        Args:
+            symbols: Symbols to subscribe to
+            url: WebSocket endpoint (default: $ALPACA_STREAM_URL, else Alpaca's for `feed`)
+            feed: Market-data feed, 'iex' or 'sip' (default: $ALPACA_DATA_FEED or iex)
+            batch_rows: Buffered bars that trigger an insert
+            flush_ms: Max milliseconds a bar waits in the buffer
+            backfill: Fetch missed bars over REST after each (re)connect
+            cache: Write-through of inserted bars to the Redis hot cache
+            features: With cache, also recompute and cache the feature row of every symbol in a batch
+            client: ClickHouse client (default: the shared one)
+            report_interval: Seconds between latency log lines
+            max_buffer_rows: Bars held while inserts keep failing; the oldest beyond this are dropped
+        """
+        self.symbols = list(symbols)
+        feed = feed or os.getenv('ALPACA_DATA_FEED', 'iex')
+        self.url = url or os.getenv('ALPACA_STREAM_URL') or f"{STREAM_URL}/{feed}"
+        self.batch_rows = batch_rows
+        self.flush_ms = flush_ms
+        self.backfill = backfill
+        self.cache = cache
+        self.features = features
+        self.client = client
+        self.report_interval = report_interval
+        self.max_buffer_rows = max_buffer_rows
+
+        self.api_key = os.getenv('ALPACA_API_KEY')
+        self.secret_key = os.getenv('ALPACA_SECRET_KEY')
+        if not self.api_key or not self.secret_key:
+            raise ValueError("ALPACA_API_KEY and ALPACA_SECRET_KEY not found in environment")
+
+        # Open time of the newest bar accepted per symbol; live bars at or before it are duplicates
+        self.last_bar: Dict[str, datetime] = {}
+        # One set per running backfill: (symbol, open) of every bar accepted since its connect
+        self._accepted_since = []
+        self._backfill_task = None
+        self._buffer = []
+        self._buffer_full = None
+        self._stop = None
+
+        self.bar_latency = LatencyStats()
+        self.commit_latency = LatencyStats()
+        self.stats = {'received': 0, 'backfilled': 0, 'duplicates': 0, 'inserted': 0, 'batches': 0,
+                      'reconnects': 0, 'insert_errors': 0, 'dropped': 0, 'cache_errors': 0}
+
+    # ---- buffering ----
+
+    def _accept(self, bar, received_at, source, after=None, seen=()):
+        """
+        Buffer one Alpaca bar message; returns False if it was a duplicate
+
+        Live bars must be newer than the symbol's last bar. Backfilled bars must
+        fall after `after` (the last bar before the disconnect) and not be in
+        `seen`, the bars accepted since that reconnect.
+        """
+        symbol = bar['S']
+        opened = _parse_ts(bar['t'])
+        last = self.last_bar.get(symbol)
+        if source == 'live':
+            duplicate = last is not None and opened <= last
+        else:
+            duplicate = opened <= after or (symbol, opened) in seen
+        if duplicate:
+            self.stats['duplicates'] += 1
+            return False
+        for accepted in self._accepted_since:
+            accepted.add((symbol, opened))
+        if last is None or opened > last:
+            self.last_bar[symbol] = opened
+
+        closed_at = opened.timestamp() + BAR_SECONDS
+        if source == 'live':
+            self.bar_latency.add((received_at - closed_at) * 1000)
+        self._buffer.append(([opened, symbol, bar['o'], bar['h'], bar['l'], bar['c'], bar['v'],
+                              bar.get('n', 0), bar.get('vw', 0.0)], closed_at, source))
+        self.stats['received' if source == 'live' else 'backfilled'] += 1
+        if len(self._buffer) >= self.batch_rows:
+            self._buffer_full.set()
+        return True
+
+    async def _flush(self):
+        """Insert everything buffered; returns False if the insert failed and the rows were kept"""
+        if not self._buffer:
+            return True
+        batch, self._buffer = self._buffer, []
+        self._buffer_full.clear()
+        rows = [row for row, _, _ in batch]
+
+        from datapipeline.clickhouse import insert_bars
+
+        try:
+            # clickhouse_connect is blocking; the event loop keeps reading the socket meanwhile
+            await asyncio.to_thread(insert_bars, rows, BAR_COLUMNS, client=self.client)
+        except Exception as e:
+            # Keep the rows for the next flush rather than dropping them
+            self.stats['insert_errors'] += 1
+            self._buffer = batch + self._buffer
+            logger.error(f"❌ ClickHouse insert of {len(rows)} bars failed: {e}")
+            overflow = len(self._buffer) - self.max_buffer_rows
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self.stats['dropped'] += overflow
+                logger.error(f"❌ Dropped the {overflow} oldest buffered bars ({self.stats['dropped']} so far); "
+                             f"buffer is capped at {self.max_buffer_rows}")
+            return False
+
+        committed = time.time()
+        for _, closed_at, source in batch:
+            if source == 'live':
+                self.commit_latency.add((committed - closed_at) * 1000)
+        self.stats['inserted'] += len(rows)
+        self.stats['batches'] += 1
+        if self.cache:
+            try:
+                await asyncio.to_thread(self._write_through, rows)
+            except Exception as e:
+                # The bars are committed; a cache failure must not stop the flush loop
+                self.stats['cache_errors'] += 1
+                logger.error(f"⚠️ Hot-cache write-through of {len(rows)} bars failed: {e}")
+        return True
+
+    def _write_through(self, rows):
+        from datapipeline.hot_cache import BAR_DTYPE, write_through
+
+        by_symbol = {}
+        for row in rows:
+            by_symbol.setdefault(row[1], []).append(row)
+        bars = {}
+        for symbol, symbol_rows in by_symbol.items():
+            arr = np.empty(len(symbol_rows), dtype=BAR_DTYPE)
+            arr['timestamp'] = [int(r[0].timestamp() * 1000) for r in symbol_rows]
+            for i, field in enumerate(('open', 'high', 'low', 'close', 'volume'), start=2):
+                arr[field] = [r[i] for r in symbol_rows]
+            arr['vwap'] = [r[8] for r in symbol_rows]
+            # Backfilled bars can land in the same batch after newer live ones
+            bars[symbol] = np.sort(arr, order='timestamp')
+        write_through('push_bars', bars)
+        if self.features:
+            from run_features import cache_bar_features
+
+            try:
+                cache_bar_features(bars)
+            except Exception as e:
+                self.stats['cache_errors'] += 1
+                logger.error(f"⚠️ Feature refresh for {len(bars)} symbols failed: {e}")
+
+    async def _flush_loop(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._buffer_full.wait(), timeout=self.flush_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            if not await self._flush():
+                # Back off for a full interval instead of retrying on every incoming bar
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.flush_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _report_loop(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.report_interval)
+            except asyncio.TimeoutError:
+                self._log_report()
+
+    def _log_report(self):
+        bar, commit = self.bar_latency.summary(), self.commit_latency.summary()
+        if not bar['count']:
+            logger.info(f"  ⏱ No live bars yet ({self.stats['backfilled']} backfilled)")
+            return
+        committed = (f"close→commit p50={commit['p50_ms']:.0f}ms p99={commit['p99_ms']:.0f}ms"
+                     if commit['count'] else "nothing committed yet")
+        logger.info(
+            f"  ⏱ {self.stats['received']} live / {self.stats['backfilled']} backfilled bars, "
+            f"{self.stats['batches']} batches | bar latency p50={bar['p50_ms']:.0f}ms p99={bar['p99_ms']:.0f}ms | "
+            f"{committed}"
+        )
+
+    # ---- backfill ----
+
+    def _fetch_missed(self, symbol, start, end):
+        from datapipeline.ingest.alpaca_bars import fetch_bars
+
+        headers = {'APCA-API-KEY-ID': self.api_key, 'APCA-API-SECRET-KEY': self.secret_key}
+        return fetch_bars(symbol, _rfc3339(start), _rfc3339(end), headers)
+
+    async def _backfill(self, gaps, seen, previous=None):
+        """
+        Fetch the bars each symbol missed while disconnected, over REST in parallel
+
+        Args:
+            gaps: {symbol: open time of its last bar before the disconnect}
+            seen: Set that collects every bar accepted since this reconnect (live or backfilled)
+            previous: Backfill of an earlier reconnect, still running; it finishes first
+        """
+        try:
+            if previous is not None:
+                # Gaps are merged one reconnect at a time, so two backfills never race on a symbol
+                await asyncio.gather(previous, return_exceptions=True)
+            end = datetime.now(timezone.utc)
+            # Each fetch starts at the last bar itself (inclusive); `after` filters it back out
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self._fetch_missed, symbol, last, end)
+                  for symbol, last in gaps.items()),
+                return_exceptions=True,
+            )
+            filled = 0
+            for (symbol, last), bars in zip(gaps.items(), results):
+                if isinstance(bars, Exception):
+                    logger.warning(f"⚠️ Backfill failed for {symbol}: {bars}")
+                    continue
+                for bar in bars:
+                    filled += self._accept({**bar, 'S': symbol}, time.time(), 'backfill', after=last, seen=seen)
+            if filled:
+                logger.info(f"  ✓ Backfilled {filled} missed bars for {len(gaps)} symbols")
+        finally:
+            self._accepted_since.remove(seen)
+
+    # ---- WebSocket session ----
+
+    async def _expect(self, ws, kind, msg=None):
+        """Read messages until one of type `kind` (and msg) arrives; raise on an error message"""
+        while True:
+            for message in json.loads((await ws.receive_str())):
+                if message.get('T') == 'error':
+                    raise ConnectionError(f"Alpaca stream error {message.get('code')}: {message.get('msg')}")
+                if message.get('T') == kind and (msg is None or message.get('msg') == msg):
+                    return message
+
+    async def _session(self, session):
+        async with session.ws_connect(self.url, heartbeat=20) as ws:
+            await self._expect(ws, 'success', 'connected')
+            await ws.send_str(json.dumps({'action': 'auth', 'key': self.api_key, 'secret': self.secret_key}))
+            await self._expect(ws, 'success', 'authenticated')
+            await ws.send_str(json.dumps({'action': 'subscribe', 'bars': self.symbols}))
+            await self._expect(ws, 'subscription')
+            logger.info(f"  ✓ Subscribed to minute bars for {len(self.symbols)} symbols at {self.url}")
+
+            # Live bars keep flowing while the gap is fetched; symbols never seen have no known gap
+            if self.backfill and self.last_bar:
+                seen = set()
+                self._accepted_since.append(seen)
+                self._backfill_task = asyncio.create_task(
+                    self._backfill(dict(self.last_bar), seen, previous=self._backfill_task))
+
+            import aiohttp
+
+            async for frame in ws:
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    break
+                received_at = time.time()
+                for message in json.loads(frame.data):
+                    kind = message.get('T')
+                    if kind == 'b':
+                        self._accept(message, received_at, 'live')
+                    elif kind == 'error':
+                        raise ConnectionError(f"Alpaca stream error {message.get('code')}: {message.get('msg')}")
+
+    async def run(self, duration=None):
+        """
+        Stream until stop() is called (or `duration` seconds pass), reconnecting with backoff
+
+        Returns:
+            dict: summary()
+        """
+        import aiohttp
+
+        self._stop = asyncio.Event()
+        self._buffer_full = asyncio.Event()
+        flusher = asyncio.create_task(self._flush_loop())
+        reporter = asyncio.create_task(self._report_loop())
+        if duration is not None:
+            asyncio.get_running_loop().call_later(duration, self._stop.set)
+
+        delay = 1.0
+        async with aiohttp.ClientSession() as session:
+            while not self._stop.is_set():
+                session_task = asyncio.create_task(self._session(session))
+                stop_task = asyncio.create_task(self._stop.wait())
+                done, _ = await asyncio.wait({session_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                if session_task not in done:
+                    session_task.cancel()
+                    break
+                stop_task.cancel()
+                error = session_task.exception()
+                if error is None and self._stop.is_set():
+                    break
+                self.stats['reconnects'] += 1
+                if error is not None:
+                    logger.warning(f"⚠️ Stream disconnected ({error}); reconnecting in {delay:.1f}s")
+                else:
+                    delay = 1.0
+                    logger.warning("⚠️ Stream closed by server; reconnecting")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay * (0.5 + random.random()))
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, 30.0)
+
+        self._stop.set()
+        if self._backfill_task is not None:
+            await asyncio.gather(self._backfill_task, return_exceptions=True)
+        await asyncio.gather(flusher, reporter, return_exceptions=True)
+        await self._flush()
+        self._log_report()
+        return self.summary()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    def summary(self):
+        return {
+            **self.stats,
+            'pending': len(self._buffer),
+            'bar_latency': self.bar_latency.summary(),
+            'commit_latency': self.commit_latency.summary(),
+        }
+
+
+def main(symbols: List[str] = None, url: str = None, batch_rows: int = 500, flush_ms: int = 1000,
+         duration: float = None, cache: bool = True):
+    """Stream until interrupted (or for `duration` seconds)"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if symbols is None:
+        symbols = [s.strip() for s in os.getenv('DATA_SYMBOLS', 'AAPL,MSFT,GOOGL,TSLA,NVDA').split(',')]
+
+    ingester = StreamingIngester(symbols, url=url, batch_rows=batch_rows, flush_ms=flush_ms, cache=cache)
+
+    async def run():
+        # Ctrl-C / SIGTERM stop the stream gracefully so the buffered bars are still inserted
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, ingester.stop)
+        return await ingester.run(duration)
+
+    try:
+        summary = asyncio.run(run())
+    finally:
+        from datapipeline.clickhouse import close_client
+
+        close_client()
+    marker = '⚠️' if summary['pending'] else '✓'
+    print(f"\n{marker} Stream stopped: {summary['inserted']} bars inserted in {summary['batches']} batches, "
+          f"{summary['reconnects']} reconnects, {summary['pending']} pending")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
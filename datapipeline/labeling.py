@@ -0,0 +1,207 @@
+"""
+Labeling: forward-return and triple-barrier labels with volatility-scaled thresholds
+Barriers are k x trailing volatility x sqrt(horizon) around each bar's close. Every
+row's future path comes from one sliding_window_view over the log closes, so
+first touches are argmax calls on (rows x horizon) blocks instead of per-row
+loops. Blocks are sized to a memory budget and symbols run concurrently on a
+thread pool (NumPy releases the GIL). Paths stop at the session close: an
+overnight gap never decides a label. Rows whose outcome is not yet observable
+(the end of the data) are left unlabeled (NaN)
+"""
+
+import logging
+import math
+import os
+
+import numpy as np
+
+from datapipeline.panel import rolling_std
+
+logger = logging.getLogger(__name__)
+
+HORIZON = 30            # bars to the vertical barrier
+VOL_WINDOW = 100        # bars of trailing 1-bar log returns behind the volatility estimate
+UPPER_MULT = 2.0        # profit-taking barrier, in horizon volatilities
+LOWER_MULT = 2.0        # stop-loss barrier, in horizon volatilities
+FWD_MULT = 0.5          # |forward return| below this many horizon volatilities is labeled 0
+MIN_WIDTH = 1e-4        # floor on the barrier width (log return) for flat stretches
+
+LABEL_COLS = ['fwd_ret', 'fwd_label', 'tb_label', 'tb_ret', 'tb_bars']
+
+# Bytes held per (row, horizon step) while a block is labeled: the float64 path plus boolean masks
+_BYTES_PER_CELL = 24
+
+
+def _block_rows(horizon, memory_budget_mb):
+    return int(max(1024, memory_budget_mb * 1024 * 1024 // (max(horizon, 1) * _BYTES_PER_CELL)))
+
+
+def barrier_width(close, horizon=HORIZON, vol_window=VOL_WINDOW, min_width=MIN_WIDTH):
+    """
+    Trailing volatility scaled to the horizon (log-return units)
+
+    Only returns up to and including each bar are used, so the width carries no look-ahead.
+    NaN until vol_window // 2 returns are available.
+    """
+    log_close = np.log(np.asarray(close, dtype=np.float64))
+    ret = np.full(len(log_close), np.nan)
+    ret[1:] = np.diff(log_close)
+    sigma = rolling_std(ret, vol_window, min_periods=max(2, vol_window // 2))
+    return np.maximum(sigma * math.sqrt(horizon), min_width)
+
+
+def label_series(close, session=None, horizon=HORIZON, upper=UPPER_MULT, lower=LOWER_MULT, fwd_mult=FWD_MULT,
+                 vol_window=VOL_WINDOW, min_width=MIN_WIDTH, memory_budget_mb=256):
+    """
+    Labels for one symbol's bars in time order
+
+    Args:
+        close: Close prices
+        session: Session id per bar (e.g. quality.session_keys day); paths stop at its last bar.
+            None treats the series as one session
+        horizon: Vertical barrier, in bars
+        upper, lower: Barrier multiples of the horizon volatility
+        fwd_mult: Dead zone of the forward-return label, in horizon volatilities
+        vol_window: Bars behind the trailing volatility
+        min_width: Floor on the barrier width
+        memory_budget_mb: Bound on the working set of one block of rows
+
+    Returns:
+        dict of float32 arrays (NaN = unlabeled):
+            fwd_ret:   log return to the vertical barrier (horizon bars or the session's last bar)
+            fwd_label: sign of fwd_ret, 0 inside the dead zone
+            tb_label:  +1 upper barrier first, -1 lower barrier first, 0 neither by the vertical barrier
+            tb_ret:    log return at the first touch (or at the vertical barrier)
+            tb_bars:   bars until that touch
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    log_close = np.log(np.asarray(close, dtype=np.float64))
+    n = len(log_close)
+    out = {name: np.full(n, np.nan, dtype=np.float32) for name in LABEL_COLS}
+    if n < 2:
+        return out
+
+    session = np.zeros(n, dtype=np.int64) if session is None else np.asarray(session, dtype=np.int64)
+    width = barrier_width(close, horizon, vol_window, min_width)
+    # Padding gives every row a full window; padded steps belong to no session
+    padded_close = np.concatenate([log_close[1:], np.full(horizon, np.nan)])
+    padded_session = np.concatenate([session[1:], np.full(horizon, -1, dtype=np.int64)])
+    future_close = sliding_window_view(padded_close, horizon)
+    future_session = sliding_window_view(padded_session, horizon)
+
+    step = _block_rows(horizon, memory_budget_mb)
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        rows = np.arange(stop - start)
+        in_session = future_session[start:stop] == session[start:stop, None]
+        # Bars are in time order, so each row's in-session steps are a prefix of its window
+        n_valid = in_session.sum(axis=1)
+        path = future_close[start:stop] - log_close[start:stop, None]
+        path[~in_session] = np.nan
+
+        w = width[start:stop, None]
+        with np.errstate(invalid='ignore'):
+            up = path >= upper * w
+            down = path <= -lower * w
+        first_up = np.where(up.any(axis=1), up.argmax(axis=1), horizon)
+        first_down = np.where(down.any(axis=1), down.argmax(axis=1), horizon)
+        first = np.minimum(first_up, first_down)
+        touched = first < horizon
+
+        last = np.maximum(n_valid - 1, 0)
+        vertical_ret = path[rows, last]
+        tb_ret = np.where(touched, path[rows, np.minimum(first, horizon - 1)], vertical_ret)
+        tb_label = np.sign(first_down - first_up)
+        fwd_label = np.where(np.abs(vertical_ret) > fwd_mult * width[start:stop], np.sign(vertical_ret), 0.0)
+
+        # No later bar in the session, or the path runs into the end of the data: the vertical
+        # barrier is not observed yet (a barrier already touched still decides tb_label)
+        truncated = (n_valid == 0) | ((n_valid < horizon) & (start + rows + n_valid == n - 1))
+        no_width = np.isnan(width[start:stop])
+        fwd_unknown = truncated | no_width
+        tb_unknown = (truncated & ~touched) | no_width
+
+        out['fwd_ret'][start:stop] = np.where(fwd_unknown, np.nan, vertical_ret)
+        out['fwd_label'][start:stop] = np.where(fwd_unknown, np.nan, fwd_label)
+        out['tb_label'][start:stop] = np.where(tb_unknown, np.nan, tb_label)
+        out['tb_ret'][start:stop] = np.where(tb_unknown, np.nan, tb_ret)
+        out['tb_bars'][start:stop] = np.where(tb_unknown, np.nan, np.where(touched, first + 1, n_valid))
+    return out
+
+
+def label_frame(df, horizon=HORIZON, workers=None, memory_budget_mb=512, sessions=True, **kwargs):
+    """
+    Labels for a long-format frame (timestamp, symbol, close), parallel across symbols
+
+    Args:
+        df: Bars of any number of symbols, in any row order
+        workers: Threads labeling symbols concurrently (default: CPU count, max 8)
+        memory_budget_mb: Shared by the workers
+        sessions: Stop paths at the exchange session close (quality.session_keys)
+        **kwargs: label_series() thresholds
+
+    Returns:
+        DataFrame of LABEL_COLS aligned to df's index
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    import pandas as pd
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    timestamps = pd.to_datetime(df['timestamp']).to_numpy()
+    if 'symbol' in df.columns:
+        codes, _ = pd.factorize(df['symbol'])
+    else:
+        codes = np.zeros(len(df), dtype=np.int64)
+    order = np.lexsort((timestamps, codes))
+    close = df['close'].to_numpy(dtype=np.float64)[order]
+    if sessions:
+        from datapipeline.quality import session_keys
+
+        session, _ = session_keys(timestamps[order])
+    else:
+        session = np.zeros(len(df), dtype=np.int64)
+
+    counts = np.bincount(codes)
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    budget = max(16, memory_budget_mb // workers)
+
+    def run(i):
+        lo, hi = bounds[i], bounds[i + 1]
+        return label_series(close[lo:hi], session[lo:hi], horizon=horizon, memory_budget_mb=budget, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(run, range(len(counts))))
+
+    labels = {}
+    for name in LABEL_COLS:
+        values = np.empty(len(df), dtype=np.float32)
+        values[order] = np.concatenate([p[name] for p in parts]) if parts else values
+        labels[name] = values
+    return pd.DataFrame(labels, index=df.index)
+
+
+def add_labels(df, **kwargs):
+    """
+    Add LABEL_COLS and the binary training `target` to df in place
+
+    target is 1 when the triple-barrier outcome is a gain (upper barrier, or a
+    positive return at the vertical barrier), 0 otherwise, and NA where unlabeled.
+
+    Args:
+        df: Bars with timestamp, close and optionally symbol
+        **kwargs: label_frame() options
+
+    Returns:
+        DataFrame: df
+    """
+    import pandas as pd
+
+    labels = label_frame(df, **kwargs)
+    for name in ('fwd_label', 'tb_label', 'tb_bars'):
+        df[name] = pd.array(labels[name].to_numpy(), dtype='Int16' if name == 'tb_bars' else 'Int8')
+    df['fwd_ret'] = labels['fwd_ret']
+    df['tb_ret'] = labels['tb_ret']
+    df['target'] = pd.array(np.where(labels['tb_ret'].isna(), np.nan, labels['tb_ret'] > 0), dtype='Int8')
+    return df
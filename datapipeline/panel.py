@@ -0,0 +1,213 @@
+"""
+Panel: multi-symbol bars as a time x symbol x field array
+Timestamps are aligned across symbols, missing bars are NaN with a validity
+mask, and values are stored as float32. Rolling ops run along the time axis
+(so they never cross symbols) and cross-sectional ops run along the symbol
+axis, each as one vectorized call over the whole universe
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Panel:
+    """
+    Aligned multi-symbol data
+
+    Attributes:
+        values: float32 array, shape (T, N, F)
+        mask: bool array, shape (T, N); True where the symbol had a bar
+        timestamps: datetime64 array, shape (T,)
+        symbols: list of N symbols
+        fields: list of F field names
+    """
+
+    def __init__(self, values, mask, timestamps, symbols, fields, row_index=None):
+        self.values = values
+        self.mask = mask
+        self.timestamps = timestamps
+        self.symbols = list(symbols)
+        self.fields = list(fields)
+        self._field_pos = {name: i for i, name in enumerate(self.fields)}
+        # (t, n) position of each row of the long frame this panel was built from
+        self.row_index = row_index
+
+    @classmethod
+    def from_long(cls, df, fields=DEFAULT_FIELDS, time_col='timestamp', symbol_col='symbol', dtype=np.float32):
+        """
+        Pivot a long (timestamp, symbol, fields...) frame into a panel in one scatter
+
+        Duplicate (timestamp, symbol) rows keep the last occurrence.
+        """
+        fields = [f for f in fields if f in df.columns]
+        t_idx, timestamps = pd.factorize(pd.to_datetime(df[time_col]), sort=True)
+        s_idx, symbols = pd.factorize(df[symbol_col], sort=True)
+
+        values = np.full((len(timestamps), len(symbols), len(fields)), np.nan, dtype=dtype)
+        values[t_idx, s_idx] = df[fields].to_numpy(dtype=dtype)
+        mask = np.zeros((len(timestamps), len(symbols)), dtype=bool)
+        mask[t_idx, s_idx] = True
+
+        return cls(values, mask, np.asarray(timestamps, dtype='datetime64[ns]'), list(symbols), fields,
+                   row_index=(t_idx, s_idx))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.mask.nbytes
+
+    def field(self, name):
+        """(T, N) view of one field"""
+        return self.values[:, :, self._field_pos[name]]
+
+    def with_field(self, name, data):
+        """Add or replace a (T, N) field; returns self for chaining"""
+        data = np.asarray(data, dtype=self.values.dtype)
+        if name in self._field_pos:
+            self.values[:, :, self._field_pos[name]] = data
+        else:
+            self.values = np.concatenate([self.values, data[:, :, None]], axis=2)
+            self._field_pos[name] = len(self.fields)
+            self.fields.append(name)
+        return self
+
+    def to_rows(self, data):
+        """Values of a (T, N) array at the rows of the source long frame, in that frame's order"""
+        if self.row_index is None:
+            raise ValueError("panel was not built from a long frame")
+        t_idx, s_idx = self.row_index
+        return np.asarray(data)[t_idx, s_idx]
+
+    def to_long(self, fields=None):
+        """Back to a long frame (valid cells only), ordered by timestamp then symbol"""
+        fields = fields or self.fields
+        t_idx, s_idx = np.nonzero(self.mask)
+        out = pd.DataFrame({
+            'timestamp': self.timestamps[t_idx],
+            'symbol': np.asarray(self.symbols, dtype=object)[s_idx],
+        })
+        for name in fields:
+            out[name] = self.field(name)[t_idx, s_idx]
+        return out
+
+
+# ---- per-symbol ops along the time axis ----
+
+def pct_change(x, periods=1):
+    """Per-column x[t] / x[t-periods] - 1; NaN where either bar is missing"""
+    x = np.asarray(x)
+    out = np.full(x.shape, np.nan, dtype=x.dtype)
+    out[periods:] = x[periods:] / x[:-periods] - 1
+    return out
+
+
+def rolling_sum_count(x, window, min_periods):
+    """float64 trailing sums and valid counts via cumulative sums; NaN where count < min_periods"""
+    min_periods = window if min_periods is None else max(min_periods, 1)
+    valid = np.isfinite(x)
+    # float64 accumulators: a float32 cumsum over a year of minute bars loses precision
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0, dtype=np.float64)
+    ccount = np.cumsum(valid, axis=0, dtype=np.int64)
+    csum[window:] = csum[window:] - csum[:-window]
+    ccount[window:] = ccount[window:] - ccount[:-window]
+    csum[ccount < min_periods] = np.nan
+    return csum, ccount
+
+
+def rolling_sum(x, window, min_periods=None):
+    """
+    Trailing sum over `window` rows per column, ignoring NaNs, in O(T·N) regardless of window
+
+    Windows with fewer than min_periods (default: window) valid values are NaN.
+    """
+    x = np.asarray(x)
+    total, _ = rolling_sum_count(x, window, min_periods)
+    return total.astype(x.dtype, copy=False)
+
+
+def rolling_mean(x, window, min_periods=None):
+    x = np.asarray(x)
+    total, count = rolling_sum_count(x, window, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (total / count).astype(x.dtype, copy=False)
+
+
+def rolling_std(x, window, min_periods=None, ddof=1):
+    """Trailing sample standard deviation per column (cumulative sums of x and x²)"""
+    x = np.asarray(x)
+    x64 = x.astype(np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        col_mean = np.nanmean(x64, axis=0)
+    # Centering per column keeps the sum-of-squares formula numerically stable
+    centered = x64 - np.nan_to_num(col_mean)
+    s1, count = rolling_sum_count(centered, window, min_periods)
+    s2, _ = rolling_sum_count(centered * centered, window, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / count) / (count - ddof)
+    return np.sqrt(np.maximum(var, 0)).astype(x.dtype, copy=False)
+
+
+def ewm_mean(x, span):
+    """Exponentially weighted mean per column (pandas' adjust=True semantics)"""
+    return pd.DataFrame(x).ewm(span=span).mean().to_numpy(dtype=np.asarray(x).dtype)
+
+
+# ---- cross-sectional ops along the symbol axis ----
+
+def cs_rank(x, pct=True):
+    """Rank of each symbol within its timestamp (ties averaged, NaNs stay NaN)"""
+    return pd.DataFrame(x).rank(axis=1, pct=pct).to_numpy(dtype=np.asarray(x).dtype)
+
+
+def cs_zscore(x):
+    """(x - cross-sectional mean) / cross-sectional std at each timestamp"""
+    x = np.asarray(x)
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(x, axis=1, keepdims=True)
+        std = np.nanstd(x, axis=1, keepdims=True)
+        out = np.where(std > 0, (x - mean) / std, 0.0)
+    out[np.isnan(x)] = np.nan
+    return out.astype(x.dtype, copy=False)
+
+
+def cs_demean(x):
+    """x minus the cross-sectional (equal-weight market) mean at each timestamp"""
+    x = np.asarray(x)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return x - np.nanmean(x, axis=1, keepdims=True)
+
+
+# ---- long-frame helpers ----
+
+def per_symbol_pct_change(df, col='close', periods=1, time_col='timestamp', symbol_col='symbol'):
+    """
+    pct_change of `col` computed within each symbol, aligned to df's rows
+
+    Falls back to a plain time-ordered pct_change when df has no symbol column.
+    """
+    if symbol_col not in df.columns:
+        return df[col].pct_change(periods).to_numpy()
+
+    order = np.lexsort((pd.to_datetime(df[time_col]).to_numpy(), df[symbol_col].to_numpy()))
+    values = df[col].to_numpy(dtype=np.float64)[order]
+    symbols = df[symbol_col].to_numpy()[order]
+
+    changed = np.full(len(values), np.nan)
+    changed[periods:] = values[periods:] / values[:-periods] - 1
+    same_symbol = np.zeros(len(values), dtype=bool)
+    same_symbol[periods:] = symbols[periods:] == symbols[:-periods]
+    changed[~same_symbol] = np.nan
+
+    out = np.empty_like(changed)
+    out[order] = changed
+    return out
@@ -0,0 +1,152 @@
+"""
+Argo pipeline as a cached DAG: [ingest] -> features:<SYMBOL> (parallel) -> combine -> train
+Stage fingerprints:
+    features:<SYMBOL>  ClickHouse row count and timestamp range for the symbol + feature code/config
+    combine            feature column list, cross-sectional flag and finalize/labeling code (plus upstream keys)
+    train              XGBoost hyperparameters, feature columns and target (plus upstream keys)
+Run: python argo.py pipeline [--ingest] [--force train]
+"""
+
+import hashlib
+import inspect
+import logging
+
+from datapipeline.dag import PipelineDAG, Stage
+
+logger = logging.getLogger(__name__)
+
+
+def symbol_data_stats(symbol):
+    """Row count and timestamp range of one symbol in trading_db.market_data"""
+    from datapipeline.clickhouse import symbol_stats
+
+    return symbol_stats(symbol)
+
+
+def _feature_code_hash():
+    """Changing the indicator code must invalidate cached features"""
+    import run_features
+
+    source = (inspect.getsource(run_features.load_bars) + inspect.getsource(run_features.compute_features)
+              + repr(run_features.FEATURE_COLS))
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def _combine_code_hash(cross_sectional=False):
+    """Changing the labeling, finalize or cross-sectional code must invalidate the combined output"""
+    import run_features
+    from datapipeline import labeling
+
+    source = inspect.getsource(labeling) + inspect.getsource(run_features.finalize_features)
+    if cross_sectional:
+        from datapipeline import cross_sectional as cross_sectional_module
+
+        source += inspect.getsource(cross_sectional_module)
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def build_pipeline(symbols=None, output_csv=None, model_path=None, xgb_params=None, ingest=False,
+                   lookback_days=None, cache_dir='.argo_cache', max_workers=4, cross_sectional=False,
+                   cache=True):
+    """
+    Assemble the pipeline DAG
+
+    Args:
+        symbols: Symbols to process (default: run_features.SYMBOLS); symbols on the
+            data-quality quarantine list (datapipeline/quality.py) are left out
+        output_csv: Combined features CSV (default: run_features.OUTPUT_CSV)
+        model_path: Trained model path (default: train_model_optimized.MODEL_PATH)
+        xgb_params: Overrides for train_model_optimized.XGB_PARAMS
+        ingest: Prepend an (uncached) Alpaca ingestion stage
+        lookback_days: Ingestion lookback (default: $DATA_LOOKBACK_DAYS)
+        cache_dir: Where stage results are cached
+        max_workers: Stages run concurrently
+        cross_sectional: Add the cross-sectional columns in the combine stage (as `argo features --cross-sectional`)
+        cache: Write the latest feature rows through to the Redis hot cache in the combine stage
+
+    Returns:
+        PipelineDAG
+    """
+    import run_features
+    from models import train_model_optimized as trainer_module
+
+    from datapipeline.quality import load_quarantine
+
+    quarantine = load_quarantine()
+    symbols = symbols or run_features.SYMBOLS
+    if any(s in quarantine for s in symbols):
+        logger.warning(f"⚠️ Skipping quarantined symbols: {', '.join(s for s in symbols if s in quarantine)}")
+        symbols = [s for s in symbols if s not in quarantine]
+    output_csv = output_csv or run_features.OUTPUT_CSV
+    scaler_path = run_features.SCALER_PATH
+    model_path = model_path or trainer_module.MODEL_PATH
+    params = {**trainer_module.XGB_PARAMS, **(xgb_params or {})}
+    feature_code = _feature_code_hash()
+
+    dag = PipelineDAG(cache_dir=cache_dir, max_workers=max_workers)
+
+    upstream = ()
+    if ingest:
+        def run_ingest(_):
+            from datapipeline.ingest.alpaca_bars import main as ingest_main
+
+            return ingest_main(symbols=symbols, lookback_days=lookback_days)
+
+        dag.add(Stage('ingest', run_ingest, cacheable=False))
+        upstream = ('ingest',)
+
+    def make_feature_stage(symbol):
+        def compute(_):
+            df = run_features.load_bars(symbol)
+            return run_features.compute_features(df) if df is not None else None
+
+        return Stage(
+            f'features:{symbol}', compute, deps=upstream,
+            fingerprint=lambda: {'data': symbol_data_stats(symbol), 'code': feature_code},
+        )
+
+    feature_stages = [dag.add(make_feature_stage(symbol)).name for symbol in symbols]
+
+    def combine(inputs):
+        import pandas as pd
+
+        frames = [inputs[name] for name in feature_stages if inputs[name] is not None]
+        if not frames:
+            raise RuntimeError("No market data found for any symbol")
+        combined = pd.concat(frames, ignore_index=True)
+        labeled = run_features.finalize_features(combined, output_csv, scaler_path,
+                                                 cross_sectional=cross_sectional, cache=cache)
+        logger.info(f"  ✓ {len(labeled)} labeled feature rows saved to {output_csv}")
+        return {'rows': len(labeled), 'path': output_csv, 'scaler_path': scaler_path}
+
+    dag.add(Stage(
+        'combine', combine, deps=feature_stages, outputs=[output_csv, scaler_path],
+        fingerprint=lambda: {'feature_cols': run_features.FEATURE_COLS, 'output': output_csv,
+                             'cross_sectional': cross_sectional, 'code': _combine_code_hash(cross_sectional)},
+    ))
+
+    def train(inputs):
+        trainer = trainer_module.OptimizedModelTrainer(
+            features_csv=inputs['combine']['path'],
+            feature_cols=trainer_module.FEATURE_COLS,
+            target_col='target',
+            xgb_params=params,
+            model_path=model_path,
+            scaler_path=inputs['combine']['scaler_path'],
+        )
+        success = trainer.run()
+        return {'success': success, 'model_path': model_path,
+                'registry_version': trainer.validation_results.get('registry_version')}
+
+    dag.add(Stage(
+        'train', train, deps=['combine'], outputs=[model_path],
+        cache_if=lambda result: result['success'],
+        fingerprint=lambda: {
+            'xgb_params': params,
+            'early_stopping_rounds': trainer_module.EARLY_STOPPING_ROUNDS,
+            'feature_cols': trainer_module.FEATURE_COLS,
+            'target_col': 'target',
+        },
+    ))
+
+    return dag
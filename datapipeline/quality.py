@@ -0,0 +1,575 @@
+"""
+Data quality: session completeness, duplicates, OHLC consistency and price spikes
+Per-session bar counts, duplicate timestamps and OHLC violations are ClickHouse
+aggregates over the whole table in one GROUP BY, checked against the NYSE
+calendar (weekends, holidays, 13:00 early closes); spikes are robust z-scores
+(median / MAD of within-session log returns per symbol) computed with grouped
+NumPy ops over symbol chunks streamed from the pooled client. scan_frame() runs
+the same checks on an in-memory long-format frame. Symbols failing a threshold
+go on a quarantine list that run_features.py skips
+Run: python argo.py quality [--days 365] [--symbols AAPL,MSFT] [--csv bars.csv]
+"""
+
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from datapipeline.clickhouse import MARKET_DATA_TABLE
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = 'America/New_York'
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_MINUTES = 390
+HALF_DAY_MINUTES = 210  # early closes at 13:00
+# Unscheduled NYSE closures (weather, national days of mourning)
+SPECIAL_CLOSURES = ('2004-06-11', '2007-01-02', '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09')
+REPORT_PATH = 'monitoring/data_quality.json'
+
+# Iglewicz-Hoaglin scale factors: MAD and mean absolute deviation to a normal sigma
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+Z_THRESHOLD = 10.0
+
+DEFAULT_THRESHOLDS = {
+    'min_completeness': 0.95,     # regular-session bars present / expected, over the symbol's active range
+    'max_missing_sessions': 0,    # calendar sessions without a single bar, inside the symbol's active range
+    'max_duplicate_ratio': 0.0,   # repeated (symbol, timestamp) rows / rows
+    'max_ohlc_ratio': 0.0005,     # inconsistent bars / rows
+    'max_spikes': 5,              # |robust z| > z_threshold
+}
+
+MINUTES_PER_DAY = 24 * 60
+NS_PER_MINUTE = 60 * 10 ** 9
+NS_PER_DAY = MINUTES_PER_DAY * NS_PER_MINUTE
+
+_LOCAL_TS = f"toTimeZone(timestamp, '{MARKET_TZ}')"
+_REGULAR = (f"toHour({_LOCAL_TS}) * 60 + toMinute({_LOCAL_TS}) "
+            f"BETWEEN {SESSION_OPEN_MINUTE} AND {SESSION_OPEN_MINUTE + SESSION_MINUTES - 1}")
+_OHLC_BAD = ("NOT isFinite(open + high + low + close) OR high < greatest(open, close) "
+             "OR low > least(open, close) OR low <= 0 OR volume < 0")
+
+
+def session_keys(timestamps):
+    """
+    Exchange session day and regular-hours mask for UTC timestamps
+
+    Args:
+        timestamps: datetime64 array (UTC wall time)
+
+    Returns:
+        tuple: (days since epoch in New York time as int32, bool mask of 09:30-16:00 bars)
+    """
+    import pandas as pd
+
+    # One int64 division to minutes; the rest is int32 arithmetic, several times faster
+    minutes = (np.asarray(timestamps).astype('datetime64[ns]').view(np.int64) // NS_PER_MINUTE).astype(np.int32)
+    if not len(minutes):
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=bool)
+    # DST switches at 02:00 on a Sunday, when nothing trades, so one UTC offset per UTC day
+    # is exact; converting a few hundred noons is far cheaper than converting every bar
+    utc_day = minutes // MINUTES_PER_DAY
+    first = int(utc_day.min())
+    noon = (first + np.arange(int(utc_day.max()) - first + 1)) * NS_PER_DAY + NS_PER_DAY // 2
+    local_noon = pd.DatetimeIndex(noon.view('datetime64[ns]')).tz_localize('UTC').tz_convert(MARKET_TZ)
+    offset = ((local_noon.tz_localize(None).asi8 - noon) // NS_PER_MINUTE).astype(np.int32)
+    wall = minutes + offset[utc_day - first]
+    day = wall // MINUTES_PER_DAY
+    minute = wall - day * MINUTES_PER_DAY
+    regular = (minute >= SESSION_OPEN_MINUTE) & (minute < SESSION_OPEN_MINUTE + SESSION_MINUTES)
+    return day, regular
+
+
+def _run_medians(values, counts):
+    """Median of each contiguous run of `values` with lengths `counts` (NaN for empty runs)"""
+    # np.median partitions in O(n) per run; one loop step per symbol is cheaper than a global lexsort
+    ends = np.cumsum(counts)
+    median = np.full(len(counts), np.nan)
+    for i in np.flatnonzero(counts):
+        median[i] = np.median(values[ends[i] - counts[i]:ends[i]])
+    return median
+
+
+def spike_stats(sid, session, close, n_symbols, z_threshold=Z_THRESHOLD):
+    """
+    Robust z-scores of within-session log returns
+
+    The first bar of each session has no return, so overnight gaps are never spikes.
+    A symbol whose MAD is zero (mostly unchanged prices) is scaled by its mean
+    absolute deviation instead.
+
+    Args:
+        sid: Symbol index per row (0..n_symbols-1); rows sorted by symbol, then time, without duplicates
+        session: Session day per row
+        close: Close prices
+        n_symbols: Number of symbols
+        z_threshold: |z| above which a return is a spike
+
+    Returns:
+        tuple: (z per row, NaN where there is no return; spike count per symbol; max |z| per symbol)
+    """
+    n = len(close)
+    z = np.full(n, np.nan)
+    spikes = np.zeros(n_symbols, dtype=np.int64)
+    max_z = np.zeros(n_symbols)
+    if n < 2:
+        return z, spikes, max_z
+
+    close = close.astype(np.float64, copy=False)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = np.log(close[1:] / close[:-1])
+    valid = (sid[1:] == sid[:-1]) & (session[1:] == session[:-1]) & np.isfinite(ret)
+    rows = np.flatnonzero(valid) + 1
+    if not len(rows):
+        return z, spikes, max_z
+    g = sid[rows].astype(np.int64)
+    r = ret[rows - 1]
+
+    # sid is sorted, so each symbol's returns are one contiguous run
+    counts = np.bincount(g, minlength=n_symbols)
+    center = _run_medians(r, counts)
+    deviation = np.abs(r - center[g])
+    scale = _run_medians(deviation, counts) * MAD_SCALE
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_ad = np.bincount(g, weights=deviation, minlength=n_symbols) / counts * MEAN_AD_SCALE
+        scale = np.where(scale > 0, scale, mean_ad)
+        zr = np.where(deviation > 0, (r - center[g]) / scale[g], 0.0)
+
+    z[rows] = zr
+    abs_z = np.abs(zr)
+    spikes = np.bincount(g[abs_z > z_threshold], minlength=n_symbols)
+    present = np.flatnonzero(counts)
+    max_z[present] = np.maximum.reduceat(abs_z, (np.cumsum(counts) - counts)[present])
+    return z, spikes, max_z
+
+
+def _nth_weekday(year, month, weekday, n):
+    """The n-th weekday (Monday=0) of a month; n=-1 is the last one"""
+    if n < 0:
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _observed(day):
+    """Saturday holidays are observed on Friday, Sunday ones on Monday"""
+    return day + timedelta(days={5: -1, 6: 1}.get(day.weekday(), 0))
+
+
+def nyse_holidays(year):
+    """
+    Scheduled NYSE closures and early closes of one year (plus SPECIAL_CLOSURES)
+
+    Returns:
+        tuple: (full-day closures, 13:00 early closes) as lists of dates
+    """
+    from dateutil.easter import easter
+
+    new_year = date(year, 1, 1)
+    closed = [
+        _nth_weekday(year, 1, 0, 3),            # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),            # Washington's Birthday
+        easter(year) - timedelta(days=2),       # Good Friday
+        _nth_weekday(year, 5, 0, -1),           # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),            # Labor Day
+        _nth_weekday(year, 11, 3, 4),           # Thanksgiving
+        _observed(date(year, 12, 25)),
+    ]
+    # A Saturday New Year's Day is not observed (it would close the previous year's last session)
+    if new_year.weekday() != 5:
+        closed.append(_observed(new_year))
+    if year >= 2022:
+        closed.append(_observed(date(year, 6, 19)))  # Juneteenth
+    closed += [d for d in (date.fromisoformat(s) for s in SPECIAL_CLOSURES) if d.year == year]
+
+    early = [_nth_weekday(year, 11, 3, 4) + timedelta(days=1)]
+    early += [d for d in (date(year, 7, 3), date(year, 12, 24)) if d.weekday() < 4]
+    return closed, [d for d in early if d not in closed]
+
+
+def calendar_minutes(days):
+    """
+    Regular-session minutes of each day on the NYSE calendar
+
+    Args:
+        days: New York session days since epoch
+
+    Returns:
+        int64 array: 390, 210 on early closes, 0 on weekends and holidays
+    """
+    days = np.asarray(days, dtype=np.int64)
+    # 1970-01-01 was a Thursday
+    minutes = np.where((days + 3) % 7 < 5, SESSION_MINUTES, 0)
+    if not len(days):
+        return minutes
+    epoch = date(1970, 1, 1)
+    closed, early = [], []
+    for year in range((epoch + timedelta(days=int(days.min()))).year,
+                      (epoch + timedelta(days=int(days.max()))).year + 1):
+        year_closed, year_early = nyse_holidays(year)
+        closed += [(d - epoch).days for d in year_closed]
+        early += [(d - epoch).days for d in year_early]
+    minutes[np.isin(days, early)] = HALF_DAY_MINUTES
+    minutes[np.isin(days, closed)] = 0
+    return minutes
+
+
+def _clip_to_bounds(days, expected, bounds):
+    """Lower the expected bars of the first and last session where the scan bounds cut them short"""
+    import pandas as pd
+
+    expected = expected.copy()
+    for ts, is_end in zip(bounds, (False, True)):
+        wall = pd.Timestamp(ts, tz='UTC').tz_convert(MARKET_TZ).tz_localize(None)
+        i = (wall.normalize() - pd.Timestamp(0)).days - int(days[0])
+        if not 0 <= i < len(days):
+            continue
+        # Bars are stamped at their open: [start, end) covers minutes ceil(start) .. ceil(end) - 1
+        minute = int(np.ceil((wall - wall.normalize()) / pd.Timedelta(minutes=1))) - SESSION_OPEN_MINUTE
+        if is_end:
+            expected[i] = min(expected[i], max(minute, 0))
+        else:
+            expected[i] = max(expected[i] - max(minute, 0), 0)
+    return expected
+
+
+def summarize(symbols, days, session_bars, rows, duplicates, ohlc_violations, spikes, max_z, spike_events=None,
+              thresholds=None, window=None, bounds=None):
+    """
+    Per-symbol report and quarantine list from the raw check counts
+
+    Args:
+        symbols: Symbol names (length N)
+        days: Session days since epoch (length D)
+        session_bars: (N, D) unique regular-hours bars per symbol and session
+        rows, duplicates, ohlc_violations, spikes, max_z: Length-N arrays
+        spike_events: DataFrame (symbol, timestamp, z) of the individual spikes
+        thresholds: Overrides of DEFAULT_THRESHOLDS
+        window: (start, end) that was scanned, for the saved report
+        bounds: (start, end) UTC query bounds; sessions they cut short expect only the bars inside them
+
+    Returns:
+        dict: report (DataFrame indexed by symbol, worst first), sessions (incomplete
+        sessions), spikes, quarantine ({symbol: reasons}), thresholds, window
+    """
+    import pandas as pd
+
+    limits = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    bars = np.asarray(session_bars, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    # Session lengths come from the exchange calendar. Peers only adjust it: a calendar session that
+    # no symbol of a wider universe traded at all (an unscheduled closure or a feed-wide outage) is
+    # not held against any one symbol
+    expected = calendar_minutes(days)
+    if bounds is not None and len(expected):
+        expected = _clip_to_bounds(days, expected, bounds)
+    if bars.shape[0] > 1:
+        expected[bars.max(axis=0, initial=0) == 0] = 0
+    # Only sessions between a symbol's first and last bar count (listings, delistings)
+    has = bars > 0
+    first = has.argmax(axis=1)
+    last = bars.shape[1] - 1 - has[:, ::-1].argmax(axis=1)
+    day_idx = np.arange(bars.shape[1])
+    active = (has.any(axis=1)[:, None] & (day_idx >= first[:, None]) & (day_idx <= last[:, None])
+              & (expected > 0))
+    expected_active = np.where(active, expected, 0)
+    total_expected = expected_active.sum(axis=1)
+    incomplete = active & (bars < limits['min_completeness'] * expected)
+
+    safe_rows = np.maximum(rows, 1)
+    completeness = np.where(total_expected > 0,
+                            np.minimum(bars, expected_active).sum(axis=1) / np.maximum(total_expected, 1), 0.0)
+    report = pd.DataFrame({
+        'rows': rows,
+        'sessions': active.sum(axis=1),
+        'missing_sessions': (active & ~has).sum(axis=1),
+        'incomplete_sessions': incomplete.sum(axis=1),
+        'completeness': completeness.round(4),
+        'duplicates': np.asarray(duplicates, dtype=np.int64),
+        'ohlc_violations': np.asarray(ohlc_violations, dtype=np.int64),
+        'spikes': np.asarray(spikes, dtype=np.int64),
+        'max_abs_z': np.asarray(max_z, dtype=np.float64).round(2),
+    }, index=pd.Index(np.asarray(symbols), name='symbol'))
+
+    checks = {
+        'incomplete': completeness < limits['min_completeness'],
+        'missing_sessions': report['missing_sessions'].to_numpy() > limits['max_missing_sessions'],
+        'duplicates': report['duplicates'].to_numpy() / safe_rows > limits['max_duplicate_ratio'],
+        'ohlc': report['ohlc_violations'].to_numpy() / safe_rows > limits['max_ohlc_ratio'],
+        'spikes': report['spikes'].to_numpy() > limits['max_spikes'],
+    }
+    failed = np.stack(list(checks.values()), axis=1)
+    names = np.array(list(checks))
+    report['quarantined'] = failed.any(axis=1)
+    report['reasons'] = [','.join(names[row]) for row in failed]
+
+    sym_idx, session_idx = np.nonzero(incomplete)
+    session_dates = (np.asarray(days, dtype=np.int64) * NS_PER_DAY).astype('datetime64[ns]').astype('datetime64[D]')
+    sessions = pd.DataFrame({
+        'symbol': report.index.to_numpy()[sym_idx],
+        'session': session_dates[session_idx],
+        'bars': bars[sym_idx, session_idx],
+        'expected': expected[session_idx],
+    })
+
+    if spike_events is None:
+        spike_events = pd.DataFrame(columns=['symbol', 'timestamp', 'z'])
+    spike_events = spike_events.reindex(spike_events['z'].abs().sort_values(ascending=False).index)
+
+    report = report.sort_values(['quarantined', 'completeness'], ascending=[False, True], kind='stable')
+    return {
+        'report': report,
+        'sessions': sessions,
+        'spikes': spike_events.reset_index(drop=True),
+        'quarantine': dict(report.loc[report['quarantined'], 'reasons']),
+        'thresholds': limits,
+        'window': window,
+    }
+
+
+def _spike_events(symbols, sid, timestamps, z, z_threshold):
+    import pandas as pd
+
+    hit = np.flatnonzero(np.abs(z) > z_threshold)
+    return pd.DataFrame({'symbol': np.asarray(symbols)[sid[hit]], 'timestamp': timestamps[hit],
+                         'z': z[hit].round(2)})
+
+
+def scan_frame(df, z_threshold=Z_THRESHOLD, thresholds=None):
+    """
+    All checks on an in-memory long-format frame (timestamp, symbol, open, high, low, close, volume)
+
+    Timestamps are UTC (tz-naive values are taken as UTC). Rows may be in any order.
+
+    Returns:
+        dict: See summarize()
+    """
+    import pandas as pd
+
+    codes, symbols = pd.factorize(df['symbol'], sort=True)
+    ts = pd.to_datetime(df['timestamp'])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert('UTC').dt.tz_localize(None)
+    t = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    # Frames from ClickHouse are already in (symbol, timestamp) order; skip the sort and gathers then
+    in_order = len(t) < 2 or bool(np.all((codes[1:] > codes[:-1]) | ((codes[1:] == codes[:-1]) & (t[1:] >= t[:-1]))))
+    order = slice(None) if in_order else np.lexsort((t, codes))
+    sid, t = codes[order], t[order]
+    n_symbols = len(symbols)
+
+    dup = np.zeros(len(t), dtype=bool)
+    dup[1:] = (sid[1:] == sid[:-1]) & (t[1:] == t[:-1])
+    o, h, l, c, v = (df[col].to_numpy(dtype=np.float64)[order] for col in ('open', 'high', 'low', 'close', 'volume'))
+    with np.errstate(invalid='ignore'):
+        bad = (~np.isfinite(o + h + l + c) | (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (l <= 0) | (v < 0))
+    del o, h, l, v
+
+    day, regular = session_keys(t.view('datetime64[ns]'))
+    first_day = int(day.min()) if len(day) else 0
+    n_days = int(day.max()) - first_day + 1 if len(day) else 0
+    keep = regular & ~dup
+    session_bars = np.bincount(sid[keep] * n_days + (day[keep] - first_day),
+                               minlength=n_symbols * n_days).reshape(n_symbols, n_days)
+
+    z, spikes, max_z = spike_stats(sid[keep], day[keep], c[keep], n_symbols, z_threshold)
+    events = _spike_events(symbols, sid[keep], t[keep].view('datetime64[ns]'), z, z_threshold)
+
+    return summarize(
+        symbols, first_day + np.arange(n_days), session_bars,
+        rows=np.bincount(sid, minlength=n_symbols),
+        duplicates=np.bincount(sid[dup], minlength=n_symbols),
+        ohlc_violations=np.bincount(sid[bad], minlength=n_symbols),
+        spikes=spikes, max_z=max_z, spike_events=events, thresholds=thresholds,
+        window=(str(t.view('datetime64[ns]').min()), str(t.view('datetime64[ns]').max())) if len(t) else None,
+    )
+
+
+# ---- ClickHouse ----
+
+_WINDOW = 'timestamp >= {start:DateTime64(3)} AND timestamp < {end:DateTime64(3)}'
+
+
+def session_counts(start, end, symbols=None, client=None):
+    """
+    One GROUP BY over the window: rows, duplicate timestamps, unique regular-hours
+    bars and OHLC violations per (symbol, session day)
+
+    Returns:
+        dict of NumPy columns: symbol, day, rows, duplicates, regular_bars, ohlc_violations
+    """
+    from datapipeline.clickhouse import query_numpy
+
+    where, parameters = _WINDOW, {'start': start, 'end': end}
+    if symbols:
+        where += ' AND symbol IN {symbols:Array(String)}'
+        parameters['symbols'] = list(symbols)
+    query = f"""
+        SELECT
+            symbol,
+            toUInt32(toDate({_LOCAL_TS})) AS day,
+            count() AS rows,
+            count() - uniqExact(timestamp) AS duplicates,
+            uniqExactIf(timestamp, {_REGULAR}) AS regular_bars,
+            countIf({_OHLC_BAD}) AS ohlc_violations
+        FROM {MARKET_DATA_TABLE}
+        WHERE {where}
+        GROUP BY symbol, day
+    """
+    return query_numpy(query, parameters, client=client)
+
+
+def _chunk_spikes(symbols, start, end, z_threshold, client=None):
+    """Spike stats for a few symbols from their deduplicated regular-hours closes"""
+    from datapipeline.clickhouse import query_numpy
+
+    query = f"""
+        SELECT indexOf({{symbols:Array(String)}}, symbol) - 1 AS sid, timestamp, close
+        FROM {MARKET_DATA_TABLE}
+        WHERE symbol IN {{symbols:Array(String)}} AND {_WINDOW} AND {_REGULAR}
+        ORDER BY sid, timestamp
+        LIMIT 1 BY sid, timestamp
+    """
+    columns = query_numpy(query, {'symbols': list(symbols), 'start': start, 'end': end}, client=client)
+    if not columns or not len(columns['sid']):
+        return np.zeros(len(symbols), dtype=np.int64), np.zeros(len(symbols)), None
+    sid = columns['sid'].astype(np.int64)
+    day, _ = session_keys(columns['timestamp'])
+    z, spikes, max_z = spike_stats(sid, day, columns['close'], len(symbols), z_threshold)
+    return spikes, max_z, _spike_events(symbols, sid, columns['timestamp'], z, z_threshold)
+
+
+def scan_clickhouse(start=None, end=None, symbols=None, z_threshold=Z_THRESHOLD, thresholds=None,
+                    chunk_symbols=50, workers=4, client=None):
+    """
+    All checks against trading_db.market_data
+
+    Args:
+        start, end: UTC datetimes (default: the last 365 days)
+        symbols: Restrict to these symbols (default: every symbol in the window)
+        chunk_symbols: Symbols per spike query; bounds memory to roughly chunk_symbols x window bars
+        workers: Concurrent spike queries on the shared client pool
+
+    Returns:
+        dict: See summarize()
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    import pandas as pd
+
+    end = end or datetime.now(timezone.utc).replace(tzinfo=None)
+    start = start or end - timedelta(days=365)
+    counts = session_counts(start, end, symbols, client=client)
+    if not counts or not len(counts['symbol']):
+        logger.warning(f"⚠️ No bars in {MARKET_DATA_TABLE} between {start} and {end}")
+        return None
+
+    codes, names = pd.factorize(counts['symbol'], sort=True)
+    names = np.asarray(names)
+    day = counts['day'].astype(np.int64)
+    first_day = int(day.min())
+    n_symbols, n_days = len(names), int(day.max()) - first_day + 1
+
+    def per_symbol(column):
+        return np.bincount(codes, weights=counts[column], minlength=n_symbols).astype(np.int64)
+
+    session_bars = np.bincount(codes * n_days + (day - first_day), weights=counts['regular_bars'],
+                               minlength=n_symbols * n_days).astype(np.int64).reshape(n_symbols, n_days)
+
+    chunks = [names[i:i + chunk_symbols] for i in range(0, n_symbols, chunk_symbols)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda chunk: _chunk_spikes(chunk, start, end, z_threshold, client), chunks))
+    spikes = np.concatenate([r[0] for r in results])
+    max_z = np.concatenate([r[1] for r in results])
+    events = [r[2] for r in results if r[2] is not None and len(r[2])]
+
+    return summarize(
+        names, first_day + np.arange(n_days), session_bars,
+        rows=per_symbol('rows'), duplicates=per_symbol('duplicates'),
+        ohlc_violations=per_symbol('ohlc_violations'), spikes=spikes, max_z=max_z,
+        spike_events=pd.concat(events, ignore_index=True) if events else None,
+        thresholds=thresholds, window=(str(start), str(end)), bounds=(start, end),
+    )
+
+
+# ---- report / quarantine ----
+
+def save_report(result, path=REPORT_PATH, max_events=500):
+    """Write the report, quarantine list and the largest spikes/incomplete sessions as JSON"""
+    from pathlib import Path
+
+    def records(df):
+        return json.loads(df.head(max_events).to_json(orient='records', date_format='iso'))
+
+    payload = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'window': result['window'],
+        'thresholds': result['thresholds'],
+        'quarantine': result['quarantine'],
+        'symbols': json.loads(result['report'].reset_index().to_json(orient='records')),
+        'incomplete_sessions': records(result['sessions']),
+        'spikes': records(result['spikes']),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def load_quarantine(path=REPORT_PATH):
+    """{symbol: reasons} from the last saved report ({} if there is none)"""
+    try:
+        with open(path) as f:
+            return json.load(f).get('quarantine', {})
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', help='comma-separated symbols (default: every symbol in the window)')
+    parser.add_argument('--days', type=int, default=365, help='window length ending now')
+    parser.add_argument('--csv', help='scan a long-format bars CSV instead of ClickHouse')
+    parser.add_argument('--z', type=float, default=Z_THRESHOLD, help='robust z-score spike threshold')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent spike queries')
+    parser.add_argument('--output', default=REPORT_PATH)
+    parser.add_argument('--top', type=int, default=20, help='symbols to print')
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.csv:
+        import pandas as pd
+
+        df = pd.read_csv(args.csv)
+        if args.symbols:
+            df = df[df['symbol'].isin(args.symbols.split(','))]
+        result = scan_frame(df, z_threshold=args.z)
+    else:
+        end = datetime.now(timezone.utc).replace(tzinfo=None)
+        result = scan_clickhouse(end - timedelta(days=args.days), end,
+                                 symbols=args.symbols.split(',') if args.symbols else None,
+                                 z_threshold=args.z, workers=args.workers)
+    if result is None:
+        return 1
+    elapsed = time.perf_counter() - t0
+
+    report = result['report']
+    path = save_report(result, args.output)
+    print(report.head(args.top).to_string())
+    print(f"\n✓ Scanned {len(report):,} symbols / {int(report['rows'].sum()):,} rows in {elapsed:.1f}s → {path}")
+    if result['quarantine']:
+        print(f"🚨 {len(result['quarantine'])} quarantined: "
+              + ', '.join(f"{s} ({r})" for s, r in list(result['quarantine'].items())[:args.top]))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    raise SystemExit(main())
@@ -106,6 +106,41 @@ def compare_slippage_impact(predictions, close_prices, test_returns):
         'gap_acceptable': gap < 20.0
     }
 
+
+def backtest_saved_model(model_path, features_csv, feature_cols, target_col='target', slippage_bp=2):
+    """
+    Re-run the Layer 3 slippage check for a saved model on the hold-out test split
+
+    Args:
+        model_path: XGBoost model file written by the trainer
+        features_csv: Features CSV produced by run_features.py
+        feature_cols: Feature column names the model was trained on
+        target_col: Name of target column
+        slippage_bp: slippage in basis points
+
+    Returns:
+        dict: Output of backtest_with_realistic_slippage plus the no-slippage Sharpe
+    """
+    import xgboost as xgb
+    from datapipeline.panel import per_symbol_pct_change
+    from models.data_preparation import prepare_data_walk_forward, sort_for_walk_forward
+
+    df = sort_for_walk_forward(pd.read_csv(features_csv))
+    _, _, X_test, _, _, _, _ = prepare_data_walk_forward(df, feature_cols=feature_cols, target_col=target_col)
+
+    model = xgb.XGBClassifier()
+    model.load_model(model_path)
+    preds = model.predict(X_test)
+
+    test_rows = df.iloc[-len(X_test):]
+    results = backtest_with_realistic_slippage(preds, test_rows['close'].values, slippage_bp=slippage_bp)
+
+    test_returns = np.nan_to_num(per_symbol_pct_change(df, 'close')[-len(X_test):], 0)
+    results['no_slippage_sharpe'] = (
+        (test_returns.mean() / test_returns.std()) * np.sqrt(252) if test_returns.std() > 0 else 0
+    )
+    return results
+
 # ================================================================================
 # END FILE 3
 # ================================================================================
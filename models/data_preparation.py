@@ -11,6 +11,16 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def sort_for_walk_forward(df):
+    """
+    Chronological row order used for the split (stable, symbol as tie-break)
+
+    Callers that need per-row context for a split (e.g. close prices of the
+    test rows) must sort with this first so their rows line up with X_test.
+    """
+    keys = ['timestamp', 'symbol'] if 'symbol' in df.columns else ['timestamp']
+    return df.sort_values(keys, kind='stable').reset_index(drop=True)
+
 def prepare_data_walk_forward(df, feature_cols, target_col='target'):
     """
     Split time-series data properly (NO look-ahead bias)
@@ -27,7 +37,7 @@ def prepare_data_walk_forward(df, feature_cols, target_col='target'):
         tuple: (X_train, X_val, X_test, y_train, y_val, y_test, dates_test)
     """
 
-    df = df.sort_values('timestamp').reset_index(drop=True)
+    df = sort_for_walk_forward(df)
 
     X = df[feature_cols].fillna(0).values
     y = df[target_col].values
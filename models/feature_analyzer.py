@@ -5,7 +5,6 @@ Identifies which features actually drive model predictions
 Removes noise, improves generalization to live trading
 """
 
-import xgboost as xgb
 import pandas as pd
 import numpy as np
 import logging
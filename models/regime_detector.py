@@ -5,7 +5,6 @@ Detects if model breaks in specific market conditions before paper trading
 
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,25 +15,37 @@ class MarketRegimeDetector:
     def __init__(self, window=20):
         self.window = window
 
-    def classify_regimes(self, returns_series):
+    def classify_regimes(self, returns_series, df=None):
         """
         Classify each timestep into one of 3 market regimes
 
         Args:
-            returns_series: Series of daily returns
+            returns_series: Series of returns, one per row
+            df: The rows' frame; if it has a symbol column, rolling windows
+                are computed within each symbol instead of across the stack
 
         Returns:
             array: regime labels (0, 1, or 2)
         """
-        returns = returns_series.values
-
-        vol = pd.Series(returns).rolling(self.window).std().values
-        trend = pd.Series(returns).rolling(self.window).sum().values
+        returns = np.asarray(returns_series, dtype=np.float64)
+
+        if df is not None and 'symbol' in df.columns:
+            from datapipeline.panel import Panel, rolling_std, rolling_sum
+
+            panel = Panel.from_long(df.assign(ret=returns), fields=['ret'], dtype=np.float64)
+            ret = panel.field('ret')
+            vol = panel.to_rows(rolling_std(ret, self.window))
+            trend = panel.to_rows(rolling_sum(ret, self.window))
+        else:
+            vol = pd.Series(returns).rolling(self.window).std().values
+            trend = pd.Series(returns).rolling(self.window).sum().values
         trend_strength = np.divide(trend, vol + 1e-8)
 
         features = np.column_stack([vol, trend_strength])
         features = np.nan_to_num(features, 0)
 
+        from sklearn.cluster import KMeans
+
         kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
         regimes = kmeans.fit_predict(features)
 
@@ -54,9 +65,12 @@ class MarketRegimeDetector:
         Returns:
             dict with per-regime metrics
         """
+        from datapipeline.panel import per_symbol_pct_change
+
         df = df.copy()
 
-        df['regime'] = self.classify_regimes(df['close'].pct_change())
+        df['return'] = per_symbol_pct_change(df, 'close')
+        df['regime'] = self.classify_regimes(df['return'], df)
 
         results = {}
         regime_names = {0: 'Choppy (Low Vol)', 1: 'Trending', 2: 'Mean-Reversion'}
@@ -77,7 +91,7 @@ class MarketRegimeDetector:
 
             accuracy = (preds == y_regime).mean()
 
-            returns = regime_data['close'].pct_change().values
+            returns = np.nan_to_num(regime_data['return'].values, 0)
             signal_returns = preds * returns
             sharpe = (signal_returns.mean() / signal_returns.std() * np.sqrt(252)) if signal_returns.std() > 0 else 0
 
@@ -0,0 +1,349 @@
+"""
+Model Registry: content-addressed model versions with their serving context
+Each version is one bundle file: a JSON header (feature list, scaler, training
+data fingerprint, metrics, params) followed by the booster in XGBoost's UBJSON
+format, so model and scaler come back from a single memory-mapped read.
+Named pins (e.g. production) point at versions; ModelServer hot-swaps between them
+Run: python argo.py registry [list | show <ref> | pin <name> <ref>]
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_ROOT = 'models/registry'
+BUNDLE_NAME = 'bundle.argomodel'
+MAGIC = b'ARGOMDL1'
+_PREFIX = struct.Struct('<8sQ')  # magic, header length
+
+
+def fingerprint_frame(df, cols):
+    """Order-sensitive hash of the training data columns"""
+    import pandas as pd
+
+    hashes = pd.util.hash_pandas_object(df[list(cols)], index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def _write_atomic(path, data):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class LoadedModel:
+    """A booster plus everything needed to score raw feature rows"""
+
+    def __init__(self, version, booster, metadata):
+        self.version = version
+        self.booster = booster
+        self.metadata = metadata
+        self.feature_cols = metadata['feature_cols']
+        scaler = metadata.get('scaler')
+        self.mean = np.asarray(scaler['mean'], dtype=np.float64) if scaler else None
+        self.scale = np.asarray(scaler['scale'], dtype=np.float64) if scaler else None
+
+    def transform(self, X):
+        """Select feature columns (DataFrame input) and apply the training-time scaler"""
+        if hasattr(X, 'loc'):
+            X = X[self.feature_cols].fillna(0).to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X
+
+    def predict_proba(self, X, scaled=False):
+        """
+        P(target=1) per row (thread-safe; no DMatrix construction)
+
+        Args:
+            X: Raw feature rows, or already-standardized rows with scaled=True
+        """
+        if not scaled:
+            X = self.transform(X)
+        return self.booster.inplace_predict(X)
+
+
+class ModelRegistry:
+    """
+    Local, content-addressed model store
+
+    Layout:
+        <root>/<version>/bundle.argomodel   header + UBJSON booster
+        <root>/<version>/metadata.json      header copy, for listing without loading
+        <root>/refs.json                    {'pins': {name: version}}
+    """
+
+    def __init__(self, root=REGISTRY_ROOT, cache_size=4):
+        """
+        Args:
+            root: Registry directory
+            cache_size: Loaded boosters kept in the in-process LRU
+        """
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- writing ----
+
+    def register(self, model, feature_cols, scaler=None, data_fingerprint=None, metrics=None, params=None,
+                 extras=None):
+        """
+        Store a model version (a no-op if identical content is already registered)
+
+        An early-stopped model is stored truncated to its best iteration, so the
+        served model scores exactly like the validated XGBClassifier.predict.
+
+        Args:
+            model: xgboost Booster or sklearn-API model
+            feature_cols: Feature columns, in training order
+            scaler: {'mean': [...], 'scale': [...]} as returned by run_features.standardize
+            data_fingerprint: Hash of the training data (see fingerprint_frame)
+            metrics: Validation metrics (numbers)
+            params: Training hyperparameters
+            extras: Any other JSON-serializable context to keep with the model
+
+        Returns:
+            str: Version id
+        """
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        best_iteration = getattr(model, 'best_iteration', None)
+        if best_iteration is not None and best_iteration + 1 < booster.num_boosted_rounds():
+            booster = booster[:best_iteration + 1]
+        model_bytes = bytes(booster.save_raw(raw_format='ubj'))
+
+        content = {
+            'feature_cols': list(feature_cols),
+            'scaler': scaler and {'mean': list(scaler['mean']), 'scale': list(scaler['scale'])},
+            'data_fingerprint': data_fingerprint,
+            'params': params or {},
+            'extras': extras or {},
+        }
+        digest = hashlib.sha256(model_bytes)
+        digest.update(json.dumps(content, sort_keys=True, default=str).encode())
+        version = digest.hexdigest()[:12]
+
+        version_dir = self.root / version
+        if (version_dir / BUNDLE_NAME).exists():
+            logger.info(f"  ✓ Model version {version} already registered")
+            return version
+
+        header = {
+            **content,
+            'version': version,
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'model_format': 'ubj',
+            'model_bytes': len(model_bytes),
+            'best_iteration': best_iteration,
+            'num_boosted_rounds': booster.num_boosted_rounds(),
+        }
+        header_bytes = json.dumps(header, default=str).encode()
+
+        version_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(version_dir / BUNDLE_NAME, _PREFIX.pack(MAGIC, len(header_bytes)) + header_bytes + model_bytes)
+        _write_atomic(version_dir / 'metadata.json', json.dumps(header, indent=2, default=str).encode())
+        logger.info(f"  ✓ Registered model version {version} ({len(model_bytes) / 1024:.0f}KB)")
+        return version
+
+    def pin(self, name, ref):
+        """Point a named pin (e.g. 'production') at a version; returns the version"""
+        version = self.resolve(ref)
+        refs = self._read_refs()
+        refs['pins'][name] = version
+        self.root.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.root / 'refs.json', json.dumps(refs, indent=2).encode())
+        logger.info(f"  ✓ Pinned {name} → {version}")
+        return version
+
+    # ---- reading ----
+
+    def _read_refs(self):
+        try:
+            with open(self.root / 'refs.json') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'pins': {}}
+
+    def pins(self):
+        return self._read_refs()['pins']
+
+    def versions(self):
+        """Metadata of every version, oldest first"""
+        out = []
+        for meta_path in self.root.glob('*/metadata.json'):
+            with open(meta_path) as f:
+                out.append(json.load(f))
+        return sorted(out, key=lambda m: m['created_at'])
+
+    def resolve(self, ref):
+        """Version id, unique version prefix, pin name, or 'latest' → version id"""
+        pins = self.pins()
+        if ref in pins:
+            return pins[ref]
+        if ref == 'latest':
+            versions = self.versions()
+            if not versions:
+                raise KeyError("registry is empty")
+            return versions[-1]['version']
+        if (self.root / ref / BUNDLE_NAME).exists():
+            return ref
+        matches = [p.name for p in self.root.glob(f"{ref}*") if (p / BUNDLE_NAME).exists()]
+        if len(matches) == 1:
+            return matches[0]
+        raise KeyError(f"unknown model ref {ref!r}" if not matches else f"ambiguous model ref {ref!r}: {matches}")
+
+    def metadata(self, ref):
+        with open(self.root / self.resolve(ref) / 'metadata.json') as f:
+            return json.load(f)
+
+    def load(self, ref):
+        """
+        Load a version (LRU-cached; repeated loads of a version are free)
+
+        Returns:
+            LoadedModel
+        """
+        version = self.resolve(ref)
+        with self._lock:
+            loaded = self._cache.get(version)
+            if loaded is not None:
+                self._cache.move_to_end(version)
+                return loaded
+
+        loaded = self._read_bundle(version)
+
+        with self._lock:
+            self._cache[version] = loaded
+            self._cache.move_to_end(version)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return loaded
+
+    def _read_bundle(self, version):
+        import xgboost as xgb
+
+        path = self.root / version / BUNDLE_NAME
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, header_len = _PREFIX.unpack_from(mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a model bundle")
+            start = _PREFIX.size
+            metadata = json.loads(mm[start:start + header_len])
+            booster = xgb.Booster()
+            booster.load_model(bytearray(mm[start + header_len:]))
+        return LoadedModel(version, booster, metadata)
+
+
+class ModelServer:
+    """
+    Serves predictions from a pinned model and swaps versions without pausing readers
+
+    predict() reads self.current once per call (a single reference read under the
+    GIL), so a swap is just loading the new bundle off to the side and rebinding.
+    """
+
+    def __init__(self, registry, ref='production'):
+        self.registry = registry
+        self.ref = ref
+        self.current = registry.load(ref)
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def predict_proba(self, X, scaled=False):
+        return self.current.predict_proba(X, scaled=scaled)
+
+    def swap(self, ref=None):
+        """
+        Switch to `ref` (default: re-resolve the server's pin)
+
+        Returns:
+            float: Milliseconds spent loading and swapping
+        """
+        t0 = time.perf_counter()
+        with self._swap_lock:
+            if ref is not None:
+                self.ref = ref
+            loaded = self.registry.load(self.ref)
+            previous, self.current = self.current, loaded
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if previous.version != loaded.version:
+            logger.info(f"  ✓ Model swapped {previous.version} → {loaded.version} in {elapsed_ms:.1f}ms")
+        return elapsed_ms
+
+    def watch(self, interval=5.0):
+        """Follow the pin in a background thread: re-pinning in the registry swaps this server"""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    if self.registry.resolve(self.ref) != self.current.version:
+                        self.swap()
+                except Exception as e:
+                    logger.error(f"⚠️ Model watch failed for {self.ref}: {e}")
+
+        self._watcher = threading.Thread(target=loop, name='model-watch', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def close(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and pin registered model versions")
+    parser.add_argument('--root', default=REGISTRY_ROOT)
+    sub = parser.add_subparsers(dest='action')
+    sub.add_parser('list')
+    p = sub.add_parser('show')
+    p.add_argument('ref')
+    p = sub.add_parser('pin')
+    p.add_argument('name')
+    p.add_argument('ref')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    try:
+        if args.action == 'show':
+            print(json.dumps(registry.metadata(args.ref), indent=2))
+            return 0
+        if args.action == 'pin':
+            print(f"{args.name} → {registry.pin(args.name, args.ref)}")
+            return 0
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+
+    pinned = {}
+    for name, version in registry.pins().items():
+        pinned.setdefault(version, []).append(name)
+    for meta in registry.versions():
+        metrics = ', '.join(f"{k}={v:.3f}" for k, v in list(meta['metrics'].items())[:3])
+        pins = f"  [{', '.join(pinned[meta['version']])}]" if meta['version'] in pinned else ''
+        print(f"{meta['version']}  {meta['created_at'][:19]}  data={meta['data_fingerprint']}  {metrics}{pins}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
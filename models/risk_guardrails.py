@@ -1,39 +1,338 @@
+"""
+Risk Guardrails: Pre-trade checks and daily circuit breaker
+Safe to share across order threads and asyncio tasks
+State is snapshotted to disk so a mid-session restart keeps the circuit breaker armed
+"""
+
+import json
 import logging
-logger = logging.getLogger(name)
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo('America/New_York')
+
+# Rejection reason codes returned by RiskGuardrails.check_batch
+REASON_OK = 0
+REASON_LOW_CONFIDENCE = 1
+REASON_NO_SIZE = 2
+REASON_CIRCUIT_BREAKER = 3
+REASON_SYMBOL_LOSS = 4
+REASON_TRADE_BUDGET = 5
+
+REASON_NAMES = {
+    REASON_OK: 'ok',
+    REASON_LOW_CONFIDENCE: 'low_confidence',
+    REASON_NO_SIZE: 'no_size',
+    REASON_CIRCUIT_BREAKER: 'circuit_breaker',
+    REASON_SYMBOL_LOSS: 'symbol_loss',
+    REASON_TRADE_BUDGET: 'trade_budget',
+}
+
 
 class RiskGuardrails:
-def init(self):
-self.daily_pnl = 0
-self.trades_today = 0
-self.per_symbol_loss = {}
-
-    # LIMITS
-    self.MAX_DAILY_LOSS = -500
-    self.MAX_PER_SYMBOL_LOSS = -100
-    self.MAX_TRADES_PER_DAY = 50
-    self.MIN_CONFIDENCE = 0.52
-
-def check_can_trade(self, symbol, confidence):
-    if confidence < self.MIN_CONFIDENCE:
-        logger.warning(f"BLOCKED: {symbol} confidence {confidence:.2f} < {self.MIN_CONFIDENCE}")
-        return False
-
-    if self.trades_today >= self.MAX_TRADES_PER_DAY:
-        logger.warning(f"BLOCKED: {self.trades_today} trades >= {self.MAX_TRADES_PER_DAY} limit")
-        return False
-
-    if self.daily_pnl < self.MAX_DAILY_LOSS:
-        logger.error(f"🚨 CIRCUIT BREAKER: Daily loss {self.daily_pnl} < {self.MAX_DAILY_LOSS}. STOP TRADING")
-        return False
-
-    if symbol in self.per_symbol_loss and self.per_symbol_loss[symbol] < self.MAX_PER_SYMBOL_LOSS:
-        logger.warning(f"BLOCKED: {symbol} loss {self.per_symbol_loss[symbol]} < {self.MAX_PER_SYMBOL_LOSS}")
-        return False
-
-    return True
-
-def record_trade(self, symbol, pnl):
-    self.daily_pnl += pnl
-    self.trades_today += 1
-    self.per_symbol_loss[symbol] = self.per_symbol_loss.get(symbol, 0) + pnl
-    logger.info(f"Trade: {symbol} PnL={pnl:.2f} | Daily={self.daily_pnl:.2f} | Trades={self.trades_today}")
+    """
+    Daily loss, per-symbol loss, trade-count and confidence limits
+
+    Checks are O(1) and lock-free: they only read counters and single dict
+    keys, which are updated atomically under the GIL. Writers (record_trade,
+    record_open, record_close, rollover) serialize on a single lock and touch
+    one key per trade; the per-symbol dict is only replaced when the day rolls
+    over. The trading day rolls over automatically at midnight
+    America/New_York, the first time any check or trade sees the new date.
+    Snapshots are throttled: a burst of trades is persisted in one write at
+    most every snapshot_interval seconds.
+    """
+
+    def __init__(self, snapshot_path='monitoring/risk_state.json', clock=None, alerts=None, snapshot_interval=1.0):
+        """
+        Args:
+            snapshot_path: JSON file the state is persisted to (None disables persistence)
+            clock: callable returning the current datetime (defaults to market-time now)
+            alerts: Optional monitoring.alerts.AlertSystem notified when the circuit breaker trips
+            snapshot_interval: Minimum seconds between snapshot writes triggered by trades
+        """
+        # LIMITS
+        self.MAX_DAILY_LOSS = -500
+        self.MAX_PER_SYMBOL_LOSS = -100
+        self.MAX_TRADES_PER_DAY = 50
+        self.MIN_CONFIDENCE = 0.52
+
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._clock = clock or (lambda: datetime.now(MARKET_TZ))
+        self.alerts = alerts
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self.snapshot_interval = snapshot_interval
+        self._timer_lock = threading.Lock()
+        self._pending_snapshot = None
+        self._last_snapshot = float('-inf')
+
+        self.trading_day = self._today()
+        self.daily_pnl = 0.0
+        self.trades_today = 0
+        self.per_symbol_loss = {}
+        self._breaker_tripped = False
+
+        self._load_snapshot()
+
+    def _today(self):
+        return self.trading_day_of(self._clock())
+
+    @staticmethod
+    def trading_day_of(ts):
+        """Map a datetime to its market-time trading date (naive datetimes are taken as market time)"""
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(MARKET_TZ)
+        return ts.date()
+
+    def _roll_if_needed(self):
+        today = self._today()
+        if today != self.trading_day:
+            with self._lock:
+                if today > self.trading_day:
+                    logger.info(f"New trading day {today}: resetting guardrails (was {self.trading_day})")
+                    self._reset_locked(today)
+
+    def _reset_locked(self, trading_day):
+        self.trading_day = trading_day
+        self.daily_pnl = 0.0
+        self.trades_today = 0
+        self.per_symbol_loss = {}
+        self._breaker_tripped = False
+
+    def reset(self, trading_day=None):
+        """Clear all counters, optionally pinning the trading day (used when replaying history)"""
+        with self._lock:
+            self._reset_locked(trading_day or self._today())
+        self.snapshot()
+
+    @property
+    def circuit_breaker_tripped(self):
+        """True while today's PnL is below MAX_DAILY_LOSS (clears when the trading day rolls over)"""
+        self._roll_if_needed()
+        return self.daily_pnl < self.MAX_DAILY_LOSS
+
+    def check_can_trade(self, symbol, confidence):
+        self._roll_if_needed()
+
+        if confidence < self.MIN_CONFIDENCE:
+            logger.warning(f"BLOCKED: {symbol} confidence {confidence:.2f} < {self.MIN_CONFIDENCE}")
+            return False
+
+        if self.trades_today >= self.MAX_TRADES_PER_DAY:
+            logger.warning(f"BLOCKED: {self.trades_today} trades >= {self.MAX_TRADES_PER_DAY} limit")
+            return False
+
+        if self.daily_pnl < self.MAX_DAILY_LOSS:
+            # Announced once, when it tripped (_record); every later check is just refused
+            return False
+
+        symbol_loss = self.per_symbol_loss.get(symbol, 0)
+        if symbol_loss < self.MAX_PER_SYMBOL_LOSS:
+            logger.warning(f"BLOCKED: {symbol} loss {symbol_loss} < {self.MAX_PER_SYMBOL_LOSS}")
+            return False
+
+        return True
+
+    def check_batch(self, symbols, confidences, sizes):
+        """
+        Vectorized pre-trade check for a whole signal vector
+
+        Applies the same limits as check_can_trade, then spends the remaining
+        daily trade budget on the surviving rows in priority order (highest
+        confidence first). Does not reserve the budget; record_open (or
+        record_trade) does that once orders actually fill. Rejections are
+        logged as one summary line.
+
+        Args:
+            symbols: sequence of ticker symbols
+            confidences: array of model confidences, same length as symbols
+            sizes: array of intended order sizes; non-positive sizes are rejected
+
+        Returns:
+            tuple: (accept mask as bool array, reason codes as int8 array)
+        """
+        self._roll_if_needed()
+
+        confidences = np.asarray(confidences, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        n = len(confidences)
+        if len(symbols) != n or len(sizes) != n:
+            raise ValueError(f"check_batch: got {len(symbols)} symbols, {n} confidences, {len(sizes)} sizes")
+
+        reasons = np.zeros(n, dtype=np.int8)
+
+        # Assign most general reason last so it wins, matching check_can_trade's order
+        per_symbol_loss = self.per_symbol_loss
+        if per_symbol_loss:
+            losses = np.fromiter((per_symbol_loss.get(s, 0) for s in symbols), dtype=np.float64, count=n)
+            reasons[losses < self.MAX_PER_SYMBOL_LOSS] = REASON_SYMBOL_LOSS
+        if self.daily_pnl < self.MAX_DAILY_LOSS:
+            reasons[:] = REASON_CIRCUIT_BREAKER
+        reasons[sizes <= 0] = REASON_NO_SIZE
+        reasons[confidences < self.MIN_CONFIDENCE] = REASON_LOW_CONFIDENCE
+
+        budget = max(self.MAX_TRADES_PER_DAY - self.trades_today, 0)
+        eligible = np.flatnonzero(reasons == REASON_OK)
+        if len(eligible) > budget:
+            # Stable sort keeps input order among equal confidences
+            by_priority = eligible[np.argsort(-confidences[eligible], kind='stable')]
+            reasons[by_priority[budget:]] = REASON_TRADE_BUDGET
+
+        accept = reasons == REASON_OK
+
+        if not accept.all():
+            self._log_batch_rejections(reasons)
+
+        return accept, reasons
+
+    def _log_batch_rejections(self, reasons):
+        counts = np.bincount(reasons, minlength=len(REASON_NAMES))
+        summary = ', '.join(f"{REASON_NAMES[code]}={counts[code]}" for code in np.flatnonzero(counts) if code)
+        message = f"BLOCKED {len(reasons) - counts[REASON_OK]}/{len(reasons)} signals: {summary}"
+        if counts[REASON_CIRCUIT_BREAKER] == len(reasons) - counts[REASON_OK]:
+            # Only the breaker, which was announced when it tripped
+            logger.debug(message)
+        else:
+            logger.warning(message)
+
+    def record_trade(self, symbol, pnl, at=None):
+        """
+        Record a closed trade against today's limits (one trade toward the budget plus its PnL)
+
+        Args:
+            symbol: Ticker symbol
+            pnl: Realized PnL of the trade
+            at: Optional trade timestamp; trades from an earlier trading day are ignored
+        """
+        self._record(symbol, pnl, 1, at)
+
+    def record_open(self, symbol, at=None):
+        """Count an opening fill toward the daily trade budget (no PnL is realized yet)"""
+        self._record(symbol, 0.0, 1, at)
+
+    def record_close(self, symbol, pnl, at=None):
+        """Book the realized PnL of a closing fill; the trade was already counted when it opened"""
+        self._record(symbol, pnl, 0, at)
+
+    def _record(self, symbol, pnl, trades, at):
+        day = self.trading_day_of(at) if at is not None else self._today()
+
+        with self._lock:
+            if day > self.trading_day:
+                self._reset_locked(day)
+            elif day < self.trading_day:
+                logger.warning(f"Ignoring {symbol} trade from {day}: guardrails are on {self.trading_day}")
+                return
+
+            self.daily_pnl += pnl
+            self.trades_today += trades
+            if pnl:
+                self.per_symbol_loss[symbol] = self.per_symbol_loss.get(symbol, 0) + pnl
+            daily_pnl, trades_today = self.daily_pnl, self.trades_today
+            tripped = daily_pnl < self.MAX_DAILY_LOSS and not self._breaker_tripped
+            if tripped:
+                self._breaker_tripped = True
+
+        logger.info(f"Trade: {symbol} PnL={pnl:.2f} | Daily={daily_pnl:.2f} | Trades={trades_today}")
+        if tripped:
+            self._announce_breaker(daily_pnl)
+        self._schedule_snapshot()
+
+    def _announce_breaker(self, daily_pnl):
+        logger.error(f"🚨 CIRCUIT BREAKER: Daily loss {daily_pnl:.2f} < {self.MAX_DAILY_LOSS}. STOP TRADING")
+        if self.alerts is not None:
+            self.alerts.alert_circuit_breaker(daily_pnl)
+
+    def state(self):
+        """Consistent copy of the current counters"""
+        with self._lock:
+            return {
+                'trading_day': self.trading_day.isoformat(),
+                'daily_pnl': self.daily_pnl,
+                'trades_today': self.trades_today,
+                'per_symbol_loss': dict(self.per_symbol_loss),
+            }
+
+    def _schedule_snapshot(self):
+        """Snapshot now, or once the throttle interval has passed if a write just happened"""
+        if self.snapshot_path is None:
+            return
+        with self._timer_lock:
+            if self._pending_snapshot is not None:
+                return  # the queued write will read this trade's state
+            delay = self._last_snapshot + self.snapshot_interval - time.monotonic()
+            if delay > 0:
+                self._pending_snapshot = threading.Timer(delay, self._deferred_snapshot)
+                self._pending_snapshot.daemon = True
+                self._pending_snapshot.start()
+                return
+        self.snapshot()
+
+    def _deferred_snapshot(self):
+        with self._timer_lock:
+            self._pending_snapshot = None
+        self.snapshot()
+
+    def flush(self):
+        """Write any throttled snapshot now (call on shutdown)"""
+        with self._timer_lock:
+            pending, self._pending_snapshot = self._pending_snapshot, None
+        if pending is not None:
+            pending.cancel()
+            self.snapshot()
+
+    def snapshot(self):
+        """Atomically persist the current state (write temp file, then rename)"""
+        if self.snapshot_path is None:
+            return
+
+        # Copy under the snapshot lock so concurrent writers land in order
+        with self._snapshot_lock:
+            state = self.state()
+            state['updated_at'] = self._clock().isoformat()
+            try:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + '.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.snapshot_path)
+                self._last_snapshot = time.monotonic()
+            except OSError as e:
+                logger.error(f"⚠️ Could not snapshot guardrail state to {self.snapshot_path}: {e}")
+
+    def _load_snapshot(self):
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+
+        try:
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            snapshot_day = datetime.fromisoformat(state['trading_day']).date()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable guardrail snapshot {self.snapshot_path}: {e}")
+            return
+
+        if snapshot_day != self.trading_day:
+            logger.info(f"Guardrail snapshot is from {snapshot_day}, starting fresh for {self.trading_day}")
+            return
+
+        self.daily_pnl = float(state.get('daily_pnl', 0.0))
+        self.trades_today = int(state.get('trades_today', 0))
+        self.per_symbol_loss = {s: float(v) for s, v in state.get('per_symbol_loss', {}).items()}
+        logger.info(
+            f"✓ Restored guardrails for {snapshot_day}: Daily={self.daily_pnl:.2f} | Trades={self.trades_today}"
+        )
+        if self.daily_pnl < self.MAX_DAILY_LOSS:
+            self._breaker_tripped = True
+            self._announce_breaker(self.daily_pnl)
@@ -0,0 +1,285 @@
+"""
+Experiment tracking: buffered, asynchronous MLflow logging
+Metrics, params and tags are queued in memory and sent with log_batch from a
+background thread; artifact and model uploads run concurrently in a small
+thread pool. Nothing on the caller's path waits on MLflow (not even its
+import), and failures are collected into a summary instead of being swallowed
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACKING_URI = 'mlruns'
+
+# MLflow's per-request limits for log_batch
+MAX_BATCH_METRICS = 1000
+MAX_BATCH_PARAMS = 100
+MAX_BATCH_TAGS = 100
+
+
+def resolve_tracking_uri(uri=None):
+    """Explicit URI, else $MLFLOW_TRACKING_URI, else the local mlruns/ file store"""
+    uri = uri or os.getenv('MLFLOW_TRACKING_URI') or DEFAULT_TRACKING_URI
+    if '://' not in uri and not uri.startswith('file:'):
+        uri = Path(uri).resolve().as_uri()
+    return uri
+
+
+class RunTracker:
+    """
+    One MLflow run, logged without blocking the caller
+
+    Usage:
+        with RunTracker(run_name='xgb_optimized_v1') as tracker:
+            tracker.log_params(params)
+            tracker.log_metrics({'test_acc': 0.54})
+            tracker.log_model(model, 'model', flavor='xgboost')
+        print(tracker.summary())
+    """
+
+    def __init__(self, run_name=None, experiment=None, tracking_uri=None, tags=None, flush_interval=1.0,
+                 flush_size=500, artifact_workers=4):
+        """
+        Args:
+            run_name: MLflow run name
+            experiment: Experiment name (created if missing); default experiment if None
+            tracking_uri: See resolve_tracking_uri()
+            tags: Initial run tags
+            flush_interval: Max seconds a queued entry waits before being sent
+            flush_size: Queued entries that trigger an immediate send
+            artifact_workers: Concurrent artifact uploads
+        """
+        self.run_name = run_name
+        self.experiment = experiment
+        self.tracking_uri = resolve_tracking_uri(tracking_uri)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.run_id = None
+
+        self._client = None
+        self._run_ready = threading.Event()
+        self._cond = threading.Condition()
+        self._metrics = []
+        self._params = {}
+        self._tags = dict(tags or {})
+        self._closing = False
+        self._closed = False
+
+        self.failures = []
+        self.stats = {'metrics': 0, 'params': 0, 'tags': 0, 'artifacts': 0, 'batches': 0, 'dropped': 0}
+
+        self._artifacts = ThreadPoolExecutor(max_workers=artifact_workers, thread_name_prefix='mlflow-artifact')
+        self._artifact_futures = []
+        self._worker = threading.Thread(target=self._run, name='mlflow-tracker', daemon=True)
+        self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(status='FAILED' if exc_type else 'FINISHED')
+        return False
+
+    # ---- caller side: only appends under a lock ----
+
+    def log_metric(self, key, value, step=0):
+        self.log_metrics({key: value}, step=step)
+
+    def log_metrics(self, metrics, step=0):
+        timestamp = int(time.time() * 1000)
+        entries = []
+        for key, value in metrics.items():
+            try:
+                entries.append((key, float(value), timestamp, step))
+            except (TypeError, ValueError) as e:
+                self._record_failure('log_metric', key, e)
+        self._enqueue(self._metrics.extend, entries)
+
+    def log_params(self, params):
+        self._enqueue(self._params.update, {k: str(v) for k, v in params.items()})
+
+    def set_tags(self, tags):
+        self._enqueue(self._tags.update, {k: str(v) for k, v in tags.items()})
+
+    def log_artifact(self, local_path, artifact_path=None):
+        """Upload a file (or directory) once the run exists, without waiting for it"""
+        self._submit_artifact(f"log_artifact {local_path}", self._upload_path, str(local_path), artifact_path)
+
+    def log_model(self, model, artifact_path='model', flavor='xgboost'):
+        """Save `model` with an MLflow flavor module (xgboost, sklearn, ...) and upload it in the background"""
+        self._submit_artifact(f"log_model {artifact_path}", self._upload_model, model, artifact_path, flavor)
+
+    def _enqueue(self, append, items):
+        if not items:
+            return
+        with self._cond:
+            if self._closing:
+                self.stats['dropped'] += len(items)
+                return
+            append(items)
+            if self._pending() >= self.flush_size:
+                self._cond.notify()
+
+    def _pending(self):
+        return len(self._metrics) + len(self._params) + len(self._tags)
+
+    def _record_failure(self, operation, key, error):
+        self.failures.append({'operation': operation, 'key': key, 'error': f"{type(error).__name__}: {error}"})
+
+    # ---- background side ----
+
+    def _start_run(self):
+        from mlflow.tracking import MlflowClient
+
+        # Resolved here so run names, tags and artifact stores all use this URI, not mlflow's global state
+        self._client = MlflowClient(tracking_uri=self.tracking_uri)
+        experiment_id = '0'
+        if self.experiment:
+            existing = self._client.get_experiment_by_name(self.experiment)
+            experiment_id = existing.experiment_id if existing else self._client.create_experiment(self.experiment)
+        run = self._client.create_run(experiment_id, run_name=self.run_name)
+        self.run_id = run.info.run_id
+
+    def _run(self):
+        try:
+            self._start_run()
+        except Exception as e:
+            self._record_failure('create_run', self.run_name, e)
+        finally:
+            self._run_ready.set()
+
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closing and self._pending() < self.flush_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                metrics, params, tags = self._metrics, self._params, self._tags
+                self._metrics, self._params, self._tags = [], {}, {}
+                closing = self._closing
+
+            if metrics or params or tags:
+                self._send(metrics, params, tags)
+            if closing:
+                return
+
+    def _send(self, metrics, params, tags):
+        count = len(metrics) + len(params) + len(tags)
+        if self.run_id is None:
+            self.stats['dropped'] += count
+            return
+
+        from mlflow.entities import Metric, Param, RunTag
+
+        params = list(params.items())
+        tags = list(tags.items())
+        while metrics or params or tags:
+            # Params and tags go first; metrics fill the rest of the 1000-entity budget
+            p_chunk, params = params[:MAX_BATCH_PARAMS], params[MAX_BATCH_PARAMS:]
+            t_chunk, tags = tags[:MAX_BATCH_TAGS], tags[MAX_BATCH_TAGS:]
+            m_room = MAX_BATCH_METRICS - len(p_chunk) - len(t_chunk)
+            m_chunk, metrics = metrics[:m_room], metrics[m_room:]
+            try:
+                self._client.log_batch(
+                    self.run_id,
+                    metrics=[Metric(k, v, ts, step) for k, v, ts, step in m_chunk],
+                    params=[Param(k, v) for k, v in p_chunk],
+                    tags=[RunTag(k, v) for k, v in t_chunk],
+                )
+            except Exception as e:
+                self._record_failure('log_batch', f"{len(m_chunk)} metrics/{len(p_chunk)} params/{len(t_chunk)} tags", e)
+                continue
+            self.stats['batches'] += 1
+            self.stats['metrics'] += len(m_chunk)
+            self.stats['params'] += len(p_chunk)
+            self.stats['tags'] += len(t_chunk)
+
+    def _submit_artifact(self, description, func, *args):
+        if self._closing:
+            self._record_failure('artifact', description, RuntimeError('tracker already closed'))
+            return
+
+        def task():
+            self._run_ready.wait()
+            if self.run_id is None:
+                raise RuntimeError('no MLflow run')
+            func(*args)
+
+        future = self._artifacts.submit(task)
+        self._artifact_futures.append((description, future))
+
+    def _upload_path(self, local_path, artifact_path):
+        if os.path.isdir(local_path):
+            self._client.log_artifacts(self.run_id, local_path, artifact_path)
+        else:
+            self._client.log_artifact(self.run_id, local_path, artifact_path)
+        self.stats['artifacts'] += 1
+
+    def _upload_model(self, model, artifact_path, flavor):
+        import importlib
+
+        flavor_module = importlib.import_module(f"mlflow.{flavor}")
+        with tempfile.TemporaryDirectory() as tmp:
+            local = os.path.join(tmp, 'model')
+            flavor_module.save_model(model, local)
+            self._client.log_artifacts(self.run_id, local, artifact_path)
+        self.stats['artifacts'] += 1
+
+    # ---- shutdown ----
+
+    def close(self, status='FINISHED', timeout=120):
+        """
+        Flush everything, wait for uploads and end the run
+
+        Returns:
+            dict: summary()
+        """
+        if self._closed:
+            return self.summary()
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._worker.join(timeout)
+
+        for description, future in self._artifact_futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                self._record_failure('artifact', description, e)
+        self._artifacts.shutdown(wait=False)
+
+        if self.run_id is not None:
+            try:
+                self._client.set_terminated(self.run_id, status=status)
+            except Exception as e:
+                self._record_failure('set_terminated', self.run_id, e)
+        self._closed = True
+
+        summary = self.summary()
+        if self.failures:
+            logger.warning(f"  ⚠️ MLflow logging: {len(self.failures)} failure(s) for run {self.run_id}")
+            for failure in self.failures[:5]:
+                logger.warning(f"    - {failure['operation']} ({failure['key']}): {failure['error']}")
+        else:
+            logger.info(
+                f"  ✓ MLflow run {self.run_id}: {self.stats['metrics']} metrics, {self.stats['params']} params, "
+                f"{self.stats['artifacts']} artifacts in {self.stats['batches']} batch(es)"
+            )
+        return summary
+
+    def summary(self):
+        return {
+            'run_id': self.run_id,
+            'tracking_uri': self.tracking_uri,
+            **self.stats,
+            'failures': list(self.failures),
+        }
@@ -2,74 +2,150 @@
 """
 MASTER TRAINER: Models/train_model_optimized.py
 Orchestrates all 4 optimization layers in sequence
-Run this after features are computed
+Run this after features are computed: python argo.py train  (or python -m models.train_model_optimized)
+xgboost is imported inside run() and mlflow on the tracker's background thread, so importing this module stays cheap
 """
 
 import pandas as pd
 import numpy as np
-import xgboost as xgb
-import mlflow
 import logging
 import sys
 from pathlib import Path
 
-from regime_detector import MarketRegimeDetector
-from data_preparation import prepare_data_walk_forward, evaluate_with_overfitting_check
-from backtest_with_slippage import compare_slippage_impact
-from feature_analyzer import analyze_feature_importance
+from models.regime_detector import MarketRegimeDetector
+from datapipeline.panel import per_symbol_pct_change
+from models.data_preparation import prepare_data_walk_forward, evaluate_with_overfitting_check, sort_for_walk_forward
+from models.backtest_with_slippage import compare_slippage_impact
+from models.feature_analyzer import analyze_feature_importance
+from models.registry import REGISTRY_ROOT, ModelRegistry, fingerprint_frame
+from models.tracking import RunTracker
+from monitoring.drift import EXTRAS_KEY, HistogramSketch
+from monitoring.stage_profiler import StageProfiler
 
-logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+FEATURES_CSV = 'datapipeline/features/features_output.csv'
+FEATURE_COLS = [
+    'rsi', 'macd', 'atr', 'sma_20', 'sma_50',
+    'bb_upper', 'bb_lower', 'obv', 'ad_line', 'cci'
+]
+MODEL_PATH = 'models/artifacts/model_optimized.ubj'
+SCALER_PATH = 'datapipeline/features/scaler.json'
+TRACE_PATH = 'models/artifacts/training_trace.json'
+BASELINE_PATH = 'models/artifacts/training_baseline.json'
+
+XGB_PARAMS = {
+    'max_depth': 5,
+    'n_estimators': 200,
+    'learning_rate': 0.05,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'random_state': 42,
+    'eval_metric': 'logloss',
+}
+EARLY_STOPPING_ROUNDS = 20
+
 class OptimizedModelTrainer:
     """Complete training pipeline with all 4 optimization layers"""
 
-    def __init__(self, features_csv, feature_cols, target_col='target'):
+    def __init__(self, features_csv, feature_cols, target_col='target', xgb_params=None, model_path=MODEL_PATH,
+                 profile_dir=None, trace_path=TRACE_PATH, baseline_path=BASELINE_PATH, tracking=True,
+                 tracking_uri=None, scaler_path=SCALER_PATH, registry_root=REGISTRY_ROOT):
         self.features_csv = features_csv
         self.feature_cols = feature_cols
         self.target_col = target_col
+        self.xgb_params = {**XGB_PARAMS, **(xgb_params or {})}
+        self.model_path = model_path
+        self.trace_path = trace_path
+        self.baseline_path = baseline_path
+        self.profiler = StageProfiler('training', profile_dir=profile_dir)
+        self.tracking = tracking
+        self.tracking_uri = tracking_uri
+        self.tracker = None
+        self.scaler_path = scaler_path
+        self.registry = ModelRegistry(registry_root) if registry_root else None
         self.model = None
         self.validation_results = {}
 
     def run(self):
-        """Execute complete training pipeline"""
+        """Execute complete training pipeline, recording a per-stage timing trace and an MLflow run"""
+        if self.tracking:
+            self.tracker = RunTracker(run_name='xgb_optimized_v1', tracking_uri=self.tracking_uri)
+            self.tracker.log_params({**self.xgb_params, 'early_stopping_rounds': EARLY_STOPPING_ROUNDS,
+                                     'feature_cols': ','.join(self.feature_cols), 'target_col': self.target_col,
+                                     'features_csv': self.features_csv})
+
+        success = None
+        try:
+            success = self._run_layers()
+            return success
+        finally:
+            if self.trace_path:
+                self.profiler.write_trace(self.trace_path)
+                logger.info(f"\n  ✓ Stage trace written to {self.trace_path}")
+            if self.baseline_path:
+                self.validation_results['profile_regressions'] = self.profiler.compare_to_baseline(self.baseline_path)
+            if self.tracker is not None:
+                self.tracker.log_metrics(self.profiler.metrics())
+                self.tracker.set_tags({'validation': {True: 'passed', False: 'failed'}.get(success, 'error')})
+                self.validation_results['tracking'] = self.tracker.close(
+                    status='FAILED' if success is None else 'FINISHED'
+                )
+
+    def _load_scaler(self):
+        """Scaler stats written by run_features (None if features were not standardized by it)"""
+        from run_features import load_scaler
+
+        scaler = load_scaler(self.scaler_path) if self.scaler_path else None
+        if scaler and scaler.get('columns') != list(self.feature_cols):
+            logger.warning(f"⚠️ Scaler at {self.scaler_path} covers {scaler.get('columns')}, not the model features")
+            return None
+        return scaler
+
+    def _log_metrics(self, metrics):
+        if self.tracker is not None:
+            self.tracker.log_metrics(metrics)
+
+    def _run_layers(self):
+        import xgboost as xgb
+
+        stage = self.profiler.stage
 
         logger.info("=" * 80)
         logger.info("ARGO MODEL TRAINING: ALL 4 OPTIMIZATION LAYERS")
         logger.info("=" * 80)
 
         logger.info("\n[STEP 1/6] Loading features...")
-        df = pd.read_csv(self.features_csv)
+        with stage('load_features') as s:
+            # Same row order as the walk-forward split, so df.iloc[-len(X_test):] are the test rows
+            df = sort_for_walk_forward(pd.read_csv(self.features_csv))
+            s['rows'] = len(df)
         logger.info(f"  ✓ Loaded {len(df)} rows, {len(df.columns)} columns")
 
         logger.info("\n[STEP 2/6] LAYER 2: Walk-forward validation (70/15/15 split)...")
-        X_train, X_val, X_test, y_train, y_val, y_test, dates_test = prepare_data_walk_forward(
-            df, feature_cols=self.feature_cols, target_col=self.target_col
-        )
+        with stage('walk_forward_split', rows=len(df)):
+            X_train, X_val, X_test, y_train, y_val, y_test, dates_test = prepare_data_walk_forward(
+                df, feature_cols=self.feature_cols, target_col=self.target_col
+            )
 
         logger.info("\n[STEP 3/6] Training XGBoost...")
-        self.model = xgb.XGBClassifier(
-            max_depth=5,
-            n_estimators=200,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            eval_metric='logloss'
-        )
-        self.model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            early_stopping_rounds=20,
-            verbose=False
-        )
+        with stage('xgboost_fit', rows=len(X_train)):
+            self.model = xgb.XGBClassifier(**self.xgb_params)
+            self.model.fit(
+                X_train, y_train,
+                eval_set=[(X_val, y_val)],
+                early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                verbose=False
+            )
         logger.info(f"  ✓ Model trained")
 
         logger.info("\n[STEP 4/6] LAYER 2: Checking for overfitting...")
-        perf_metrics = evaluate_with_overfitting_check(
-            self.model, X_train, X_val, X_test, y_train, y_val, y_test
-        )
+        with stage('overfitting_check', rows=len(X_train) + len(X_val) + len(X_test)):
+            perf_metrics = evaluate_with_overfitting_check(
+                self.model, X_train, X_val, X_test, y_train, y_val, y_test
+            )
         self.validation_results['performance'] = perf_metrics
+        self._log_metrics(perf_metrics)
 
         if perf_metrics['is_overfitting']:
             logger.error("❌ OVERFITTING DETECTED - Model failed Layer 2")
@@ -78,9 +154,11 @@ class OptimizedModelTrainer:
         logger.info("✓ Layer 2 PASSED")
 
         logger.info("\n[STEP 5/6] LAYER 1: Market regime analysis...")
-        detector = MarketRegimeDetector()
-        regime_results = detector.backtest_by_regime(df, self.model, self.feature_cols, self.target_col)
+        with stage('regime_analysis', rows=len(df)):
+            detector = MarketRegimeDetector()
+            regime_results = detector.backtest_by_regime(df, self.model, self.feature_cols, self.target_col)
         self.validation_results['regimes'] = regime_results
+        self._log_metrics({f"{k}_sharpe": v['sharpe'] for k, v in regime_results.items()})
 
         weak_regimes = [r for r, m in regime_results.items() if m['sharpe'] < 0.5]
         if weak_regimes:
@@ -89,12 +167,17 @@ class OptimizedModelTrainer:
             logger.info("✓ Layer 1 PASSED: All regimes OK")
 
         logger.info("\n[STEP 6/6] LAYER 3: Execution slippage simulation...")
-        test_preds = self.model.predict(X_test)
-        close_prices = df.iloc[-len(X_test):]['close'].values
-        test_returns = df['close'].pct_change().values[-len(X_test):]
+        with stage('slippage_backtest', rows=len(X_test)):
+            test_preds = self.model.predict(X_test)
+            close_prices = df.iloc[-len(X_test):]['close'].values
+            test_returns = per_symbol_pct_change(df, 'close')[-len(X_test):]
 
-        slippage_analysis = compare_slippage_impact(test_preds, close_prices, test_returns)
+            slippage_analysis = compare_slippage_impact(test_preds, close_prices, test_returns)
         self.validation_results['slippage'] = slippage_analysis
+        self._log_metrics({
+            'backtest_sharpe': slippage_analysis['no_slippage_sharpe'],
+            'reality_sharpe': slippage_analysis['with_slippage_sharpe'],
+        })
 
         if not slippage_analysis['gap_acceptable']:
             logger.error("❌ SLIPPAGE GAP TOO LARGE - Model failed Layer 3")
@@ -103,27 +186,35 @@ class OptimizedModelTrainer:
         logger.info("✓ Layer 3 PASSED")
 
         logger.info("\n[LAYER 4] Feature importance analysis...")
-        importance_analysis = analyze_feature_importance(self.model, self.feature_cols)
+        with stage('feature_importance'):
+            importance_analysis = analyze_feature_importance(self.model, self.feature_cols)
         self.validation_results['feature_importance'] = importance_analysis
         logger.info("✓ Layer 4 PASSED")
 
-        logger.info("\n[LOGGING] Saving metrics to MLflow...")
-        try:
-            with mlflow.start_run(run_name='xgb_optimized_v1'):
-                mlflow.log_metrics(perf_metrics)
-                for k, v in regime_results.items():
-                    mlflow.log_metric(f"{k}_sharpe", v['sharpe'])
-                mlflow.log_metric("backtest_sharpe", slippage_analysis['no_slippage_sharpe'])
-                mlflow.log_metric("reality_sharpe", slippage_analysis['with_slippage_sharpe'])
-                mlflow.sklearn.log_model(self.model, "model")
-            logger.info("  ✓ Metrics logged")
-        except:
-            logger.warning("  ⚠️ MLflow logging failed (continue anyway)")
-
         logger.info("\nSaving model...")
-        Path('models/artifacts').mkdir(parents=True, exist_ok=True)
-        self.model.save_model('models/artifacts/model_optimized.pkl')
-        logger.info("  ✓ Model saved to models/artifacts/model_optimized.pkl")
+        with stage('save_model'):
+            Path(self.model_path).parent.mkdir(parents=True, exist_ok=True)
+            self.model.save_model(self.model_path)
+        logger.info(f"  ✓ Model saved to {self.model_path}")
+
+        if self.registry is not None:
+            with stage('register_model', rows=len(df)):
+                version = self.registry.register(
+                    self.model,
+                    self.feature_cols,
+                    scaler=self._load_scaler(),
+                    data_fingerprint=fingerprint_frame(df, self.feature_cols + [self.target_col]),
+                    metrics={k: v for k, v in perf_metrics.items() if k != 'is_overfitting'},
+                    params=self.xgb_params,
+                    # Serving compares live feature histograms against this (monitoring/drift.py)
+                    extras={EXTRAS_KEY: HistogramSketch.from_data(X_train, self.feature_cols).to_dict()},
+                )
+            self.validation_results['registry_version'] = version
+            if self.tracker is not None:
+                self.tracker.set_tags({'registry_version': version})
+        if self.tracker is not None:
+            # Uploaded in the background; run() waits for it when closing the tracker
+            self.tracker.log_model(self.model, 'model', flavor='xgboost')
 
         logger.info("\n" + "=" * 80)
         logger.info("✓✓✓ ALL LAYERS PASSED - MODEL READY FOR PAPER TRADING ✓✓✓")
@@ -133,16 +224,11 @@ class OptimizedModelTrainer:
 
 
 if __name__ == "__main__":
-
-    features_csv = 'datapipeline/features/features_output.csv'
-    feature_cols = [
-        'rsi', 'macd', 'atr', 'sma_20', 'sma_50',
-        'bb_upper', 'bb_lower', 'obv', 'ad_line', 'cci'
-    ]
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
 
     trainer = OptimizedModelTrainer(
-        features_csv=features_csv,
-        feature_cols=feature_cols,
+        features_csv=FEATURES_CSV,
+        feature_cols=FEATURE_COLS,
         target_col='target'
     )
 
@@ -1,8 +1,208 @@
+"""
+Alert System: Non-blocking alert dispatch
+Callers enqueue and return immediately; a background worker deduplicates
+per key, coalesces repeats inside a window, rate-limits each sink with a
+token bucket and delivers to pluggable sinks (log, file, webhook)
+"""
+
+import json
 import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
 logger = logging.getLogger(__name__)
 
+SEVERITY_LEVELS = {'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR, 'critical': logging.CRITICAL}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/sec refill up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LogSink:
+    """Emit alerts through the standard logger"""
+
+    name = 'log'
+
+    def send(self, alert):
+        logger.log(SEVERITY_LEVELS.get(alert['severity'], logging.ERROR), alert['message'])
+
+
+class FileSink:
+    """Append alerts as JSON lines; also the local stand-in for external services"""
+
+    name = 'file'
+
+    def __init__(self, path='monitoring/alerts.jsonl'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def send(self, alert):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(alert) + '\n')
+
+
+class WebhookSink:
+    """POST alerts as JSON (Slack-compatible `text` field included)"""
+
+    name = 'webhook'
+
+    def __init__(self, url, timeout=5):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, alert):
+        response = self.session.post(self.url, json={'text': alert['message'], **alert}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class AlertDispatcher:
+    """
+    Background alert worker
+
+    The first alert for a key is delivered immediately. Repeats within
+    dedup_window seconds are coalesced and delivered once the window closes,
+    as the latest message plus a count of suppressed repeats.
+    """
+
+    def __init__(self, sinks=None, dedup_window=60, rate_limits=None, queue_size=1000):
+        """
+        Args:
+            sinks: Sink objects with a `name` and a `send(alert)` method (defaults to LogSink)
+            dedup_window: Seconds during which repeats of the same key are coalesced
+            rate_limits: {sink name: (tokens per sec, burst capacity)}; unlisted sinks are unlimited
+            queue_size: Pending alerts held before submit starts dropping
+        """
+        self.sinks = sinks if sinks is not None else [LogSink()]
+        self.dedup_window = dedup_window
+        self.buckets = {name: TokenBucket(*limit) for name, limit in (rate_limits or {}).items()}
+        self.stats = {'submitted': 0, 'dropped': 0, 'coalesced': 0, 'delivered': 0, 'rate_limited': 0, 'failed': 0}
+        # submit() runs on caller threads and the rest on the worker, so counters share a lock
+        self._stats_lock = threading.Lock()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._last_sent = {}
+        self._pending = {}
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='AlertDispatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, key, message, severity='error'):
+        """
+        Enqueue an alert without blocking
+
+        Returns:
+            bool: False if the queue was full and the alert was dropped
+        """
+        try:
+            self._queue.put_nowait((key, message, severity, time.time()))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('submitted')
+        return True
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _run(self):
+        now = time.monotonic()
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+
+            now = time.monotonic()
+            if item is not None:
+                self._handle(now, *item)
+            self._flush_expired(now)
+
+        # Shutting down: deliver whatever is still being coalesced
+        self._flush_expired(now, force=True)
+
+    def _handle(self, now, key, message, severity, submitted_at):
+        alert = {
+            'key': key,
+            'severity': severity,
+            'message': message,
+            'timestamp': datetime.fromtimestamp(submitted_at).isoformat(),
+            'repeats': 0,
+        }
+        last = self._last_sent.get(key)
+        if last is not None and now - last < self.dedup_window:
+            pending = self._pending.get(key)
+            alert['repeats'] = pending['repeats'] + 1 if pending else 1
+            self._pending[key] = alert
+            self._count('coalesced')
+            return
+
+        self._last_sent[key] = now
+        self._deliver(alert)
+
+    def _flush_expired(self, now, force=False):
+        for key in [k for k in self._pending if force or now - self._last_sent[k] >= self.dedup_window]:
+            alert = self._pending.pop(key)
+            alert['message'] += f" (+{alert['repeats']} repeats in {self.dedup_window}s)"
+            self._last_sent[key] = now
+            self._deliver(alert)
+
+    def _deliver(self, alert):
+        for sink in self.sinks:
+            bucket = self.buckets.get(sink.name)
+            if bucket is not None and not bucket.try_acquire():
+                self._count('rate_limited')
+                continue
+            try:
+                sink.send(alert)
+                self._count('delivered')
+            except Exception as e:
+                self._count('failed')
+                logger.warning(f"⚠️ Alert sink {sink.name} failed for {alert['key']}: {e}")
+
+    def close(self, timeout=5):
+        """Drain queued and coalesced alerts, then stop the worker"""
+        self._stop.set()
+        self._worker.join(timeout)
+
+
 class AlertSystem:
+    """Trading alerts routed through an AlertDispatcher"""
+
+    def __init__(self, dispatcher=None):
+        self.dispatcher = dispatcher or AlertDispatcher()
+
     def alert_circuit_breaker(self, daily_loss):
         msg = f"🚨 CIRCUIT BREAKER: Daily loss ${daily_loss}"
-        logger.error(msg)
+        self.dispatcher.submit('circuit_breaker', msg, severity='critical')
         return msg
+
+    def alert_feature_drift(self, feature, psi, model_version=None):
+        msg = f"⚠️ FEATURE DRIFT: {feature} PSI {psi:.3f} vs training (model {model_version})"
+        self.dispatcher.submit(f'drift:{feature}', msg, severity='warning')
+        return msg
+
+    def close(self):
+        self.dispatcher.close()
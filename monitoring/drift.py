@@ -0,0 +1,274 @@
+"""
+Drift Monitor: live feature distributions against the training reference
+Each feature is summarized by a fixed-bin histogram whose edges are the
+training data's quantiles (plus under/overflow bins). The reference sketch is
+stored with the model in the registry; the live sketch is updated per bar in
+O(features) memory and merges by adding counts, so sketches from several
+worker processes combine exactly. The live window restarts each trading
+session. PSI and a binned KS statistic per feature come from the counts alone
+and are published as MetricsTracker gauges
+Run: python -m monitoring.drift [--model production] monitoring/drift/*.json
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BINS = 20
+EXTRAS_KEY = 'drift_reference'
+# Smoothing for empty bins, as a share of the sample; keeps PSI finite
+PSI_EPSILON = 1e-4
+PSI_ALERT = 0.25      # conventional "significant shift" level
+MIN_LIVE_ROWS = 500   # below this the live histogram is too sparse to score
+
+
+class HistogramSketch:
+    """
+    Fixed-bin histograms of several features
+
+    Attributes:
+        feature_cols: Feature names (F)
+        edges: float64 array (F, bins + 1)
+        counts: int64 array (F, bins + 2); column 0 is underflow, the last is overflow
+    """
+
+    def __init__(self, feature_cols, edges, counts=None):
+        self.feature_cols = list(feature_cols)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        n_features, n_edges = self.edges.shape
+        self.counts = (np.zeros((n_features, n_edges + 1), dtype=np.int64) if counts is None
+                       else np.asarray(counts, dtype=np.int64).reshape(n_features, n_edges + 1))
+
+    @classmethod
+    def from_data(cls, X, feature_cols, bins=BINS):
+        """Reference sketch: quantile edges of X (rows x features) and X's counts"""
+        X = np.asarray(X, dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            edges = np.nanquantile(X, np.linspace(0, 1, bins + 1), axis=0).T
+        sketch = cls(feature_cols, np.nan_to_num(edges))
+        sketch.update(X)
+        return sketch
+
+    def empty_like(self):
+        return HistogramSketch(self.feature_cols, self.edges)
+
+    @property
+    def rows(self):
+        """Observations per feature"""
+        return self.counts.sum(axis=1)
+
+    def update(self, X):
+        """Add rows (array or DataFrame with feature_cols); NaNs are skipped"""
+        if hasattr(X, 'loc'):
+            X = X[self.feature_cols].to_numpy(dtype=np.float64)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        n_features, n_bins = self.counts.shape
+        # Bin index per value, then one bincount over (feature, bin) for the whole batch
+        idx = np.empty(X.shape, dtype=np.int64)
+        for f in range(n_features):
+            idx[:, f] = np.searchsorted(self.edges[f], X[:, f], side='right')
+        flat = (np.arange(n_features) * n_bins + idx)[~np.isnan(X)]
+        self.counts += np.bincount(flat, minlength=n_features * n_bins).reshape(n_features, n_bins)
+        return self
+
+    def merge(self, other):
+        """Add another sketch's counts (same features and edges) into this one"""
+        if other.feature_cols != self.feature_cols or not np.array_equal(other.edges, self.edges):
+            raise ValueError("Sketches have different features or bin edges")
+        self.counts += other.counts
+        return self
+
+    def __add__(self, other):
+        return HistogramSketch(self.feature_cols, self.edges, self.counts.copy()).merge(other)
+
+    def to_dict(self):
+        return {'feature_cols': self.feature_cols, 'edges': self.edges.tolist(), 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['feature_cols'], data['edges'], data.get('counts'))
+
+
+def psi(reference, live, epsilon=PSI_EPSILON):
+    """Population stability index per feature from two (F, B) count arrays"""
+    p = reference / np.maximum(reference.sum(axis=1, keepdims=True), 1)
+    q = live / np.maximum(live.sum(axis=1, keepdims=True), 1)
+    p = np.maximum(p, epsilon)
+    q = np.maximum(q, epsilon)
+    return ((q - p) * np.log(q / p)).sum(axis=1)
+
+
+def ks(reference, live):
+    """Largest gap between the two binned CDFs per feature (KS at bin resolution)"""
+    p = np.cumsum(reference, axis=1) / np.maximum(reference.sum(axis=1, keepdims=True), 1)
+    q = np.cumsum(live, axis=1) / np.maximum(live.sum(axis=1, keepdims=True), 1)
+    return np.abs(p - q).max(axis=1)
+
+
+class DriftMonitor:
+    """
+    Live sketch for one model version, scored against its reference
+
+    Usage:
+        monitor = DriftMonitor.from_model(loaded_model, metrics=tracker)
+        monitor.update(features, session=trading_day)   # every bar; a new session starts a new window
+        monitor.publish()            # drift_psi_max, drift_ks_max and drift_psi{feature="..."}
+    """
+
+    def __init__(self, reference, version=None, metrics=None, alerts=None, path=None, psi_alert=PSI_ALERT,
+                 min_rows=MIN_LIVE_ROWS):
+        """
+        Args:
+            reference: HistogramSketch of the training features
+            version: Model version the reference belongs to
+            metrics: monitoring.metrics_tracker.MetricsTracker to publish gauges to
+            alerts: monitoring.alerts.AlertSystem, alerted when a feature's PSI exceeds psi_alert
+            path: Where checkpoint() writes the live sketch, for merging across processes
+            psi_alert: PSI alert threshold
+            min_rows: Live rows needed before scores are published
+        """
+        self.reference = reference
+        self.version = version
+        self.live = reference.empty_like()
+        self.metrics = metrics
+        self.alerts = alerts
+        self.path = Path(path) if path else None
+        self.psi_alert = psi_alert
+        self.min_rows = min_rows
+        self.session = None
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        """Monitor for a registry LoadedModel (None if it was registered without a reference)"""
+        data = (model.metadata.get('extras') or {}).get(EXTRAS_KEY)
+        if not data:
+            return None
+        return cls(HistogramSketch.from_dict(data), version=model.version, **kwargs)
+
+    def update(self, X, session=None):
+        """
+        Add live feature rows
+
+        Args:
+            X: Rows in the reference's feature order
+            session: Trading session of the rows (e.g. its date); a new one resets the live window first
+        """
+        with self._lock:
+            if session is not None and session != self.session:
+                if self.session is not None:
+                    self.live = self.reference.empty_like()
+                self.session = session
+            self.live.update(X)
+        return self
+
+    def merge(self, other):
+        """Fold in another process's live sketch (HistogramSketch, dict or checkpoint path)"""
+        if isinstance(other, (str, Path)):
+            other = json.loads(Path(other).read_text())
+        if isinstance(other, dict):
+            other = HistogramSketch.from_dict(other)
+        with self._lock:
+            self.live.merge(other)
+        return self
+
+    def reset(self):
+        """Start a new live window (e.g. each session)"""
+        with self._lock:
+            self.live = self.reference.empty_like()
+
+    def scores(self):
+        """
+        Returns:
+            dict: rows (live observations) and features ({feature: {'psi': float, 'ks': float}})
+        """
+        with self._lock:
+            live = self.live.counts.copy()
+        psi_values = psi(self.reference.counts, live)
+        ks_values = ks(self.reference.counts, live)
+        return {
+            'rows': int(live.sum(axis=1).max(initial=0)),
+            'features': {name: {'psi': float(p), 'ks': float(k)}
+                         for name, p, k in zip(self.live.feature_cols, psi_values, ks_values)},
+        }
+
+    def publish(self):
+        """Set drift gauges on the MetricsTracker (and alert on large PSI); returns scores()"""
+        scores = self.scores()
+        if scores['rows'] < self.min_rows:
+            return scores
+        features = scores['features']
+        worst = max(features, key=lambda name: features[name]['psi'])
+        if self.metrics is not None:
+            self.metrics.set_gauge('drift_psi_max', features[worst]['psi'])
+            self.metrics.set_gauge('drift_ks_max', max(s['ks'] for s in features.values()))
+            for name, s in features.items():
+                self.metrics.set_gauge('drift_psi', s['psi'], labels={'feature': name})
+        if self.alerts is not None and features[worst]['psi'] > self.psi_alert:
+            self.alerts.alert_feature_drift(worst, features[worst]['psi'], self.version)
+        return scores
+
+    def checkpoint(self):
+        """Write the live sketch atomically to self.path (concurrent calls are serialized)"""
+        if self.path is None:
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        # Held from the read through the replace, so calls never share the .tmp file
+        # and an older sketch can never overwrite a newer one
+        with self._checkpoint_lock:
+            with self._lock:
+                session = str(self.session) if self.session is not None else None
+                data = {'version': self.version, 'session': session, **self.live.to_dict()}
+            tmp_path.write_text(json.dumps(data))
+            os.replace(tmp_path, self.path)
+        return self.path
+
+
+def main(argv=None):
+    """Merge live sketch checkpoints from worker processes and print drift per feature"""
+    import argparse
+
+    from models.registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sketches', nargs='+', help='live sketch checkpoints (DriftMonitor.checkpoint)')
+    parser.add_argument('--model', default='production', help='registry pin, version or "latest"')
+    parser.add_argument('--root', default='models/registry')
+    args = parser.parse_args(argv)
+
+    model = ModelRegistry(args.root).load(args.model)
+    monitor = DriftMonitor.from_model(model)
+    if monitor is None:
+        print(f"❌ Model {model.version} has no drift reference (retrain to store one)")
+        return 1
+    checkpoints = {path: json.loads(Path(path).read_text()) for path in args.sketches}
+    # Each process restarts its window per session; only windows of the latest one add up
+    session = max((c['session'] for c in checkpoints.values() if c.get('session')), default=None)
+    for path, checkpoint in checkpoints.items():
+        if checkpoint.get('version') not in (None, model.version):
+            print(f"⚠️ Skipping {path}: sketch of model {checkpoint['version']}, not {model.version}")
+            continue
+        if checkpoint.get('session') not in (None, session):
+            print(f"⚠️ Skipping {path}: sketch of session {checkpoint['session']}, not {session}")
+            continue
+        monitor.merge(checkpoint)
+
+    scores = monitor.scores()
+    print(f"=== Feature drift: model {model.version}, {scores['rows']:,} live rows"
+          f"{f' (session {session})' if session else ''} ===")
+    for name, s in sorted(scores['features'].items(), key=lambda item: -item[1]['psi']):
+        marker = '🚨' if s['psi'] > PSI_ALERT else '⚠️' if s['psi'] > 0.1 else '✓'
+        print(f"  {marker} {name:12s} PSI={s['psi']:.4f}  KS={s['ks']:.4f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,19 +1,308 @@
+"""
+Metrics Tracker: Streaming trading metrics
+Every fill updates O(1) accumulators (Welford mean/variance, over the day and
+over a rolling window, plus the running equity peak), so snapshots never
+rescan the trade list
+"""
+
 import json
+import math
+import threading
+from collections import deque
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _prometheus_value(value):
+    """Float in the exposition format, which spells the special values +Inf, -Inf and NaN"""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def _prometheus_label(value):
+    """Label value with backslashes, quotes and newlines escaped"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RollingWindow:
+    """Fixed-size window of values with O(1) mean/std via a windowed Welford update (add and remove)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, x):
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (x - self._mean)
+        if n > self.size:
+            # Inverse Welford step; works on deviations from the mean, so large equal values do not cancel
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self._mean
+            self._mean -= delta / n
+            self._m2 -= delta * (old - self._mean)
+
+    def __len__(self):
+        return len(self.values)
+
+    def mean(self):
+        return self._mean if self.values else 0.0
+
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        var = self._m2 / (n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class LatencyStats:
+    """Bounded sample of latencies in milliseconds with percentile summaries"""
+
+    def __init__(self, maxlen=100_000):
+        self.samples = deque(maxlen=maxlen)
+
+    def add(self, ms):
+        self.samples.append(ms)
+
+    def summary(self):
+        if not self.samples:
+            return {'count': 0}
+        import numpy as np
+
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        return {
+            'count': len(values),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p90_ms': float(np.percentile(values, 90)),
+            'p99_ms': float(np.percentile(values, 99)),
+            'max_ms': float(values.max()),
+        }
+
 
 class MetricsTracker:
-    def __init__(self):
+    """
+    Incremental metrics engine
+
+    Call record_fill once per fill. Only fills that realize PnL (closing
+    fills) count as trades in the win rate, Sharpe and equity; opening fills
+    only move positions and exposure. snapshot() returns the current view;
+    to_prometheus() renders it in the Prometheus text format.
+    """
+
+    def __init__(self, rolling_window=50):
+        """
+        Args:
+            rolling_window: Number of most recent trades used for the rolling Sharpe
+        """
+        self._lock = threading.Lock()
+        self._rolling_window = rolling_window
+        self.daily_stats = {}
+        self._gauges = {}
+        self._reset(datetime.now().date())
+
+    def _reset(self, day):
         self.daily_stats = {
-            'date': datetime.now().date().isoformat(),
+            'date': day.isoformat(),
+            'fills': 0,
             'trades': 0,
             'wins': 0,
             'losses': 0,
             'total_pnl': 0,
         }
+        self._seen_trades = 0
+        self._pnl_mean = 0.0
+        self._pnl_m2 = 0.0
+        self._rolling = RollingWindow(self._rolling_window)
+        self._equity = 0.0
+        self._equity_peak = 0.0
+        self._max_drawdown = 0.0
+        self._positions = {}
+        self._exposure = {}
+
+    def reset(self, day=None):
+        """Start a fresh day of metrics"""
+        with self._lock:
+            self._reset(day or datetime.now().date())
+
+    def record_fill(self, symbol, pnl=None, quantity=0, price=0.0, action=None):
+        """
+        Update every metric with one fill in O(1)
+
+        Args:
+            symbol: Ticker symbol
+            pnl: Realized PnL of the fill; None for opening fills, which leave the PnL statistics alone
+            quantity: Filled quantity
+            price: Fill price
+            action: 'BUY' or 'SELL'; used for signed per-symbol exposure
+        """
+        with self._lock:
+            self._apply_fill(symbol, pnl, quantity, price, action)
+
+    def _apply_fill(self, symbol, pnl, quantity, price, action):
+        stats = self.daily_stats
+        stats['fills'] += 1
+
+        if action in ('BUY', 'SELL') and quantity:
+            signed = quantity if action == 'BUY' else -quantity
+            position = self._positions.get(symbol, 0) + signed
+            self._positions[symbol] = position
+            self._exposure[symbol] = position * price
+
+        if pnl is None:
+            return
+        pnl = float(pnl)
+        stats['trades'] += 1
+        if pnl > 0:
+            stats['wins'] += 1
+        elif pnl < 0:
+            stats['losses'] += 1
+        stats['total_pnl'] += pnl
+
+        # Welford update of per-trade PnL mean/variance
+        n = stats['trades']
+        delta = pnl - self._pnl_mean
+        self._pnl_mean += delta / n
+        self._pnl_m2 += delta * (pnl - self._pnl_mean)
+
+        self._rolling.push(pnl)
+
+        self._equity += pnl
+        if self._equity > self._equity_peak:
+            self._equity_peak = self._equity
+        self._max_drawdown = max(self._max_drawdown, self._equity_peak - self._equity)
 
     def record_metrics(self, trades, pnl):
-        self.daily_stats['trades'] = len(trades)
-        self.daily_stats['wins'] = len([t for t in trades if t.get('pnl', 0) > 0])
-        self.daily_stats['losses'] = len([t for t in trades if t.get('pnl', 0) < 0])
-        self.daily_stats['total_pnl'] = pnl
-        return self.daily_stats
+        """
+        Legacy entry point taking the full trade list
+
+        Only trades appended since the previous call are folded in, so calling
+        this with a growing list costs O(new trades), not O(all trades).
+        """
+        with self._lock:
+            if len(trades) < self._seen_trades:
+                # A shorter list means a new day or a different trade list
+                self._reset(datetime.now().date())
+            for t in trades[self._seen_trades:]:
+                self._apply_fill(t.get('symbol'), t.get('pnl'), t.get('quantity', 0), t.get('price', 0.0),
+                                 t.get('action'))
+            self._seen_trades = len(trades)
+            self.daily_stats['total_pnl'] = pnl
+            return dict(self.daily_stats)
+
+    def set_gauge(self, name, value, labels=None):
+        """
+        Publish an externally computed metric (e.g. a drift score) alongside the trading metrics
+
+        Args:
+            name: Metric name; one family per name, however many label sets it has
+            value: Current value
+            labels: Optional {label: value} identifying the series, e.g. {'feature': 'rsi'}
+        """
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def snapshot(self):
+        """Consistent point-in-time view of all metrics"""
+        with self._lock:
+            stats = dict(self.daily_stats)
+            n = stats['trades']
+            std = math.sqrt(self._pnl_m2 / (n - 1)) if n > 1 else 0.0
+            rolling_std = self._rolling.std()
+
+            stats.update({
+                'win_rate': stats['wins'] / n if n else 0.0,
+                'mean_pnl': self._pnl_mean,
+                'std_pnl': std,
+                'sharpe': (self._pnl_mean / std) * math.sqrt(252) if std > 0 else 0.0,
+                'rolling_sharpe': (self._rolling.mean() / rolling_std) * math.sqrt(252) if rolling_std > 0 else 0.0,
+                'equity': self._equity,
+                'max_drawdown': self._max_drawdown,
+                'positions': dict(self._positions),
+                'exposure': dict(self._exposure),
+                'gross_exposure': sum(abs(v) for v in self._exposure.values()),
+                'gauges': {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                           for name, series in self._gauges.items()},
+            })
+            return stats
+
+    def to_prometheus(self, prefix='argo'):
+        """Render the snapshot in the Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, value, kind='gauge', labels=None, help_text=None):
+            full = f"{prefix}_{name}"
+            if help_text:
+                lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} {kind}")
+            label_str = ('{' + ','.join(f'{k}="{_prometheus_label(v)}"' for k, v in labels.items()) + '}'
+                         if labels else '')
+            lines.append(f"{full}{label_str} {_prometheus_value(value)}")
+
+        metric('fills_total', snap['fills'], 'counter', help_text='Fills recorded today')
+        metric('trades_total', snap['trades'], 'counter', help_text='Closed trades (fills realizing PnL) today')
+        metric('wins_total', snap['wins'], 'counter', help_text='Winning trades today')
+        metric('losses_total', snap['losses'], 'counter', help_text='Losing trades today')
+        metric('pnl', snap['total_pnl'], help_text='Realized PnL today')
+        metric('win_rate', snap['win_rate'], help_text='Winning trades / total trades')
+        metric('sharpe', snap['sharpe'], help_text='Annualized per-trade Sharpe since the open')
+        metric('rolling_sharpe', snap['rolling_sharpe'], help_text='Annualized Sharpe over the rolling trade window')
+        metric('max_drawdown', snap['max_drawdown'], help_text='Largest peak-to-trough equity drop today')
+        metric('gross_exposure', snap['gross_exposure'], help_text='Sum of absolute per-symbol exposure')
+
+        for i, (symbol, value) in enumerate(sorted(snap['exposure'].items())):
+            metric('exposure', value, labels={'symbol': symbol},
+                   help_text='Signed notional exposure per symbol' if i == 0 else None)
+        for name, series in sorted(snap['gauges'].items()):
+            for i, s in enumerate(sorted(series, key=lambda s: sorted(s['labels'].items()))):
+                metric(name, s['value'], labels=s['labels'], help_text=f"Gauge {name}" if i == 0 else None)
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, host='127.0.0.1', port=9108):
+        """
+        Serve /metrics (Prometheus text) and /snapshot (JSON) from a daemon thread
+
+        Args:
+            host: Interface to bind; loopback by default, pass '0.0.0.0' to let a remote Prometheus scrape it
+            port: TCP port
+
+        Returns:
+            ThreadingHTTPServer: call shutdown() to stop it
+        """
+        tracker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = tracker.to_prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/snapshot':
+                    body = json.dumps(tracker.snapshot()).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='MetricsServer', daemon=True).start()
+        return server
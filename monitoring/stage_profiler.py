@@ -0,0 +1,168 @@
+"""
+Stage Profiler: Per-stage timing and resource instrumentation
+Records wall time, CPU time, peak RSS and rows processed for each pipeline
+stage, optionally dumps a cProfile file per stage, and compares a run
+against a stored baseline to flag regressions
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT / (1024 * 1024)
+
+
+class StageProfiler:
+    """
+    Collects one record per stage
+
+    Usage:
+        profiler = StageProfiler('training', profile_dir='profiles/')
+        with profiler.stage('load_features') as s:
+            df = pd.read_csv(path)
+            s['rows'] = len(df)
+    """
+
+    def __init__(self, name='pipeline', profile_dir=None):
+        """
+        Args:
+            name: Name of the run (recorded in the trace)
+            profile_dir: If set, write <stage>.prof (cProfile/pstats format) per stage here;
+                open with snakeviz, or `python -m pstats`
+        """
+        self.name = name
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.started_at = datetime.now().isoformat()
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time a block; the yielded dict can be updated with 'rows' or any extra fields"""
+        record = {'stage': name, 'rows': rows}
+        profiler = None
+        if self.profile_dir is not None:
+            profiler = cProfile.Profile()
+
+        rss_before = peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            record['peak_rss_mb'] = peak_rss_mb()
+            record['peak_rss_growth_mb'] = record['peak_rss_mb'] - rss_before
+            if record['rows'] and record['wall_s'] > 0:
+                record['rows_per_s'] = record['rows'] / record['wall_s']
+
+            if profiler is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                record['profile'] = str(self.profile_dir / f"{name}.prof")
+                profiler.dump_stats(record['profile'])
+
+            self.records.append(record)
+            rows_str = f", {record['rows']:,} rows" if record['rows'] else ''
+            logger.info(
+                f"  ⏱ {name}: {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s CPU, "
+                f"peak RSS {record['peak_rss_mb']:.0f}MB (+{record['peak_rss_growth_mb']:.0f}){rows_str}"
+            )
+
+    def profiled(self, name=None):
+        """Decorator form of stage()"""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def metrics(self, prefix='stage'):
+        """Flat {metric name: value} dict, e.g. for mlflow.log_metrics"""
+        out = {}
+        for r in self.records:
+            for field in ('wall_s', 'cpu_s', 'peak_rss_mb', 'rows', 'rows_per_s'):
+                if r.get(field) is not None:
+                    out[f"{prefix}_{r['stage']}_{field}"] = float(r[field])
+        return out
+
+    def trace(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'pid': os.getpid(),
+            'stages': self.records,
+        }
+
+    def write_trace(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f, indent=2)
+        return path
+
+    def compare_to_baseline(self, baseline_path, tolerance=0.25, min_seconds=0.05):
+        """
+        Flag stages that got slower (or hungrier) than the stored baseline
+
+        Args:
+            baseline_path: Trace JSON from an earlier write_trace()
+            tolerance: Allowed relative increase, 0.25 = 25%
+            min_seconds: Ignore stages faster than this in the baseline (too noisy)
+
+        Returns:
+            list: One dict per regression (empty if none, or if there is no baseline)
+        """
+        baseline_path = Path(baseline_path)
+        if not baseline_path.exists():
+            return []
+        with open(baseline_path) as f:
+            baseline = {r['stage']: r for r in json.load(f)['stages']}
+
+        regressions = []
+        for r in self.records:
+            base = baseline.get(r['stage'])
+            if base is None:
+                continue
+            for field, floor in (('wall_s', min_seconds), ('cpu_s', min_seconds), ('peak_rss_growth_mb', 50)):
+                old, new = base.get(field), r.get(field)
+                if old is None or new is None or old < floor:
+                    continue
+                if new > old * (1 + tolerance):
+                    regressions.append({
+                        'stage': r['stage'], 'metric': field, 'baseline': old, 'current': new,
+                        'change_pct': (new / old - 1) * 100,
+                    })
+
+        for reg in regressions:
+            logger.warning(
+                f"⚠️ REGRESSION: {reg['stage']} {reg['metric']} {reg['baseline']:.2f} → {reg['current']:.2f} "
+                f"(+{reg['change_pct']:.0f}%)"
+            )
+        return regressions
@@ -1,14 +1,147 @@
+"""
+Trade Logger: Buffered, non-blocking trade journal
+log_trade only appends to an in-memory ring buffer; a background thread
+group-commits batches to monitoring/trades.jsonl and, optionally, to
+daily Parquet files
+"""
+
+import atexit
 import json
-from datetime import datetime
 import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+FSYNC_POLICIES = ('never', 'batch', 'close')
+
+
+def _json_default(value):
+    """Serialize numpy scalars as numbers and datetimes as ISO strings; anything else as str()"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class ParquetTradeSink:
+    """Columnar sink that rolls into one Parquet file per trading date (requires pyarrow)"""
+
+    def __init__(self, directory='monitoring/trades_parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetTradeSink requires pyarrow (pip install pyarrow)") from e
+
+        self._pa = pa
+        self._pq = pq
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.schema = pa.schema([
+            ('timestamp', pa.timestamp('us')),
+            ('symbol', pa.string()),
+            ('action', pa.string()),
+            ('quantity', pa.float64()),
+            ('price', pa.float64()),
+            ('confidence', pa.float64()),
+            ('reason', pa.string()),
+            ('pnl', pa.float64()),
+        ])
+        self._day = None
+        self._writer = None
+
+    def _path_for(self, day):
+        # Never clobber a file from an earlier process on the same day
+        n = 0
+        while True:
+            path = self.directory / f"trades_{day}_{n:03d}.parquet"
+            if not path.exists():
+                return path
+            n += 1
+
+    def write(self, trades):
+        """Write a batch as row groups, rolling files whenever the trade date changes"""
+        start = 0
+        for i in range(1, len(trades) + 1):
+            day = trades[i - 1]['timestamp'][:10]
+            if i < len(trades) and trades[i]['timestamp'][:10] == day:
+                continue
+            self._write_day(day, trades[start:i])
+            start = i
+
+    def _write_day(self, day, trades):
+        if day != self._day:
+            self.close()
+            self._day = day
+            self._writer = self._pq.ParquetWriter(self._path_for(day), self.schema)
+
+        columns = {name: [t.get(name) for t in trades] for name in self.schema.names}
+        columns['timestamp'] = [datetime.fromisoformat(ts) for ts in columns['timestamp']]
+        self._writer.write_table(self._pa.table(columns, schema=self.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._day = None
+
+
 class TradeLogger:
-    def __init__(self, log_file='monitoring/trades.jsonl'):
+    """
+    Order-path trade logger with group commit
+
+    Records are flushed when flush_records are pending or flush_interval_ms
+    has elapsed, whichever comes first. When the ring buffer is full,
+    log_trade blocks until the writer catches up rather than dropping trades.
+    If the writer thread has died, log_trade writes synchronously instead.
+    close() (also registered with atexit) drains everything still buffered.
+    """
+
+    def __init__(self, log_file='monitoring/trades.jsonl', buffer_size=10_000, flush_records=100,
+                 flush_interval_ms=50, fsync='batch', parquet_dir=None):
+        """
+        Args:
+            log_file: JSON-lines journal path
+            buffer_size: Maximum trades held in memory before log_trade applies backpressure
+            flush_records: Group-commit once this many trades are pending
+            flush_interval_ms: Group-commit at least this often while trades are pending
+            fsync: 'never' (leave it to the OS), 'batch' (every group commit) or 'close' (on shutdown only)
+            parquet_dir: If set, also roll trades into daily Parquet files in this directory
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+
         self.log_file = log_file
+        self.buffer_size = buffer_size
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval_ms / 1000
+        self.fsync = fsync
+        self.parquet_sink = ParquetTradeSink(parquet_dir) if parquet_dir else None
+
+        self._buffer = deque()
+        self._oldest_pending = 0.0
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._closed = False
+        self._flush_requested = False
+        self._sync_lock = threading.Lock()
+        self._sync_fallback = False
+
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(log_file, 'a')
 
-    def log_trade(self, symbol, action, quantity, price, confidence, reason):
+        self._writer = threading.Thread(target=self._run, name='TradeLoggerWriter', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log_trade(self, symbol, action, quantity, price, confidence, reason, pnl=None):
         trade = {
             'timestamp': datetime.now().isoformat(),
             'symbol': symbol,
@@ -17,8 +150,125 @@ class TradeLogger:
             'price': price,
             'confidence': confidence,
             'reason': reason,
+            'pnl': pnl,
         }
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(trade) + '\n')
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TradeLogger is closed")
+            # Poll while waiting so a writer that died mid-wait cannot block us forever
+            while len(self._buffer) >= self.buffer_size and self._writer.is_alive():
+                self._cond.wait(0.1)
+            writer_alive = self._writer.is_alive()
+            if writer_alive:
+                if not self._buffer:
+                    # Start the flush_interval clock for this batch
+                    self._oldest_pending = time.monotonic()
+                    self._cond.notify_all()
+                self._buffer.append(trade)
+                self._enqueued += 1
+                if len(self._buffer) >= self.flush_records:
+                    self._cond.notify_all()
+
+        if not writer_alive:
+            self._write_sync(trade)
+
         logger.info(f"TRADE: {symbol} {action} {quantity}x @ ${price}")
         return trade
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._flush_requested and len(self._buffer) < self.flush_records:
+                    if not self._buffer:
+                        self._cond.wait()
+                        continue
+                    remaining = self._oldest_pending + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._flush_requested = False
+                closing = self._closed
+                # Wake producers blocked on a full buffer
+                self._cond.notify_all()
+
+            if batch:
+                self._commit(batch)
+                with self._cond:
+                    self._written += len(batch)
+                    self._cond.notify_all()
+
+            if closing:
+                return
+
+    def _write_sync(self, trade):
+        """Fallback when the writer thread is gone: commit whatever it left buffered plus this trade"""
+        with self._sync_lock:
+            with self._cond:
+                batch = list(self._buffer) + [trade]
+                self._buffer.clear()
+                self._enqueued += 1
+            if not self._sync_fallback:
+                self._sync_fallback = True
+                logger.error("⚠️ Trade writer thread is not running; writing trades synchronously")
+            self._commit(batch)
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+
+    def _commit(self, batch):
+        lines = []
+        for t in batch:
+            try:
+                lines.append(json.dumps(t, default=_json_default) + '\n')
+            except (TypeError, ValueError) as e:
+                logger.error(f"⚠️ Dropping unserializable trade {t.get('symbol')} {t.get('action')}: {e}")
+        try:
+            self._file.write(''.join(lines))
+            self._file.flush()
+            if self.fsync == 'batch':
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            logger.error(f"⚠️ Failed to write {len(batch)} trades to {self.log_file}: {e}")
+
+        if self.parquet_sink is not None:
+            try:
+                self.parquet_sink.write(batch)
+            except Exception as e:
+                logger.error(f"⚠️ Failed to write {len(batch)} trades to Parquet: {e}")
+
+    def flush(self, timeout=None):
+        """Commit every trade logged so far now, without waiting for the interval, and block until done"""
+        with self._cond:
+            target = self._enqueued
+            if self._written < target:
+                self._flush_requested = True
+                self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target or not self._writer.is_alive(), timeout)
+
+    def close(self):
+        """Drain the buffer, stop the writer and close all sinks"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+
+        if self.fsync in ('batch', 'close'):
+            try:
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.error(f"⚠️ fsync of {self.log_file} failed: {e}")
+        self._file.close()
+        if self.parquet_sink is not None:
+            self.parquet_sink.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,43 +1,203 @@
-import pandas as pd
+#!/usr/bin/env python3
+"""
+Feature engineering: ClickHouse bars -> standardized indicator CSV
+Run: python argo.py features  (or python run_features.py)
+"""
+
+import json
+
 import numpy as np
-import clickhouse_connect
-from sklearn.preprocessing import StandardScaler
+import pandas as pd
+
+SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'NVDA']
+FEATURE_COLS = ['rsi', 'macd', 'atr', 'sma_20', 'sma_50', 'bb_upper', 'bb_lower', 'obv', 'ad_line', 'cci']
+OUTPUT_CSV = 'datapipeline/features/features_output.csv'
+SCALER_PATH = 'datapipeline/features/scaler.json'
+# Cached bars behind each streamed feature row; covers the longest window (sma_50)
+FEATURE_HISTORY = 200
 
-client = clickhouse_connect.get_client(host='localhost', port=8123, username='default', password='password123')
-all_data = []
 
-for symbol in ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'NVDA']:
-    print(f'Processing {symbol}...')
-    result = client.query(f'SELECT timestamp, open, high, low, close, volume FROM trading_db.market_data WHERE symbol = \'{symbol}\' ORDER BY timestamp')
+def load_bars(symbol, client=None):
+    """Fetch one symbol's OHLCV bars in timestamp order (block-streamed into NumPy)"""
+    from datapipeline import clickhouse
 
-text
-if result.result_rows:
-    df = pd.DataFrame(result.result_rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df = clickhouse.load_bars(symbol, client=client)
+    if df is None:
+        return None
     df['timestamp'] = pd.to_datetime(df['timestamp'])
-    close = df['close'].values.astype(float)
+    # Keeps the combined output a proper panel: returns and splits must not cross symbols
+    df.insert(1, 'symbol', symbol)
+    return df
+
 
-    df['rsi'] = pd.Series(close).rolling(14).mean()
-    df['macd'] = pd.Series(close).ewm(span=12).mean() - pd.Series(close).ewm(span=26).mean()
+def compute_features(df):
+    """Add indicator columns to one symbol's bars"""
+    close = pd.Series(df['close'].values.astype(float))
+
+    df['rsi'] = close.rolling(14).mean()
+    df['macd'] = close.ewm(span=12).mean() - close.ewm(span=26).mean()
     df['atr'] = pd.Series(df['high'] - df['low']).rolling(14).mean()
-    df['sma_20'] = pd.Series(close).rolling(20).mean()
-    df['sma_50'] = pd.Series(close).rolling(50).mean()
-    df['bb_upper'] = pd.Series(close).rolling(20).mean() + 2 * pd.Series(close).rolling(20).std()
-    df['bb_lower'] = pd.Series(close).rolling(20).mean() - 2 * pd.Series(close).rolling(20).std()
+    df['sma_20'] = close.rolling(20).mean()
+    df['sma_50'] = close.rolling(50).mean()
+    df['bb_upper'] = close.rolling(20).mean() + 2 * close.rolling(20).std()
+    df['bb_lower'] = close.rolling(20).mean() - 2 * close.rolling(20).std()
     df['obv'] = pd.Series(df['volume']).cumsum()
     df['ad_line'] = 0
     df['cci'] = 0
-    df['target'] = (df['close'] > df['open']).astype(int)
+    return df
+
+
+def add_labels(df):
+    """
+    Triple-barrier labels and the target for a combined multi-symbol frame
+
+    Labeled once after concatenation, so label_frame() spreads the symbols over its thread pool.
+    NA where the future is not observed yet.
+    """
+    from datapipeline.labeling import add_labels as label
+
+    return label(df)
+
+
+def training_rows(df):
+    """Rows with an observed label (the trainer cannot use the unlabeled latest bars)"""
+    labeled = df[df['target'].notna()]
+    return labeled.astype({'target': 'int8'})
+
+
+def standardize(df, cols):
+    """
+    Z-score columns in place (same result as sklearn's StandardScaler, without importing sklearn)
+
+    Returns:
+        dict: Per-column mean and scale, for applying the same transform at serving time
+    """
+    values = df[cols].fillna(0).to_numpy(dtype=np.float64)
+    mean = values.mean(axis=0)
+    scale = values.std(axis=0)
+    scale[scale == 0] = 1.0
+    df[cols] = (values - mean) / scale
+    return {'columns': list(cols), 'mean': mean.tolist(), 'scale': scale.tolist()}
+
+
+def save_scaler(stats, path=SCALER_PATH):
+    """Persist standardize() stats; the trainer stores them with the registered model"""
+    with open(path, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+
+def load_scaler(path=SCALER_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def cache_latest_features(df):
+    """
+    Write-through of each symbol's latest raw feature row to the Redis hot cache
+
+    Call before standardize(): readers score with the registered model, which applies its own scaler.
+    """
+    from datapipeline.hot_cache import write_through
 
-    all_data.append(df)
-    print(f'  ✓ {len(df)} rows')
-client.close()
+    return write_through('put_features_frame', df, FEATURE_COLS)
+
+
+def latest_feature_rows(bars_by_symbol):
+    """
+    Raw feature row of each symbol's newest bar, computed from its recent bars
+
+    Windowed indicators match the batch values once the history covers their window;
+    obv accumulates volume over the given bars only.
+
+    Args:
+        bars_by_symbol: {symbol: hot_cache.BAR_DTYPE array}, oldest first
+
+    Returns:
+        dict: {symbol: (timestamp, float32 values in FEATURE_COLS order)}, as HotCache.put_features takes
+    """
+    from datapipeline.hot_cache import bars_to_frame
+
+    rows = {}
+    for symbol, bars in bars_by_symbol.items():
+        if not len(bars):
+            continue
+        df = compute_features(bars_to_frame(bars))
+        rows[symbol] = (df['timestamp'].iloc[-1], df[FEATURE_COLS].iloc[-1].to_numpy(dtype=np.float32))
+    return rows
+
+
+def cache_bar_features(symbols, n_bars=FEATURE_HISTORY):
+    """Streaming write-through: recompute each symbol's current feature row from its cached bars"""
+    from datapipeline.hot_cache import write_through
+
+    bars = write_through('bars', list(symbols), n=n_bars)
+    if not bars:
+        return None
+    return write_through('put_features', latest_feature_rows(bars), FEATURE_COLS)
+
+
+def finalize_features(combined, output_csv=OUTPUT_CSV, scaler_path=SCALER_PATH, cross_sectional=False, cache=True):
+    """
+    Shared tail of the features step (run_features.main and the pipeline's combine stage)
+
+    Adds cross-sectional columns (optional), labels, writes the raw latest rows to the hot
+    cache, standardizes and saves the scaler, then writes the labeled rows to output_csv.
+
+    Args:
+        combined: Concatenated compute_features() output of every symbol; modified in place
+        output_csv: Labeled training rows destination
+        scaler_path: standardize() stats destination
+        cross_sectional: Add datapipeline/cross_sectional.py columns before labeling
+        cache: Write the latest raw feature rows through to the Redis hot cache
+
+    Returns:
+        pd.DataFrame: The labeled rows that were saved
+    """
+    if cross_sectional:
+        from datapipeline.cross_sectional import add_cross_sectional_features
+
+        add_cross_sectional_features(combined)
+    add_labels(combined)
+    if cache:
+        cache_latest_features(combined)
+    save_scaler(standardize(combined, FEATURE_COLS), scaler_path)
+    labeled = training_rows(combined)
+    labeled.to_csv(output_csv, index=False)
+    return labeled
+
+
+def main(symbols=None, output_csv=OUTPUT_CSV, scaler_path=SCALER_PATH, cross_sectional=False, cache=True,
+         skip_quarantined=True):
+    all_data = []
+    quarantine = {}
+    if skip_quarantined:
+        from datapipeline.quality import load_quarantine
+
+        quarantine = load_quarantine()
+
+    for symbol in symbols or SYMBOLS:
+        if symbol in quarantine:
+            print(f'⚠️ Skipping {symbol}: quarantined by the data-quality scan ({quarantine[symbol]})')
+            continue
+        print(f'Processing {symbol}...')
+        df = load_bars(symbol)
+        if df is None:
+            continue
+        all_data.append(compute_features(df))
+        print(f'  ✓ {len(df)} rows')
+
+    if not all_data:
+        print('No data found')
+        return None
 
-if all_data:
     combined = pd.concat(all_data, ignore_index=True)
-    scaler = StandardScaler()
-    feature_cols = ['rsi', 'macd', 'atr', 'sma_20', 'sma_50', 'bb_upper', 'bb_lower', 'obv', 'ad_line', 'cci']
-    combined[feature_cols] = scaler.fit_transform(combined[feature_cols].fillna(0))
-    combined.to_csv('datapipeline/features/features_output.csv', index=False)
-    print(f'\n✓ SUCCESS! {len(combined)} rows saved')
-else:
-    print('No data found')
+    labeled = finalize_features(combined, output_csv, scaler_path, cross_sectional=cross_sectional, cache=cache)
+    print(f'\n✓ SUCCESS! {len(labeled)} labeled rows saved ({len(combined) - len(labeled)} awaiting labels)')
+    return combined
+
+
+if __name__ == '__main__':
+    main()
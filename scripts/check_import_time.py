@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the argo CLI entry points
+Runs `python -X importtime` on each subcommand's module in a fresh interpreter,
+fails if the cumulative import time exceeds its budget or if a heavy
+dependency sneaks back into module scope
+Run: python scripts/check_import_time.py [--report]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from argo import SUBCOMMAND_MODULES  # noqa: E402
+
+HEAVY_MODULES = ('xgboost', 'mlflow', 'sklearn', 'dotenv')
+
+# Cumulative import budgets in milliseconds, with headroom for slower CI machines
+BUDGET_MS = {
+    'argo': 50,
+    'ingest': 600,
+    'stream': 300,
+    'quality': 300,
+    'features': 800,
+    'train': 1200,
+    'backtest': 1000,
+    'pipeline': 50,
+    'registry': 400,
+    'cache': 300,
+    'trade': 300,
+}
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile_import(module):
+    """
+    Import `module` in a fresh interpreter with -X importtime
+
+    Returns:
+        tuple: (cumulative import time of `module` in ms, set of top-level packages imported)
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us = 0
+    packages = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        packages.add(name.split('.')[0])
+        if name == module:
+            cumulative_us = int(match.group(2))
+    return cumulative_us / 1000, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the argo entry points")
+    parser.add_argument('--report', action='store_true', help='print timings without failing')
+    args = parser.parse_args()
+
+    targets = {'argo': 'argo', **SUBCOMMAND_MODULES}
+    failures = []
+
+    print("=== Import-time budget ===")
+    for name, module in targets.items():
+        try:
+            elapsed_ms, packages = profile_import(module)
+        except RuntimeError as e:
+            failures.append(str(e))
+            print(f"  ✗ {name:10s} {module}: import failed")
+            continue
+
+        heavy = sorted(p for p in HEAVY_MODULES if p in packages)
+        ok = elapsed_ms <= BUDGET_MS[name] and not heavy
+        marker = '✓' if ok else '✗'
+        extra = f"  heavy imports at module scope: {heavy}" if heavy else ''
+        print(f"  {marker} {name:10s} {elapsed_ms:8.1f}ms / {BUDGET_MS[name]}ms  ({module}){extra}")
+        if not ok:
+            failures.append(f"{name}: {elapsed_ms:.1f}ms (budget {BUDGET_MS[name]}ms){extra}")
+
+    if failures and not args.report:
+        print("\n❌ Import-time regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\n✓ All entry points within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,22 +3,21 @@
 Enhanced Mock Data Generator
 Generates realistic market data with trends, volatility, and sector personalities
 """
-import os
-import clickhouse_connect
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 import random
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from datapipeline.clickhouse import close_client, get_client, insert_bars  # noqa: E402
+
 load_dotenv()
 
 class EnhancedMockDataGenerator:
     def __init__(self):
-        self.ch_client = clickhouse_connect.get_client(
-            host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
-            port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
-            username=os.getenv('CLICKHOUSE_USER', 'default'),
-            password=os.getenv('CLICKHOUSE_PASSWORD', 'password123')
-        )
+        self.ch_client = get_client()
 
         # Symbol personalities
         self.symbol_config = {
@@ -105,13 +104,7 @@ class EnhancedMockDataGenerator:
 
         data = [[b['t'], symbol, b['o'], b['h'], b['l'], b['c'], b['v'], b['n'], b['vw']] for b in bars]
 
-        self.ch_client.insert(
-            'trading_db.market_data',
-            data,
-            column_names=['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']
-        )
-
-        return len(data)
+        return insert_bars(data, client=self.ch_client)
 
     def generate_all(self, days: int = 60):
         """Generate data for all symbols"""
@@ -130,7 +123,7 @@ class EnhancedMockDataGenerator:
         return total_inserted
 
     def close(self):
-        self.ch_client.close()
+        close_client()
 
 
 def main():
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Mock Alpaca: a local stand-in for the market-data stream/REST API and the paper-trading API
+Generates a random-walk minute bar per symbol every --interval seconds, streams
+it to subscribed WebSocket clients (Alpaca's auth/subscribe protocol) and keeps
+the history for /v2/stocks/{symbol}/bars, so reconnect backfill can be tested.
+--drop-every closes each connection after that many messages.
+Bar timestamps are "now minus one minute", so bar latency measures our own pipeline.
+The trading side (/v2/account, /v2/positions, /v2/orders) fills market orders
+at the last generated price, rejects reused client_order_ids and non-positive
+quantities with 422 like Alpaca does, and can add latency (--order-latency-ms), lose responses
+(--fail-rate: the order is placed but the client gets a 503) or acknowledge orders as `accepted`
+and fill them later (--fill-delay), as the real API usually does
+Run: python scripts/mock_alpaca.py --port 8765
+     ALPACA_STREAM_URL=ws://localhost:8765/v2/iex ALPACA_DATA_URL=http://localhost:8765/v2 python argo.py stream
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import WSMsgType, web
+
+DEFAULT_PRICES = {'AAPL': 180.0, 'MSFT': 380.0, 'GOOGL': 140.0, 'TSLA': 250.0, 'NVDA': 500.0}
+
+
+def _rfc3339(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _parse(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class MockAlpaca:
+    """In-process mock server; use `await start()` / `await stop()` or run the CLI"""
+
+    def __init__(self, symbols=None, interval=1.0, drop_every=0, seed=7, order_latency_ms=0.0, fail_rate=0.0,
+                 fill_delay=0.0):
+        """
+        Args:
+            symbols: Symbols to generate (default: DEFAULT_PRICES); any other subscribed symbol starts at 100
+            interval: Seconds between bars
+            drop_every: Close each WebSocket after this many bar messages (0 = never)
+            seed: Random seed for the price walk
+            order_latency_ms: Delay before answering an order request
+            fail_rate: Fraction of placed orders answered with 503, as if the response were lost
+            fill_delay: Seconds between acknowledging an order as `accepted` and filling it (0 = fill at once)
+        """
+        self.prices = {s: DEFAULT_PRICES.get(s, 100.0) for s in (symbols or DEFAULT_PRICES)}
+        self.interval = interval
+        self.drop_every = drop_every
+        self.rng = random.Random(seed)
+        self.history = {s: [] for s in self.prices}
+        self.clients = {}  # ws -> set of subscribed symbols
+        self.order_latency_ms = order_latency_ms
+        self.fail_rate = fail_rate
+        self.fill_delay = fill_delay
+        self.orders = {}  # client_order_id -> order
+        self.positions = {}  # symbol -> signed qty
+        self.entry_prices = {}  # symbol -> average entry price of the open position
+        self.cash = 100_000.0
+        self.stats = {'bars': 0, 'connections': 0, 'drops': 0, 'rest_requests': 0, 'orders': 0,
+                      'duplicate_orders': 0, 'injected_failures': 0}
+        self._runner = None
+        self._generator = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/v2/stocks/{symbol}/bars', self.handle_bars)
+        self.app.router.add_get('/v2/account', self.handle_account)
+        self.app.router.add_get('/v2/positions', self.handle_positions)
+        self.app.router.add_post('/v2/orders', self.handle_order)
+        self.app.router.add_get('/v2/orders:by_client_order_id', self.handle_order_lookup)
+        self.app.router.add_get('/v2/{feed}', self.handle_stream)
+
+    # ---- bar generation ----
+
+    def _next_bar(self, symbol, now):
+        price = self.prices[symbol]
+        close = price * (1 + self.rng.gauss(0, 0.001))
+        high = max(price, close) * (1 + abs(self.rng.gauss(0, 0.0005)))
+        low = min(price, close) * (1 - abs(self.rng.gauss(0, 0.0005)))
+        self.prices[symbol] = close
+        bar = {
+            'T': 'b', 'S': symbol, 't': _rfc3339(now - timedelta(minutes=1)),
+            'o': round(price, 4), 'h': round(high, 4), 'l': round(low, 4), 'c': round(close, 4),
+            'v': self.rng.randint(1_000, 50_000), 'n': self.rng.randint(10, 500),
+            'vw': round((high + low + close) / 3, 4),
+        }
+        self.history[symbol].append(bar)
+        return bar
+
+    async def _generate(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = datetime.now(timezone.utc)
+            bars = {symbol: self._next_bar(symbol, now) for symbol in self.prices}
+            self.stats['bars'] += len(bars)
+            for ws, subscribed in list(self.clients.items()):
+                message = [bars[s] for s in subscribed if s in bars]
+                if message and not ws.closed:
+                    await ws.send_str(json.dumps(message))
+
+    # ---- handlers ----
+
+    async def handle_stream(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats['connections'] += 1
+        await ws.send_str(json.dumps([{'T': 'success', 'msg': 'connected'}]))
+
+        subscribed = None
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            request_msg = json.loads(msg.data)
+            if request_msg.get('action') == 'auth':
+                await ws.send_str(json.dumps([{'T': 'success', 'msg': 'authenticated'}]))
+            elif request_msg.get('action') == 'subscribe':
+                subscribed = set(request_msg.get('bars', []))
+                for symbol in subscribed - set(self.prices):
+                    self.prices[symbol] = 100.0
+                    self.history[symbol] = []
+                await ws.send_str(json.dumps([{'T': 'subscription', 'trades': [], 'quotes': [],
+                                               'bars': sorted(subscribed)}]))
+                break
+
+        if subscribed is None:
+            return ws
+        self.clients[ws] = subscribed
+        try:
+            if self.drop_every:
+                # Wait for drop_every broadcasts, then hang up to simulate a network drop
+                await asyncio.sleep(self.drop_every * self.interval)
+                self.stats['drops'] += 1
+                await ws.close()
+            else:
+                async for _ in ws:
+                    pass
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    async def handle_bars(self, request):
+        self.stats['rest_requests'] += 1
+        symbol = request.match_info['symbol']
+        start = _parse(request.query['start']) if 'start' in request.query else None
+        end = _parse(request.query['end']) if 'end' in request.query else None
+        limit = int(request.query.get('limit', 10000))
+        offset = int(request.query.get('page_token', 0))
+
+        bars = [
+            {k: v for k, v in bar.items() if k not in ('T', 'S')}
+            for bar in self.history.get(symbol, [])
+            if (start is None or _parse(bar['t']) >= start) and (end is None or _parse(bar['t']) <= end)
+        ]
+        page = bars[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(bars) else None
+        return web.json_response({'bars': page, 'symbol': symbol, 'next_page_token': next_token})
+
+    # ---- paper trading ----
+
+    async def handle_account(self, request):
+        equity = self.cash + sum(qty * self.prices.get(s, 0.0) for s, qty in self.positions.items())
+        return web.json_response({
+            'id': 'mock-account', 'account_number': 'PAMOCK', 'status': 'ACTIVE', 'currency': 'USD',
+            'cash': f"{self.cash:.2f}", 'buying_power': f"{2 * self.cash:.2f}", 'equity': f"{equity:.2f}",
+            'portfolio_value': f"{equity:.2f}", 'pattern_day_trader': False, 'trading_blocked': False,
+        })
+
+    async def handle_positions(self, request):
+        return web.json_response([
+            {'symbol': s, 'qty': str(abs(qty)), 'side': 'long' if qty > 0 else 'short',
+             'avg_entry_price': str(self.entry_prices.get(s, 0.0)), 'current_price': str(self.prices.get(s, 0.0)),
+             'market_value': str(qty * self.prices.get(s, 0.0))}
+            for s, qty in self.positions.items() if qty
+        ])
+
+    async def handle_order(self, request):
+        body = await request.json()
+        if self.order_latency_ms:
+            await asyncio.sleep(self.order_latency_ms / 1000)
+        client_order_id = body.get('client_order_id') or str(uuid.uuid4())
+        if client_order_id in self.orders:
+            self.stats['duplicate_orders'] += 1
+            return web.json_response({'code': 40010001, 'message': 'client_order_id must be unique'}, status=422)
+
+        symbol, qty, side = body['symbol'], float(body['qty']), body['side']
+        if qty <= 0:
+            return web.json_response({'code': 40010001, 'message': 'qty must be > 0'}, status=422)
+        now = _rfc3339(datetime.now(timezone.utc))
+        order = {
+            'id': str(uuid.uuid4()), 'client_order_id': client_order_id, 'symbol': symbol, 'qty': body['qty'],
+            'side': side, 'type': body.get('type', 'market'), 'time_in_force': body.get('time_in_force', 'day'),
+            'status': 'accepted', 'filled_qty': '0', 'filled_avg_price': None,
+            'submitted_at': now, 'filled_at': None,
+        }
+        if self.fill_delay:
+            asyncio.get_running_loop().call_later(self.fill_delay, self._fill, order)
+        else:
+            self._fill(order)
+        self.orders[client_order_id] = order
+        self.stats['orders'] += 1
+        if self.fail_rate and self.rng.random() < self.fail_rate:
+            self.stats['injected_failures'] += 1
+            return web.json_response({'code': 50300000, 'message': 'service unavailable'}, status=503)
+        return web.json_response(order)
+
+    def _fill(self, order):
+        """Fill a market order in full at the symbol's current price"""
+        symbol, qty = order['symbol'], float(order['qty'])
+        price = self.prices.get(symbol, 100.0)
+        signed = qty if order['side'] == 'buy' else -qty
+        position = self.positions.get(symbol, 0.0)
+        if position * signed >= 0:
+            # Opening or adding: blend the entry price; reducing keeps it; flipping starts a new one
+            self.entry_prices[symbol] = (abs(position) * self.entry_prices.get(symbol, 0.0) + qty * price) / (
+                abs(position) + qty)
+        elif abs(signed) > abs(position):
+            self.entry_prices[symbol] = price
+        self.positions[symbol] = position + signed
+        self.cash -= signed * price
+        order.update(status='filled', filled_qty=order['qty'], filled_avg_price=f"{price:.4f}",
+                     filled_at=_rfc3339(datetime.now(timezone.utc)))
+
+    async def handle_order_lookup(self, request):
+        order = self.orders.get(request.query.get('client_order_id'))
+        if order is None:
+            return web.json_response({'code': 40410000, 'message': 'order not found'}, status=404)
+        return web.json_response(order)
+
+    # ---- lifecycle ----
+
+    async def start(self, host='localhost', port=8765):
+        """Returns (stream URL, market-data REST URL); the trading API base is the REST URL's host"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self._generator = asyncio.create_task(self._generate())
+        return f"ws://{host}:{port}/v2/iex", f"http://{host}:{port}/v2"
+
+    async def stop(self):
+        if self._generator is not None:
+            self._generator.cancel()
+        for ws in list(self.clients):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbols', help='comma-separated symbols (default: AAPL,MSFT,GOOGL,TSLA,NVDA)')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between bars')
+    parser.add_argument('--drop-every', type=int, default=0, help='close connections after this many bars')
+    parser.add_argument('--order-latency-ms', type=float, default=0.0, help='delay before answering orders')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of placed orders answered with 503')
+    parser.add_argument('--fill-delay', type=float, default=0.0, help='seconds from `accepted` to filled')
+    args = parser.parse_args()
+
+    async def serve():
+        mock = MockAlpaca(args.symbols.split(',') if args.symbols else None, args.interval, args.drop_every,
+                          order_latency_ms=args.order_latency_ms, fail_rate=args.fail_rate,
+                          fill_delay=args.fill_delay)
+        stream_url, data_url = await mock.start(args.host, args.port)
+        print(f"✓ Mock Alpaca stream at {stream_url}, REST and paper trading at {data_url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,16 @@
 ClickHouse schema initialization for AI Auto-Trade Alpha
 Creates trading_db database and market_data table
 """
-import clickhouse_connect
-import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from datapipeline.clickhouse import new_client  # noqa: E402
 
 def setup_schema():
-    client = clickhouse_connect.get_client(
-        host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
-        port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
-        username=os.getenv('CLICKHOUSE_USER', 'default'),
-        password=os.getenv('CLICKHOUSE_PASSWORD', 'password123')
-    )
+    client = new_client()
 
     client.command("CREATE DATABASE IF NOT EXISTS trading_db")
     print(f"[{datetime.now()}] Database 'trading_db' created/verified")
@@ -6,8 +6,11 @@ Run: python scripts/validate_connection.py
 
 import sys
 import json
-from config.alpaca_config import AlpacaConfig
-from services.alpaca_client import AlpacaClient
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.alpaca_client import AlpacaClient  # noqa: E402
 
 def validate_alpaca():
     """Test full Alpaca connection pipeline"""
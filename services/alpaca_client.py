@@ -0,0 +1,201 @@
+"""
+Alpaca Client: paper-trading account, positions and orders
+Synchronous calls (account checks, validate_connection.py) share one pooled
+requests.Session. Order submission is asyncio over a pooled aiohttp session,
+so many orders go out concurrently on kept-alive connections. Every order
+carries a client_order_id: resubmitting the same id (a retry after a timeout,
+a restarted engine) returns the existing order instead of placing a second one
+"""
+
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_FIELDS = ('id', 'account_number', 'status', 'currency', 'cash', 'buying_power', 'equity',
+                  'portfolio_value', 'pattern_day_trader', 'trading_blocked')
+POSITION_FIELDS = ('symbol', 'qty', 'side', 'avg_entry_price', 'current_price', 'market_value', 'unrealized_pl')
+
+# Worth retrying with the same client_order_id; anything else is a rejection
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OrderRejected(Exception):
+    """Alpaca refused the order (HTTP 4xx other than a duplicate client_order_id)"""
+
+    def __init__(self, status, message, client_order_id):
+        super().__init__(f"{status} {message} ({client_order_id})")
+        self.status = status
+        self.client_order_id = client_order_id
+
+
+class AlpacaClient:
+    """
+    Paper-trading API client
+
+    Usage:
+        client = AlpacaClient()              # credentials from AlpacaConfig (secrets backend)
+        client.connect()
+        async with client:                   # opens the pooled async session
+            order = await client.submit_order('AAPL', 1, 'buy', client_order_id='argo-...')
+    """
+
+    def __init__(self, key_id=None, secret_key=None, base_url=None, pool_size=32, timeout=10.0, max_retries=3):
+        """
+        Args:
+            key_id, secret_key, base_url: Credentials; default from config.alpaca_config.AlpacaConfig
+            pool_size: Max concurrent connections for order calls
+            timeout: Seconds per HTTP request
+            max_retries: Retries of an order on timeouts, 429 and 5xx (same client_order_id)
+        """
+        if key_id is None or secret_key is None or base_url is None:
+            from config.alpaca_config import AlpacaConfig
+
+            config = AlpacaConfig()
+            config.validate()
+            key_id = key_id or config.key_id
+            secret_key = secret_key or config.secret_key
+            base_url = base_url or config.base_url
+
+        self.base_url = base_url.rstrip('/')
+        if not self.base_url.endswith('/v2'):
+            self.base_url += '/v2'
+        self.headers = {'APCA-API-KEY-ID': key_id, 'APCA-API-SECRET-KEY': secret_key}
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._session = None
+        self._async_session = None
+        self.stats = {'orders': 0, 'duplicates': 0, 'retries': 0, 'rejected': 0}
+
+    # ---- synchronous account calls ----
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        return self._session
+
+    def _get(self, path, **params):
+        response = self.session.get(f"{self.base_url}{path}", params=params or None, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def connect(self):
+        """Check credentials and reachability; True if the account is usable"""
+        account = self._get('/account')
+        if account.get('status') != 'ACTIVE' or account.get('trading_blocked'):
+            logger.warning(f"⚠️ Alpaca account {account.get('account_number')} status={account.get('status')} "
+                           f"trading_blocked={account.get('trading_blocked')}")
+            return False
+        return True
+
+    def get_account_details(self):
+        account = self._get('/account')
+        return {k: account[k] for k in ACCOUNT_FIELDS if k in account}
+
+    def list_positions(self):
+        return [{k: p[k] for k in POSITION_FIELDS if k in p} for p in self._get('/positions')]
+
+    def get_order_by_client_id(self, client_order_id):
+        return self._get('/orders:by_client_order_id', client_order_id=client_order_id)
+
+    # ---- async order path ----
+
+    async def open(self):
+        if self._async_session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._async_session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self
+
+    async def aclose(self):
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def submit_order(self, symbol, qty, side, client_order_id, order_type='market', time_in_force='day',
+                           limit_price=None):
+        """
+        Place an order idempotently
+
+        Args:
+            symbol: Ticker symbol
+            qty: Shares
+            side: 'buy' or 'sell'
+            client_order_id: Caller-chosen unique id (max 128 chars); reusing one returns the original order
+            order_type: 'market' or 'limit'
+            time_in_force: 'day', 'gtc', 'ioc', ...
+            limit_price: Required for limit orders
+
+        Returns:
+            dict: The Alpaca order; one placed before this call (the id was already used) carries 'duplicate': True
+        """
+        import aiohttp
+
+        await self.open()
+        payload = {
+            'symbol': symbol, 'qty': str(qty), 'side': side, 'type': order_type,
+            'time_in_force': time_in_force, 'client_order_id': client_order_id,
+        }
+        if limit_price is not None:
+            payload['limit_price'] = str(limit_price)
+
+        delay = 0.05
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._async_session.post(f"{self.base_url}/orders", json=payload) as response:
+                    if response.status in (200, 201):
+                        self.stats['orders'] += 1
+                        return await response.json()
+                    body = await response.text()
+                    if response.status == 422 and 'client_order_id' in body:
+                        # Already placed: by an earlier attempt of this call whose response was lost (book it
+                        # as ours), or before this call, e.g. by a restarted engine ('duplicate')
+                        self.stats['duplicates'] += 1
+                        order = await self.get_order(client_order_id)
+                        return order if attempt else {**order, 'duplicate': True}
+                    if response.status not in RETRY_STATUSES:
+                        self.stats['rejected'] += 1
+                        raise OrderRejected(response.status, body[:200], client_order_id)
+                    error = f"HTTP {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt == self.max_retries:
+                raise ConnectionError(f"Order {client_order_id} failed after {attempt + 1} attempts: {error}")
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay *= 2
+
+    async def get_order(self, client_order_id):
+        """Current state of an order (status, filled_qty, filled_avg_price) by its client_order_id"""
+        await self.open()
+        async with self._async_session.get(f"{self.base_url}/orders:by_client_order_id",
+                                           params={'client_order_id': client_order_id}) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
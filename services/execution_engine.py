@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Execution Engine: bar close → batch score → risk check → concurrent orders
+On each bar close every symbol is scored in one predict call from its raw
+feature row (the model applies its own training-time scaler). The engine
+trades toward a target position per symbol, long `quantity` when the model
+favours an up bar and short otherwise, so only signals that change a position
+become orders. The part of an order that opens exposure goes through
+RiskGuardrails.check_batch; the part that only reduces a position is always
+allowed, and once the circuit breaker trips every target is flat, so the
+engine can always get out. Orders are submitted concurrently with
+deterministic client_order_ids (one per strategy, bar, symbol and side), so a
+retried or repeated bar can never double-trade. Fills update the position
+book and the guardrails at once (opening fills spend the trade budget,
+closing fills realize PnL); orders acknowledged before they fill are tracked
+by client_order_id and booked when a later poll sees them fill. Trade
+logging, metrics, score caching and the feature-drift sketch update run after
+the orders are out, off the latency-critical path
+Run: python argo.py trade [--symbols AAPL,MSFT] [--model production] [--quantity 1]
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from monitoring.metrics_tracker import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+# Live drift sketch; run extra engine processes with their own path and merge with `python -m monitoring.drift`
+DRIFT_PATH = 'monitoring/drift/trade.json'
+
+# Alpaca order statuses after which no further fills arrive
+DONE_STATUSES = {'filled', 'canceled', 'expired', 'rejected', 'replaced', 'done_for_day'}
+
+
+def _trading_day(bar_time):
+    """Market-time trading date of a UTC bar timestamp"""
+    from models.risk_guardrails import RiskGuardrails
+
+    seconds = int(np.datetime64(bar_time, 's').astype(np.int64))
+    return RiskGuardrails.trading_day_of(datetime.fromtimestamp(seconds, timezone.utc))
+
+
+class PositionBook:
+    """Net position and average entry price per symbol"""
+
+    def __init__(self):
+        self.qty = {}
+        self.entry_price = {}
+
+    def position(self, symbol):
+        return self.qty.get(symbol, 0.0)
+
+    def load(self, positions):
+        """Replace the book with broker positions (AlpacaClient.list_positions())"""
+        self.qty, self.entry_price = {}, {}
+        for p in positions:
+            qty = float(p['qty']) * (-1 if p.get('side') == 'short' else 1)
+            if qty:
+                self.qty[p['symbol']] = qty
+                self.entry_price[p['symbol']] = float(p.get('avg_entry_price') or p.get('current_price') or 0.0)
+
+    def apply(self, symbol, signed_qty, price):
+        """
+        Book one fill
+
+        Returns:
+            tuple: (realized PnL, or None if the fill closed nothing; quantity opened)
+        """
+        position = self.qty.get(symbol, 0.0)
+        entry = self.entry_price.get(symbol, 0.0)
+        total = position + signed_qty
+        if position * signed_qty >= 0:
+            self.qty[symbol] = total
+            self.entry_price[symbol] = (abs(position) * entry + abs(signed_qty) * price) / abs(total) if total else 0.0
+            return None, abs(signed_qty)
+
+        closed = min(abs(signed_qty), abs(position))
+        realized = closed * (price - entry) * np.sign(position)
+        opened = abs(signed_qty) - closed
+        if total == 0:
+            self.qty.pop(symbol, None)
+            self.entry_price.pop(symbol, None)
+        else:
+            self.qty[symbol] = total
+            if opened:
+                self.entry_price[symbol] = price
+        return float(realized), opened
+
+
+class ExecutionEngine:
+    """
+    Paper-trading loop over a served model
+
+    Latencies (milliseconds, from the moment a bar close is handed to the engine):
+        signal_latency: until every order request has been dispatched
+        order_latency:  until each order is acknowledged by Alpaca
+    """
+
+    def __init__(self, model, client, guardrails, trade_logger=None, metrics=None, quantity=1, strategy_id='argo',
+                 cache=True, drift=True, drift_path=None, alerts=None):
+        """
+        Args:
+            model: models.registry.ModelServer (hot-swappable) or LoadedModel
+            client: services.alpaca_client.AlpacaClient
+            guardrails: models.risk_guardrails.RiskGuardrails
+            trade_logger: monitoring.trade_logger.TradeLogger for fills
+            metrics: monitoring.metrics_tracker.MetricsTracker for fills
+            quantity: Target position size in shares (long or short)
+            strategy_id: Prefix of every client_order_id
+            cache: Write each bar's scores to the Redis hot cache
+            drift: Track live feature drift against the model's training reference (if it has one)
+            drift_path: Checkpoint file of the live drift sketch, for merging across processes
+            alerts: monitoring.alerts.AlertSystem for drift alerts
+        """
+        self.model = model
+        self.client = client
+        self.guardrails = guardrails
+        self.trade_logger = trade_logger
+        self.metrics = metrics
+        self.quantity = quantity
+        self.strategy_id = strategy_id
+        self.cache = cache
+        self.drift = drift
+        self.drift_path = drift_path
+        self.alerts = alerts
+        self.drift_monitor = None
+        self._untracked_versions = set()
+
+        self.book = PositionBook()
+        # Acknowledged orders still waiting for (more) fills: client_order_id -> what was ordered and booked so far
+        self.open_orders = {}
+        # Newest bar traded per symbol; older or repeated bars of a symbol are ignored
+        self.last_bar = {}
+        self._first_seen = {}
+        self.signal_latency = LatencyStats()
+        self.order_latency = LatencyStats()
+        self.stats = {'bars': 0, 'scored': 0, 'accepted': 0, 'orders': 0, 'fills': 0, 'failed': 0,
+                      'duplicates': 0, 'unfilled': 0, 'poll_errors': 0}
+        self._bookkeeping = set()
+        self._stop = None
+
+    def client_order_id(self, bar_time, symbol, side):
+        return f"{self.strategy_id}-{np.datetime64(bar_time, 'm').astype(str).replace(':', '')}-{symbol}-{side}"
+
+    async def on_bar_close(self, bar_time, features, received_at=None):
+        """
+        Score, check and trade one bar
+
+        Args:
+            bar_time: Timestamp of the bar that just closed
+            features: DataFrame indexed by symbol with the model's raw feature columns; symbols that
+                already traded this bar (or a later one) are ignored
+            received_at: time.perf_counter() when the bar close was observed (default: now)
+
+        Returns:
+            dict: Counts and latencies for this bar, or None if every symbol had already traded it
+        """
+        t0 = received_at or time.perf_counter()
+        symbols = [s for s in features.index if s not in self.last_bar or bar_time > self.last_bar[s]]
+        if not symbols:
+            return None
+        for symbol in symbols:
+            self.last_bar[symbol] = bar_time
+
+        # One reference read, so the feature list, scaler and booster come from the same model version
+        loaded = getattr(self.model, 'current', self.model)
+        X = loaded.transform(features.loc[symbols])
+        proba = np.asarray(loaded.predict_proba(X, scaled=True), dtype=np.float64)
+        confidence = np.maximum(proba, 1 - proba)
+        if self.guardrails.circuit_breaker_tripped:
+            target = np.zeros(len(symbols))
+        else:
+            target = np.where(proba >= 0.5, self.quantity, -self.quantity)
+        # Orders still being filled count as done, or the next bar would send them again
+        pending = self._pending_qty()
+        position = np.fromiter((self.book.position(s) + pending.get(s, 0.0) for s in symbols), dtype=np.float64,
+                               count=len(symbols))
+        delta = target - position
+        # Only the part of an order beyond flat opens exposure and needs the guardrails' approval
+        reducing = np.where(position * delta < 0, np.minimum(np.abs(delta), np.abs(position)), 0.0)
+        opening = np.abs(delta) - reducing
+        wants_open = np.flatnonzero(opening > 0)
+        accept, _ = self.guardrails.check_batch([symbols[i] for i in wants_open], confidence[wants_open],
+                                                opening[wants_open])
+        opening[wants_open[~accept]] = 0.0
+        size = reducing + opening
+
+        orders = []
+        for i in np.flatnonzero(size > 0):
+            side = 'buy' if delta[i] > 0 else 'sell'
+            qty = float(size[i])
+            orders.append((symbols[i], side, int(qty) if qty.is_integer() else qty, float(confidence[i]),
+                           self.client_order_id(bar_time, symbols[i], side)))
+        tasks = [asyncio.create_task(self._submit(t0, symbol, qty, side, order_id))
+                 for symbol, side, qty, _, order_id in orders]
+        signal_ms = (time.perf_counter() - t0) * 1000
+        self.signal_latency.add(signal_ms)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        acknowledged, filled = 0, []
+        for (symbol, side, qty, conf, order_id), result in zip(orders, results):
+            if isinstance(result, Exception):
+                self.stats['failed'] += 1
+                logger.error(f"❌ Order {order_id} failed: {result}")
+            elif result.get('duplicate'):
+                # Placed before this call (e.g. by a restarted engine); the broker positions already have it
+                self.stats['duplicates'] += 1
+            else:
+                acknowledged += 1
+                fill = self._book_fill(symbol, side, qty, conf, result)
+                if fill is not None:
+                    filled.append(fill)
+
+        self.stats['bars'] += 1
+        self.stats['scored'] += len(symbols)
+        self.stats['accepted'] += len(orders)
+        self.stats['orders'] += acknowledged
+
+        self._in_background(self._record, filled, dict(zip(symbols, proba.tolist())), bar_time, loaded, X)
+
+        return {
+            'bar_time': bar_time,
+            'scored': len(symbols),
+            'accepted': len(orders),
+            'orders': acknowledged,
+            'fills': len(filled),
+            'signal_ms': signal_ms,
+            'last_ack_ms': (time.perf_counter() - t0) * 1000,
+        }
+
+    async def _submit(self, t0, symbol, qty, side, order_id):
+        order = await self.client.submit_order(symbol, qty, side, client_order_id=order_id)
+        self.order_latency.add((time.perf_counter() - t0) * 1000)
+        return order
+
+    def _pending_qty(self):
+        """Signed quantity of every symbol's open orders that has not filled yet"""
+        pending = {}
+        for tracked in self.open_orders.values():
+            remaining = tracked['qty'] - tracked['filled']
+            pending[tracked['symbol']] = pending.get(tracked['symbol'], 0.0) + (
+                remaining if tracked['side'] == 'buy' else -remaining)
+        return pending
+
+    def _book_fill(self, symbol, side, qty, confidence, order):
+        """
+        Apply the newly filled part of an acknowledged order to the position book and guardrails
+
+        Orders that are not done yet stay in open_orders until track_orders() sees them finish.
+
+        Returns:
+            tuple: The fill for _record_fills(), or None if nothing new has filled
+        """
+        order_id = order.get('client_order_id')
+        tracked = self.open_orders.pop(order_id, None)
+        acknowledged = tracked is None
+        if acknowledged:
+            tracked = {'symbol': symbol, 'side': side, 'qty': float(qty), 'confidence': confidence,
+                       'filled': 0.0, 'notional': 0.0, 'opened': False}
+        filled_qty = float(order.get('filled_qty') or 0.0)
+        fill = None
+        if filled_qty > tracked['filled']:
+            notional = filled_qty * float(order.get('filled_avg_price') or 0.0)
+            new_qty = filled_qty - tracked['filled']
+            price = (notional - tracked['notional']) / new_qty
+            tracked['filled'], tracked['notional'] = filled_qty, notional
+
+            realized, opened = self.book.apply(symbol, new_qty if side == 'buy' else -new_qty, price)
+            if realized is not None:
+                self.guardrails.record_close(symbol, realized)
+            if opened and not tracked['opened']:
+                # A partially filled order still counts as one trade
+                tracked['opened'] = True
+                self.guardrails.record_open(symbol)
+            self.stats['fills'] += 1
+            fill = symbol, side, new_qty, price, confidence, realized, order
+
+        status = order.get('status')
+        if tracked['filled'] < tracked['qty']:
+            if status not in DONE_STATUSES:
+                if acknowledged:
+                    self.stats['unfilled'] += 1
+                    logger.info(f"  … Order {order_id} is {status}; booking it when it fills")
+                self.open_orders[order_id] = tracked
+            else:
+                logger.warning(f"⚠️ Order {order_id} {status} with {tracked['filled']:g}/{tracked['qty']:g} filled")
+        return fill
+
+    async def track_orders(self):
+        """
+        Look up every open order and book what filled since the last look
+
+        Returns:
+            int: Number of fills booked
+        """
+        if not self.open_orders:
+            return 0
+        order_ids = list(self.open_orders)
+        results = await asyncio.gather(*(self.client.get_order(order_id) for order_id in order_ids),
+                                       return_exceptions=True)
+        filled = []
+        for order_id, order in zip(order_ids, results):
+            if isinstance(order, Exception):
+                logger.warning(f"⚠️ Could not look up open order {order_id}: {type(order).__name__}: {order}")
+                continue
+            tracked = self.open_orders[order_id]
+            fill = self._book_fill(tracked['symbol'], tracked['side'], tracked['qty'], tracked['confidence'], order)
+            if fill is not None:
+                filled.append(fill)
+        if filled:
+            self._in_background(self._record_fills, filled)
+        return len(filled)
+
+    def _in_background(self, func, *args):
+        """Run bookkeeping in a worker thread; drain() waits for it"""
+        task = asyncio.create_task(asyncio.to_thread(func, *args))
+        self._bookkeeping.add(task)
+        task.add_done_callback(self._bookkeeping.discard)
+
+    def _record_fills(self, filled):
+        """Trade log and metrics of booked fills (runs in a worker thread)"""
+        for symbol, side, qty, price, confidence, realized, order in filled:
+            if self.trade_logger is not None:
+                self.trade_logger.log_trade(symbol, side.upper(), qty, price, confidence,
+                                            f"{order.get('status')} {order.get('client_order_id')}", pnl=realized)
+            if self.metrics is not None:
+                self.metrics.record_fill(symbol, realized, quantity=qty, price=price, action=side.upper())
+
+    def _record(self, filled, scores, bar_time, loaded, X):
+        """Trade log, metrics, cached scores and drift (runs in a worker thread)"""
+        self._record_fills(filled)
+        if self.cache:
+            from datapipeline.hot_cache import write_through
+
+            write_through('put_scores', scores, timestamp=bar_time, model_version=loaded.version)
+        if self.drift:
+            monitor = self._drift_monitor(loaded)
+            if monitor is not None:
+                # One live window per trading day, so yesterday's rows cannot mask today's drift
+                monitor.update(X, session=_trading_day(bar_time))
+                monitor.publish()
+                monitor.checkpoint()
+
+    def _drift_monitor(self, loaded):
+        """The drift monitor of the serving model version (a fresh one after a hot swap)"""
+        if loaded.version in self._untracked_versions:
+            return None
+        if self.drift_monitor is None or self.drift_monitor.version != loaded.version:
+            from monitoring.drift import DriftMonitor
+
+            monitor = DriftMonitor.from_model(loaded, metrics=self.metrics, alerts=self.alerts, path=self.drift_path)
+            if monitor is None:
+                self._untracked_versions.add(loaded.version)
+                logger.warning(f"⚠️ Model {loaded.version} has no drift reference; drift is not tracked")
+                return None
+            self.drift_monitor = monitor
+        return self.drift_monitor
+
+    async def drain(self):
+        """Wait for outstanding bookkeeping"""
+        if self._bookkeeping:
+            await asyncio.gather(*self._bookkeeping, return_exceptions=True)
+
+    async def sync_positions(self):
+        """Load the position book from the broker (at start)"""
+        self.book.load(await asyncio.to_thread(self.client.list_positions))
+        logger.info(f"  ✓ {len(self.book.qty)} open positions loaded from the broker")
+
+    async def poll(self, cache, symbols, settle=5.0, stale_after=120.0):
+        """
+        Trade every bar newer than each symbol's last traded one
+
+        A bar close is scored as one batch once every symbol has its row or
+        `settle` seconds after it first appeared; a symbol whose row lands later
+        trades on its own at the next poll. Rows more than `stale_after` seconds
+        older than the newest bar (e.g. left in the cache from before a restart)
+        are skipped. Open orders are looked up first, so their fills are booked
+        before the next bar sizes its orders.
+        """
+        await self.track_orders()
+        features = await asyncio.to_thread(cache.features, symbols)
+        if not len(features):
+            return
+        received_at = time.perf_counter()
+
+        stamps = features['timestamp'].to_numpy()
+        newest = stamps.max()
+        pending = {}
+        for symbol, bar_time in zip(features.index, stamps):
+            last = self.last_bar.get(symbol)
+            if last is None or bar_time > last:
+                pending.setdefault(bar_time, []).append(symbol)
+
+        for bar_time in sorted(pending):
+            group = pending[bar_time]
+            if (newest - bar_time) / np.timedelta64(1, 's') > stale_after:
+                for symbol in group:
+                    self.last_bar[symbol] = bar_time
+                logger.warning(f"⚠️ Skipping stale {bar_time} rows of {len(group)} symbols")
+                continue
+            if bar_time == newest and (stamps >= newest).sum() < len(symbols):
+                first_seen = self._first_seen.setdefault(newest, time.monotonic())
+                if time.monotonic() - first_seen < settle:
+                    continue  # wait for the rest of the universe
+            result = await self.on_bar_close(bar_time, features.loc[group], received_at)
+            if result is not None:
+                logger.info(f"  ✓ {result['bar_time']}: {result['orders']}/{result['scored']} orders, "
+                            f"signal {result['signal_ms']:.1f}ms, last ack {result['last_ack_ms']:.1f}ms")
+        self._first_seen = {t: seen for t, seen in self._first_seen.items() if t >= newest}
+
+    async def run(self, symbols, poll_interval=1.0, duration=None, settle=5.0):
+        """
+        Trade every new bar that reaches the hot cache until stopped
+
+        The streaming ingester writes each symbol's raw feature row to Redis as
+        its bars commit; one features round trip per poll picks up new bars
+        (see poll()). An error in one poll is logged and the loop carries on.
+
+        Returns:
+            dict: summary()
+        """
+        from datapipeline.hot_cache import get_cache
+
+        cache = get_cache()
+        stop = self._stop = asyncio.Event()
+        if duration is not None:
+            asyncio.get_running_loop().call_later(duration, stop.set)
+
+        async with self.client:
+            await self.sync_positions()
+            while not stop.is_set():
+                try:
+                    await self.poll(cache, symbols, settle=settle)
+                except Exception as e:
+                    self.stats['poll_errors'] += 1
+                    logger.error(f"❌ Poll failed: {type(e).__name__}: {e}")
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self.track_orders()
+            if self.open_orders:
+                logger.warning(f"⚠️ {len(self.open_orders)} orders still open at shutdown; their fills are not booked")
+            await self.drain()
+        return self.summary()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    def summary(self):
+        return {
+            **self.stats,
+            'open_positions': len(self.book.qty),
+            'open_orders': len(self.open_orders),
+            'client': dict(self.client.stats),
+            'signal_latency': self.signal_latency.summary(),
+            'order_latency': self.order_latency.summary(),
+            'drift': self.drift_monitor.scores() if self.drift_monitor is not None else None,
+        }
+
+
+def main(symbols=None, model_ref='production', quantity=1, poll_interval=1.0, duration=None, metrics_port=None,
+         drift_path=DRIFT_PATH):
+    """Run the engine against the pinned model until interrupted (metrics on :metrics_port if given)"""
+    import os
+
+    from dotenv import load_dotenv
+
+    from models.registry import ModelRegistry, ModelServer
+    from models.risk_guardrails import RiskGuardrails
+    from monitoring.alerts import AlertSystem
+    from monitoring.metrics_tracker import MetricsTracker
+    from monitoring.trade_logger import TradeLogger
+    from services.alpaca_client import AlpacaClient
+
+    load_dotenv()
+    if symbols is None:
+        symbols = [s.strip() for s in os.getenv('DATA_SYMBOLS', 'AAPL,MSFT,GOOGL,TSLA,NVDA').split(',')]
+
+    server = ModelServer(ModelRegistry(), model_ref)
+    server.watch()
+    trade_logger = TradeLogger()
+    metrics = MetricsTracker()
+    alerts = AlertSystem()
+    guardrails = RiskGuardrails(alerts=alerts)
+    metrics_server = metrics.serve(port=metrics_port) if metrics_port else None
+    engine = ExecutionEngine(server, AlpacaClient(), guardrails, trade_logger=trade_logger, metrics=metrics,
+                             quantity=quantity, drift_path=drift_path, alerts=alerts)
+    logger.info(f"Trading {len(symbols)} symbols with model {server.current.version} ({model_ref})")
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, engine.stop)
+        return await engine.run(symbols, poll_interval=poll_interval, duration=duration)
+
+    try:
+        summary = asyncio.run(run())
+    finally:
+        server.close()
+        trade_logger.close()
+        guardrails.flush()
+        alerts.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+    for name in ('signal_latency', 'order_latency'):
+        s = summary[name]
+        if s['count']:
+            print(f"  {name:15s} p50={s['p50_ms']:.1f}ms  p90={s['p90_ms']:.1f}ms  p99={s['p99_ms']:.1f}ms")
+    drift = summary['drift']
+    if drift and drift['rows']:
+        worst = max(drift['features'].items(), key=lambda item: item[1]['psi'])
+        print(f"  Feature drift over {drift['rows']:,} rows: max PSI {worst[1]['psi']:.3f} ({worst[0]})")
+    print(f"✓ {summary['bars']} bars, {summary['orders']} orders, {summary['failed']} failed, "
+          f"{summary['open_positions']} open positions")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
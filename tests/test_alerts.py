@@ -0,0 +1,138 @@
+"""
+AlertDispatcher against file and local HTTP sinks; the circuit breaker alerts once
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from models.risk_guardrails import RiskGuardrails
+from monitoring.alerts import AlertDispatcher, AlertSystem, FileSink, WebhookSink
+
+
+class _ListSink:
+    name = 'list'
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+class _FailingSink:
+    name = 'failing'
+
+    def send(self, alert):
+        raise ConnectionError('down')
+
+
+@pytest.fixture
+def webhook():
+    """Local HTTP stub collecting POSTed JSON bodies"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hook", received
+    server.shutdown()
+    server.server_close()
+
+
+def test_file_and_webhook_sinks_receive_the_alert(tmp_path, webhook):
+    url, received = webhook
+    path = tmp_path / 'alerts.jsonl'
+    dispatcher = AlertDispatcher(sinks=[FileSink(path), WebhookSink(url)])
+    assert dispatcher.submit('circuit_breaker', 'daily loss', severity='critical')
+    dispatcher.close()
+
+    (line,) = path.read_text().splitlines()
+    assert json.loads(line)['key'] == 'circuit_breaker'
+    assert received[0]['text'] == 'daily loss' and received[0]['severity'] == 'critical'
+    assert dispatcher.stats['delivered'] == 2
+
+
+def test_repeats_inside_the_window_are_coalesced():
+    sink = _ListSink()
+    dispatcher = AlertDispatcher(sinks=[sink], dedup_window=60)
+    for i in range(5):
+        dispatcher.submit('drift:rsi', f"psi {i}")
+    dispatcher.submit('drift:macd', 'psi')
+    dispatcher.close()
+
+    assert [a['message'] for a in sink.alerts if a['key'] == 'drift:rsi'] == ['psi 0', 'psi 4 (+4 repeats in 60s)']
+    assert dispatcher.stats['coalesced'] == 4 and dispatcher.stats['delivered'] == 3
+
+
+def test_rate_limit_and_failing_sinks_do_not_stop_delivery():
+    sink = _ListSink()
+    dispatcher = AlertDispatcher(sinks=[_FailingSink(), sink], dedup_window=0, rate_limits={'list': (0.001, 2)})
+    for i in range(4):
+        dispatcher.submit(f"key{i}", 'message')
+    dispatcher.close()
+
+    assert len(sink.alerts) == 2
+    assert dispatcher.stats['rate_limited'] == 2 and dispatcher.stats['failed'] == 4
+
+
+def test_a_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+
+    class _Blocking:
+        name = 'blocking'
+
+        def send(self, alert):
+            release.wait(5)
+
+    dispatcher = AlertDispatcher(sinks=[_Blocking()], dedup_window=0, queue_size=1)
+    results = [dispatcher.submit(f"key{i}", 'message') for i in range(20)]
+    release.set()
+    dispatcher.close()
+    assert not all(results)
+    assert dispatcher.stats['dropped'] == results.count(False)
+    assert dispatcher.stats['submitted'] == results.count(True)
+
+
+def test_counters_add_up_under_concurrent_submits():
+    dispatcher = AlertDispatcher(sinks=[_ListSink()], dedup_window=60, queue_size=100_000)
+    threads = [threading.Thread(target=lambda: [dispatcher.submit('same', 'x') for _ in range(2_000)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dispatcher.close()
+    assert dispatcher.stats['submitted'] == 16_000
+    assert dispatcher.stats['coalesced'] == 16_000 - 1
+
+
+def test_circuit_breaker_is_announced_once(caplog):
+    sink = _ListSink()
+    alerts = AlertSystem(AlertDispatcher(sinks=[sink], dedup_window=0))
+    guardrails = RiskGuardrails(snapshot_path=None, alerts=alerts)
+
+    with caplog.at_level(logging.DEBUG, logger='models.risk_guardrails'):
+        guardrails.record_trade('AAPL', -300.0)
+        guardrails.record_trade('MSFT', -300.0)  # trips here
+        guardrails.record_trade('MSFT', -10.0)
+        for _ in range(10):
+            assert not guardrails.check_can_trade('AAPL', 0.9)
+            accept, _ = guardrails.check_batch(['AAPL'], [0.9], [1])
+            assert not accept.any()
+    alerts.close()
+
+    breaker_logs = [r for r in caplog.records if 'CIRCUIT BREAKER' in r.getMessage()]
+    assert len(breaker_logs) == 1 and breaker_logs[0].levelno == logging.ERROR
+    assert [a['key'] for a in sink.alerts] == ['circuit_breaker']
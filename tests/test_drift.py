@@ -0,0 +1,70 @@
+"""
+Drift monitor: labeled gauges, per-session windows and checkpoints
+"""
+
+import json
+import threading
+from datetime import date
+
+import numpy as np
+
+from monitoring.drift import DriftMonitor, HistogramSketch
+from monitoring.metrics_tracker import MetricsTracker
+
+FEATURE_COLS = ['rsi', 'macd']
+
+
+def _monitor(**kwargs):
+    rng = np.random.default_rng(0)
+    reference = HistogramSketch.from_data(rng.standard_normal((2_000, 2)), FEATURE_COLS)
+    return DriftMonitor(reference, version='v1', min_rows=10, **kwargs)
+
+
+def test_per_feature_psi_is_one_labeled_gauge():
+    metrics = MetricsTracker()
+    monitor = _monitor(metrics=metrics)
+    monitor.update(np.random.default_rng(1).standard_normal((100, 2)) + [3.0, 0.0])
+    monitor.publish()
+
+    text = metrics.to_prometheus()
+    assert text.count('# TYPE argo_drift_psi gauge') == 1
+    assert 'argo_drift_psi{feature="rsi"}' in text and 'argo_drift_psi{feature="macd"}' in text
+    assert 'drift_psi_rsi' not in text
+    series = {s['labels']['feature']: s['value'] for s in metrics.snapshot()['gauges']['drift_psi']}
+    assert series['rsi'] > 1.0 > series['macd']
+
+
+def test_a_new_session_starts_a_new_window():
+    monitor = _monitor()
+    rows = np.zeros((50, 2))
+    monitor.update(rows, session=date(2024, 1, 2))
+    monitor.update(rows, session=date(2024, 1, 2))
+    assert monitor.scores()['rows'] == 100
+
+    monitor.update(rows, session=date(2024, 1, 3))
+    assert monitor.scores()['rows'] == 50
+
+
+def test_concurrent_checkpoints_leave_the_newest_sketch(tmp_path):
+    monitor = _monitor(path=tmp_path / 'trade.json')
+    errors = []
+
+    def work():
+        try:
+            for _ in range(50):
+                monitor.update(np.zeros((1, 2)), session=date(2024, 1, 2))
+                monitor.checkpoint()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    saved = json.loads((tmp_path / 'trade.json').read_text())
+    assert saved['session'] == '2024-01-02'
+    assert np.asarray(saved['counts']).sum(axis=1).max() == 400
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,298 @@
+"""
+Order path and execution engine against the in-process mock Alpaca server
+"""
+
+import asyncio
+import socket
+
+import fakeredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from datapipeline.hot_cache import HotCache
+from models.risk_guardrails import RiskGuardrails
+from monitoring.trade_history import TradeHistory
+from monitoring.trade_logger import TradeLogger
+from scripts.mock_alpaca import MockAlpaca
+from services.alpaca_client import AlpacaClient, OrderRejected
+from services.execution_engine import ExecutionEngine
+
+BAR = np.datetime64('2024-01-02T14:30')
+
+
+class _Model:
+    """Stand-in for LoadedModel: the single raw feature 'p' is the predicted probability"""
+
+    version = 'test'
+    feature_cols = ['p']
+
+    def transform(self, features):
+        return features[self.feature_cols].to_numpy(dtype=np.float64)
+
+    def predict_proba(self, X, scaled=False):
+        return X[:, 0]
+
+
+class _TradeLog:
+    """Records TradeLogger.log_trade calls"""
+
+    def __init__(self):
+        self.trades = []
+
+    def log_trade(self, symbol, action, quantity, price, confidence, reason, pnl=None):
+        self.trades.append((symbol, action, quantity, pnl))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _features(**proba):
+    return pd.DataFrame({'p': list(proba.values())}, index=list(proba))
+
+
+def _engine(url, **kwargs):
+    guardrails = RiskGuardrails(snapshot_path=None)
+    return ExecutionEngine(_Model(), AlpacaClient('mock', 'mock', url), guardrails, cache=False, drift=False,
+                           **kwargs)
+
+
+def _with_mock(test, **mock_kwargs):
+    """Run `await test(mock, url)` against a fresh mock server"""
+    async def run():
+        mock = MockAlpaca(['AAPL', 'MSFT'], interval=3600, **mock_kwargs)
+        _, url = await mock.start(port=_free_port())
+        try:
+            return await test(mock, url)
+        finally:
+            await mock.stop()
+
+    return asyncio.run(run())
+
+
+def test_resubmitting_a_client_order_id_places_no_second_order():
+    async def test(mock, url):
+        async with AlpacaClient('mock', 'mock', url) as client:
+            first = await client.submit_order('AAPL', 1, 'buy', client_order_id='argo-1')
+            again = await client.submit_order('AAPL', 1, 'buy', client_order_id='argo-1')
+        assert mock.stats['orders'] == 1
+        assert mock.positions['AAPL'] == 1
+        assert again['id'] == first['id'] and again['duplicate']
+        assert 'duplicate' not in first
+
+    _with_mock(test)
+
+
+def test_duplicate_returns_the_existing_order():
+    async def test(mock, url):
+        # Placed by an earlier engine process
+        engine = _engine(url)
+        async with engine.client:
+            await engine.on_bar_close(BAR, _features(AAPL=0.9))
+        existing = dict(mock.orders[engine.client_order_id(BAR, 'AAPL', 'buy')])
+
+        restarted = _engine(url)
+        async with restarted.client:
+            order = await restarted.client.submit_order('AAPL', 1, 'buy', client_order_id=existing['client_order_id'])
+            await restarted.on_bar_close(BAR, _features(AAPL=0.9))
+        assert {k: order[k] for k in existing} == existing
+        assert restarted.stats['duplicates'] == 1 and restarted.stats['orders'] == 0
+        assert not restarted.book.qty  # the broker's positions already include it
+        assert mock.stats['orders'] == 1
+
+    _with_mock(test)
+
+
+def test_a_dropped_response_is_retried_and_booked_once():
+    async def test(mock, url):
+        engine = _engine(url)
+        async with engine.client:
+            await engine.on_bar_close(BAR, _features(AAPL=0.9))
+            await engine.drain()
+        assert mock.stats['injected_failures'] >= 1
+        assert engine.client.stats['retries'] >= 1
+        assert mock.stats['orders'] == 1
+        assert engine.stats['orders'] == 1 and engine.stats['failed'] == 0
+        assert engine.book.position('AAPL') == mock.positions['AAPL'] == 1
+
+    _with_mock(test, fail_rate=1.0)
+
+
+def test_a_4xx_raises_order_rejected():
+    async def test(mock, url):
+        async with AlpacaClient('mock', 'mock', url) as client:
+            with pytest.raises(OrderRejected) as e:
+                await client.submit_order('AAPL', 0, 'buy', client_order_id='argo-zero')
+            assert client.stats['rejected'] == 1 and client.stats['retries'] == 0
+        assert e.value.status == 422
+        assert mock.stats['orders'] == 0
+
+    _with_mock(test)
+
+
+def test_on_bar_close_ignores_a_repeated_bar():
+    async def test(mock, url):
+        engine = _engine(url)
+        async with engine.client:
+            assert (await engine.on_bar_close(BAR, _features(AAPL=0.9, MSFT=0.1)))['orders'] == 2
+            assert await engine.on_bar_close(BAR, _features(AAPL=0.1, MSFT=0.9)) is None
+            assert await engine.on_bar_close(BAR - np.timedelta64(1, 'm'), _features(AAPL=0.1)) is None
+        assert mock.stats['orders'] == 2
+        assert engine.stats['bars'] == 1
+
+    _with_mock(test)
+
+
+def test_signals_net_against_the_position_and_flips_realize_pnl():
+    async def test(mock, url):
+        engine = _engine(url, quantity=2)
+        async with engine.client:
+            await engine.on_bar_close(BAR, _features(AAPL=0.9))
+            # Same direction: already at the target, nothing to send
+            result = await engine.on_bar_close(BAR + np.timedelta64(1, 'm'), _features(AAPL=0.8))
+            assert result['orders'] == 0 and mock.stats['orders'] == 1
+
+            mock.prices['AAPL'] = 110.0
+            entry = engine.book.entry_price['AAPL']
+            result = await engine.on_bar_close(BAR + np.timedelta64(2, 'm'), _features(AAPL=0.1))
+        assert result['orders'] == 1
+        order = mock.orders[engine.client_order_id(BAR + np.timedelta64(2, 'm'), 'AAPL', 'sell')]
+        assert float(order['qty']) == 4  # close 2, open 2 short
+        assert engine.book.position('AAPL') == mock.positions['AAPL'] == -2
+        assert engine.guardrails.daily_pnl == pytest.approx(2 * (110.0 - entry))
+        assert engine.guardrails.trades_today == 2  # the two opening fills
+
+    _with_mock(test)
+
+
+def test_sync_positions_loads_the_broker_book():
+    async def test(mock, url):
+        async with AlpacaClient('mock', 'mock', url) as client:
+            await client.submit_order('MSFT', 3, 'sell', client_order_id='argo-short')
+        engine = _engine(url)
+        async with engine.client:
+            await engine.sync_positions()
+            result = await engine.on_bar_close(BAR, _features(MSFT=0.9))
+        assert engine.book.position('MSFT') == -3 + 4 == 1
+        assert result['orders'] == 1 and mock.positions['MSFT'] == 1
+
+    _with_mock(test)
+
+
+def test_poll_trades_a_late_symbol_on_its_own():
+    async def test(mock, url):
+        cache = HotCache(fakeredis.FakeRedis())
+        engine = _engine(url)
+        async with engine.client:
+            cache.put_features({'AAPL': (pd.Timestamp(BAR), [0.9])}, ['p'])
+            await engine.poll(cache, ['AAPL', 'MSFT'], settle=60.0)
+            assert mock.stats['orders'] == 0  # waiting for MSFT's row of this bar
+
+            await engine.poll(cache, ['AAPL', 'MSFT'], settle=0.0)
+            assert mock.stats['orders'] == 1
+
+            cache.put_features({'MSFT': (pd.Timestamp(BAR), [0.1])}, ['p'])
+            await engine.poll(cache, ['AAPL', 'MSFT'], settle=60.0)
+            await engine.poll(cache, ['AAPL', 'MSFT'], settle=60.0)
+        assert mock.stats['orders'] == 2
+        assert mock.positions == {'AAPL': 1, 'MSFT': -1}
+
+    _with_mock(test)
+
+
+def test_an_accepted_order_is_booked_when_it_fills():
+    async def test(mock, url):
+        engine = _engine(url, trade_logger=_TradeLog())
+        async with engine.client:
+            result = await engine.on_bar_close(BAR, _features(AAPL=0.9))
+            assert result['orders'] == 1 and result['fills'] == 0
+            assert engine.stats['unfilled'] == 1 and engine.book.position('AAPL') == 0
+            # Still being filled: the next bar must not send it again
+            result = await engine.on_bar_close(BAR + np.timedelta64(1, 'm'), _features(AAPL=0.9))
+            assert result['orders'] == 0 and mock.stats['orders'] == 1
+
+            await asyncio.sleep(0.2)
+            assert await engine.track_orders() == 1
+            assert not engine.open_orders
+            assert engine.book.position('AAPL') == mock.positions['AAPL'] == 1
+            assert engine.guardrails.trades_today == 1
+
+            # A flip that fills later realizes its PnL when it is booked
+            entry = engine.book.entry_price['AAPL']
+            mock.prices['AAPL'] = entry + 5.0
+            await engine.on_bar_close(BAR + np.timedelta64(2, 'm'), _features(AAPL=0.1))
+            assert engine.guardrails.daily_pnl == 0
+            await asyncio.sleep(0.2)
+            await engine.track_orders()
+            await engine.drain()
+        assert engine.book.position('AAPL') == mock.positions['AAPL'] == -1
+        assert engine.guardrails.daily_pnl == pytest.approx(5.0)
+        assert engine.guardrails.trades_today == 2
+        assert engine.trade_logger.trades == [('AAPL', 'BUY', 1.0, None), ('AAPL', 'SELL', 2.0, pytest.approx(5.0))]
+        assert engine.stats['fills'] == 2 and engine.summary()['open_orders'] == 0
+
+    _with_mock(test, fill_delay=0.05)
+
+
+def test_a_tripped_breaker_flattens_every_position():
+    async def test(mock, url):
+        engine = _engine(url)
+        async with engine.client:
+            await engine.on_bar_close(BAR, _features(AAPL=0.9, MSFT=0.1))
+            engine.guardrails.record_close('AAPL', engine.guardrails.MAX_DAILY_LOSS - 1.0)
+            assert engine.guardrails.circuit_breaker_tripped
+
+            result = await engine.on_bar_close(BAR + np.timedelta64(1, 'm'), _features(AAPL=0.9, MSFT=0.1))
+            assert result['orders'] == 2
+            # Flat: nothing more to send, and nothing new may open
+            result = await engine.on_bar_close(BAR + np.timedelta64(2, 'm'), _features(AAPL=0.1, MSFT=0.9))
+            assert result['orders'] == 0
+        assert not engine.book.qty
+        assert mock.positions == {'AAPL': 0, 'MSFT': 0}
+        assert engine.guardrails.trades_today == 2
+
+    _with_mock(test)
+
+
+def test_an_exhausted_trade_budget_still_closes_positions():
+    async def test(mock, url):
+        engine = _engine(url)
+        engine.guardrails.MAX_TRADES_PER_DAY = 2
+        async with engine.client:
+            await engine.on_bar_close(BAR, _features(AAPL=0.9, MSFT=0.1))
+            assert engine.guardrails.trades_today == 2
+
+            # Both signals flip: the closing halves go out, the opening halves are over budget
+            result = await engine.on_bar_close(BAR + np.timedelta64(1, 'm'), _features(AAPL=0.1, MSFT=0.9))
+        assert result['orders'] == 2
+        assert float(mock.orders[engine.client_order_id(BAR + np.timedelta64(1, 'm'), 'AAPL', 'sell')]['qty']) == 1
+        assert not engine.book.qty
+        assert mock.positions == {'AAPL': 0, 'MSFT': 0}
+        assert engine.guardrails.trades_today == 2
+
+    _with_mock(test)
+
+
+def test_replaying_the_trade_log_rebuilds_the_guardrails(tmp_path):
+    log_file = tmp_path / 'trades.jsonl'
+
+    async def test(mock, url):
+        with TradeLogger(log_file) as trade_logger:
+            engine = _engine(url, trade_logger=trade_logger)
+            async with engine.client:
+                await engine.on_bar_close(BAR, _features(AAPL=0.9, MSFT=0.1))
+                mock.prices.update(AAPL=mock.prices['AAPL'] - 3.0, MSFT=mock.prices['MSFT'] + 2.0)
+                await engine.on_bar_close(BAR + np.timedelta64(1, 'm'), _features(AAPL=0.1, MSFT=0.9))
+                await engine.on_bar_close(BAR + np.timedelta64(2, 'm'), _features(AAPL=0.2, MSFT=0.9))
+                await engine.drain()
+        return engine.guardrails
+
+    live = _with_mock(test)
+    replayed = RiskGuardrails(snapshot_path=None)
+    trades = TradeHistory(log_file).replay(guardrails=replayed)
+    assert len(trades) == 4
+    assert live.trades_today == replayed.trades_today == 4  # two opens, then two flips
+    assert replayed.daily_pnl == pytest.approx(live.daily_pnl) == pytest.approx(-5.0)
@@ -0,0 +1,137 @@
+"""
+Hot cache round trips against fakeredis
+"""
+
+import fakeredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from datapipeline.hot_cache import BAR_DTYPE, HotCache, bars_from_frame
+
+FEATURE_COLS = ['rsi', 'macd', 'atr']
+
+
+@pytest.fixture
+def cache():
+    return HotCache(fakeredis.FakeRedis(), max_bars=5, bar_ttl=600, feature_ttl=300, score_ttl=60)
+
+
+def _bars(minutes, close_offset=0.0):
+    df = pd.DataFrame({
+        'timestamp': pd.Timestamp('2024-01-02 14:30') + pd.to_timedelta(minutes, unit='m'),
+        'open': 100.0, 'high': 101.0, 'low': 99.0,
+        'close': 100.0 + np.asarray(minutes, dtype=np.float64) + close_offset,
+        'volume': 1_000.0,
+    })
+    return bars_from_frame(df)
+
+
+def test_bars_round_trip(cache):
+    bars = _bars([0, 1, 2])
+    assert cache.push_bars({'AAPL': bars}) == 3
+
+    cached = cache.bars(['AAPL', 'MSFT'])
+    assert list(cached) == ['AAPL']
+    assert cached['AAPL'].dtype == BAR_DTYPE
+    np.testing.assert_array_equal(cached['AAPL'], bars)
+    np.testing.assert_array_equal(cache.bars(['AAPL'], n=2)['AAPL'], bars[-2:])
+
+
+def test_backfill_after_live_push_merges_by_timestamp(cache):
+    cache.push_bars({'AAPL': _bars([3, 4])})
+    # REST backfill overlapping the live bars, with a corrected close for minute 3
+    cache.push_bars({'AAPL': _bars([1, 2, 3], close_offset=0.5)})
+
+    cached = cache.bars(['AAPL'])['AAPL']
+    assert np.all(np.diff(cached['timestamp']) > 0)
+    np.testing.assert_array_equal(cached['close'], [101.5, 102.5, 103.5, 104.0])
+
+
+def test_duplicates_within_a_batch_keep_the_last_copy(cache):
+    bars = np.concatenate([_bars([0, 1]), _bars([1], close_offset=0.25)])
+    assert cache.push_bars({'AAPL': bars}) == 2
+    np.testing.assert_array_equal(cache.bars(['AAPL'])['AAPL']['close'], [100.0, 101.25])
+
+
+def test_bars_are_trimmed_to_the_newest_max_bars(cache):
+    cache.push_bars({'AAPL': _bars(range(4))})
+    cache.push_bars({'AAPL': _bars(range(4, 8))})
+    cache.push_bars({'AAPL': _bars([0])})  # too old to make the window
+
+    cached = cache.bars(['AAPL'])['AAPL']
+    np.testing.assert_array_equal(cached['close'], [103.0, 104.0, 105.0, 106.0, 107.0])
+
+
+def test_features_round_trip(cache):
+    values = np.array([[55.0, 0.1, 1.5], [40.0, -0.2, 2.5]], dtype=np.float32)
+    ts = pd.Timestamp('2024-01-02 14:31')
+    cache.put_features({'AAPL': (ts, values[0]), 'MSFT': (ts, values[1])}, FEATURE_COLS)
+
+    df = cache.features(['AAPL', 'MSFT', 'GOOGL'])
+    assert list(df.index) == ['AAPL', 'MSFT']
+    assert list(df.columns) == ['timestamp'] + FEATURE_COLS
+    assert (df['timestamp'] == ts).all()
+    np.testing.assert_array_equal(df[FEATURE_COLS].to_numpy(), values)
+
+
+def test_features_frame_keeps_the_latest_row(cache):
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-02 14:31', '2024-01-02 14:30', '2024-01-02 14:30']),
+        'symbol': ['AAPL', 'AAPL', 'MSFT'],
+        'rsi': [60.0, 50.0, 40.0], 'macd': [0.0, 0.0, 0.0], 'atr': [1.0, 1.0, 1.0],
+    })
+    cache.put_features_frame(df, FEATURE_COLS)
+    assert cache.features(['AAPL'])['rsi'].tolist() == [60.0]
+
+
+def test_scores_round_trip(cache):
+    ts = pd.Timestamp('2024-01-02 14:31')
+    cache.put_scores({'AAPL': 0.61, 'MSFT': 0.42}, timestamp=ts, model_version='abc123')
+
+    df = cache.scores(['AAPL', 'MSFT'])
+    assert df['score'].tolist() == pytest.approx([0.61, 0.42])
+    assert (df['model_version'] == 'abc123').all()
+    assert (df['timestamp'] == ts).all()
+
+
+def test_snapshot_reads_every_symbol(cache):
+    ts = pd.Timestamp('2024-01-02 14:31')
+    cache.push_bars({'AAPL': _bars([0, 1])})
+    cache.put_features({'MSFT': (ts, [1.0, 2.0, 3.0])}, FEATURE_COLS)
+    cache.put_scores({'GOOGL': 0.5}, timestamp=ts)
+
+    assert cache.symbols() == ['AAPL', 'GOOGL', 'MSFT']
+    snap = cache.snapshot(n_bars=1)
+    assert list(snap['bars']) == ['AAPL'] and len(snap['bars']['AAPL']) == 1
+    assert list(snap['features'].index) == ['MSFT']
+    assert list(snap['scores'].index) == ['GOOGL']
+
+
+def test_every_key_carries_its_ttl(cache):
+    ts = pd.Timestamp('2024-01-02 14:31')
+    cache.push_bars({'AAPL': _bars([0])})
+    cache.put_features({'AAPL': (ts, [1.0, 2.0, 3.0])}, FEATURE_COLS)
+    cache.put_scores({'AAPL': 0.5}, timestamp=ts)
+
+    client = cache.client
+    assert 0 < client.ttl('argo:bars:AAPL') <= 600
+    assert 0 < client.ttl('argo:features:AAPL') <= 300
+    assert 0 < client.ttl('argo:score:AAPL') <= 60
+
+
+def test_expired_keys_read_as_missing(cache):
+    ts = pd.Timestamp('2024-01-02 14:31')
+    cache.push_bars({'AAPL': _bars([0])})
+    cache.put_features({'AAPL': (ts, [1.0, 2.0, 3.0])}, FEATURE_COLS)
+    cache.put_scores({'AAPL': 0.5}, timestamp=ts)
+    for key in ('argo:bars:AAPL', 'argo:features:AAPL', 'argo:score:AAPL'):
+        cache.client.pexpire(key, 1)
+
+    import time
+
+    time.sleep(0.01)
+    snap = cache.snapshot(['AAPL'])
+    assert snap['bars'] == {}
+    assert snap['features'].empty
+    assert snap['scores'].empty
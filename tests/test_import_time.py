@@ -0,0 +1,21 @@
+"""
+Import-time budgets of the argo entry points (see scripts/check_import_time.py)
+"""
+
+import pytest
+
+from argo import SUBCOMMAND_MODULES
+from scripts.check_import_time import BUDGET_MS, HEAVY_MODULES, profile_import
+
+TARGETS = {'argo': 'argo', **SUBCOMMAND_MODULES}
+
+
+def test_every_entry_point_has_a_budget():
+    assert set(TARGETS) == set(BUDGET_MS)
+
+
+@pytest.mark.parametrize('name', sorted(TARGETS))
+def test_entry_point_imports_within_budget(name):
+    elapsed_ms, packages = profile_import(TARGETS[name])
+    assert elapsed_ms <= BUDGET_MS[name], f"import {TARGETS[name]} took {elapsed_ms:.1f}ms"
+    assert not [p for p in HEAVY_MODULES if p in packages]
@@ -0,0 +1,140 @@
+"""
+Alpaca REST and streaming ingestion into a recording ClickHouse client (streams from the mock server)
+"""
+
+import asyncio
+import socket
+from collections import Counter
+
+import pytest
+
+import run_features
+from datapipeline import clickhouse, hot_cache
+from datapipeline.ingest.alpaca_bars import AlpacaDataIngester
+from datapipeline.ingest.alpaca_stream import StreamingIngester, _parse_ts
+from scripts.mock_alpaca import MockAlpaca
+
+
+class _RecordingClient:
+    """Records inserts like benchmarks.common.FakeClickHouseClient, keeping the rows; fails the first `fail` calls"""
+
+    def __init__(self, fail=0):
+        self.inserts = []
+        self.fail = fail
+
+    def insert(self, table, data, column_names=None, **kwargs):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError('ClickHouse unavailable')
+        self.inserts.append((table, list(data), list(column_names)))
+
+    def keys(self):
+        return Counter((row[1], row[0]) for _, rows, _ in self.inserts for row in rows)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = _RecordingClient()
+    monkeypatch.setenv('ALPACA_API_KEY', 'mock')
+    monkeypatch.setenv('ALPACA_SECRET_KEY', 'mock')
+    monkeypatch.setattr(clickhouse, 'get_client', lambda: client)
+    return client
+
+
+def test_ingester_inserts_through_the_shared_helper(client, monkeypatch):
+    calls = []
+    insert_bars = clickhouse.insert_bars
+
+    def spy(rows, **kwargs):
+        calls.append(kwargs)
+        return insert_bars(rows, **kwargs)
+
+    monkeypatch.setattr(clickhouse, 'insert_bars', spy)
+
+    bars = [
+        {'t': '2024-01-02T14:30:00Z', 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 100, 'n': 7, 'vw': 1.2},
+        {'t': '2024-01-02T14:31:00Z', 'o': 1.5, 'h': 1.6, 'l': 1.4, 'c': 1.5, 'v': 50},
+    ]
+    ingester = AlpacaDataIngester(cache=False)
+    assert ingester.insert_bars(bars, 'AAPL') == 2
+    assert ingester.insert_bars([], 'AAPL') == 0
+
+    assert calls == [{'client': client}]
+    ((table, rows, columns),) = client.inserts
+    assert table == clickhouse.MARKET_DATA_TABLE and columns == clickhouse.BAR_COLUMNS
+    assert rows == [['2024-01-02T14:30:00Z', 'AAPL', 1.0, 2.0, 0.5, 1.5, 100, 7, 1.2],
+                    ['2024-01-02T14:31:00Z', 'AAPL', 1.5, 1.6, 1.4, 1.5, 50, 0, 0.0]]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _stream(client, monkeypatch, symbols=('AAPL', 'MSFT'), interval=0.02, drop_every=0, duration=1.0, **kwargs):
+    """Stream from a fresh mock server for `duration` seconds; returns (summary, ingester, mock)"""
+    async def run():
+        mock = MockAlpaca(list(symbols), interval=interval, drop_every=drop_every)
+        stream_url, data_url = await mock.start(port=_free_port())
+        monkeypatch.setenv('ALPACA_DATA_URL', data_url)
+        ingester = StreamingIngester(list(symbols), url=stream_url, client=client, report_interval=duration,
+                                     **{'batch_rows': 10, 'flush_ms': 50, 'cache': False, **kwargs})
+        try:
+            return await ingester.run(duration=duration), ingester, mock
+        finally:
+            await mock.stop()
+
+    return asyncio.run(run())
+
+
+def test_stream_backfills_a_dropped_connection_exactly_once(client, monkeypatch):
+    summary, ingester, mock = _stream(client, monkeypatch, symbols=('AAPL', 'MSFT', 'NVDA'), interval=0.05,
+                                      drop_every=4, duration=2.5)
+    assert summary['reconnects'] >= 1 and summary['backfilled'] > 0
+    assert summary['pending'] == 0 and summary['dropped'] == 0
+
+    inserted = client.keys()
+    assert max(inserted.values()) == 1
+    # Every bar generated up to the last one we saw is in ClickHouse, live or backfilled
+    expected = {(symbol, _parse_ts(bar['t'])) for symbol, bars in mock.history.items() for bar in bars
+                if _parse_ts(bar['t']) <= ingester.last_bar[symbol]}
+    assert set(inserted) == expected
+    assert summary['inserted'] == len(expected) == summary['received'] + summary['backfilled']
+
+
+def test_failed_inserts_are_retried_without_losing_bars(client, monkeypatch):
+    client.fail = 3
+    summary, _, _ = _stream(client, monkeypatch, backfill=False)
+    assert summary['insert_errors'] == 3 and summary['dropped'] == 0 and summary['pending'] == 0
+    assert summary['inserted'] == summary['received'] == sum(client.keys().values()) > 0
+
+
+def test_a_clickhouse_outage_caps_the_buffer(client, monkeypatch):
+    client.fail = 10 ** 9
+    summary, _, _ = _stream(client, monkeypatch, interval=0.01, backfill=False, batch_rows=5, flush_ms=100,
+                            max_buffer_rows=20, duration=0.8)
+    assert summary['inserted'] == 0 and client.inserts == []
+    assert summary['pending'] <= 20
+    assert summary['dropped'] == summary['received'] - summary['pending'] > 0
+    # Retries wait out flush_ms instead of firing on every incoming bar
+    assert summary['insert_errors'] < summary['received'] / 4
+
+
+@pytest.mark.parametrize('failing', ['push_bars', 'features'])
+def test_cache_failures_do_not_stop_inserts(client, monkeypatch, failing):
+    def broken(*args, **kwargs):
+        raise ValueError('cache is broken')
+
+    if failing == 'push_bars':
+        monkeypatch.setattr(hot_cache, 'write_through', broken)
+    else:
+        monkeypatch.setattr(hot_cache, 'write_through', lambda *args, **kwargs: None)
+        monkeypatch.setattr(run_features, 'cache_bar_features', broken)
+
+    summary, _, _ = _stream(client, monkeypatch, backfill=False, cache=True, duration=0.6)
+    assert summary['cache_errors'] == summary['batches'] > 1
+    assert summary['inserted'] == summary['received'] == sum(client.keys().values())
@@ -0,0 +1,109 @@
+"""
+Forward-return and triple-barrier labels against a naive per-row loop
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datapipeline.labeling import LABEL_COLS, add_labels, label_frame, label_series
+from datapipeline.quality import session_keys
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA']
+PARAMS = dict(horizon=10, upper=2.0, lower=1.5, fwd_mult=0.5, vol_window=20, min_width=1e-3)
+
+
+def _bars(days=3, seed=0):
+    """Regular-hours minute bars of a few sessions, with jumps and a flat stretch"""
+    rng = np.random.default_rng(seed)
+    timestamps = np.concatenate([pd.date_range(f"2024-01-0{2 + d} 14:30", periods=390, freq='1min').to_numpy()
+                                 for d in range(days)])
+    frames = []
+    for symbol in SYMBOLS:
+        returns = rng.normal(0, 0.001, len(timestamps)) + rng.choice([0, 0.01, -0.01], len(timestamps),
+                                                                     p=[0.98, 0.01, 0.01])
+        returns[200:260] = 0.0
+        frames.append(pd.DataFrame({'timestamp': timestamps, 'symbol': symbol,
+                                    'close': 100 * np.exp(np.cumsum(returns))}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _naive(close, session, horizon, upper, lower, fwd_mult, vol_window, min_width):
+    """One row at a time: walk the path bar by bar until a barrier, the horizon or the session close"""
+    log_close = np.log(close)
+    n = len(log_close)
+    sigma = pd.Series(log_close).diff().rolling(vol_window, min_periods=max(2, vol_window // 2)).std()
+    width = np.maximum(sigma.to_numpy() * math.sqrt(horizon), min_width)
+
+    out = {name: np.full(n, np.nan) for name in LABEL_COLS}
+    for i in range(n):
+        path = []
+        for j in range(i + 1, min(i + horizon, n - 1) + 1):
+            if session[j] != session[i]:
+                break
+            path.append(log_close[j] - log_close[i])
+        if np.isnan(width[i]):
+            continue
+
+        touch = None
+        for k, r in enumerate(path):
+            if r >= upper * width[i] or r <= -lower * width[i]:
+                touch = k
+                break
+        # Short of the horizon only because the data ends: the vertical barrier is not observed yet
+        truncated = not path or (len(path) < horizon and i + len(path) == n - 1)
+
+        if not truncated:
+            vertical = path[-1]
+            out['fwd_ret'][i] = vertical
+            out['fwd_label'][i] = np.sign(vertical) if abs(vertical) > fwd_mult * width[i] else 0.0
+        if touch is not None:
+            out['tb_label'][i] = 1.0 if path[touch] > 0 else -1.0
+            out['tb_ret'][i] = path[touch]
+            out['tb_bars'][i] = touch + 1
+        elif not truncated:
+            out['tb_label'][i] = 0.0
+            out['tb_ret'][i] = path[-1]
+            out['tb_bars'][i] = len(path)
+    return out
+
+
+def _assert_matches(labels, expected):
+    for name in LABEL_COLS:
+        np.testing.assert_allclose(labels[name], expected[name], rtol=1e-5, atol=1e-6, equal_nan=True, err_msg=name)
+    assert set(np.unique(expected['tb_label'][~np.isnan(expected['tb_label'])])) == {-1.0, 0.0, 1.0}
+
+
+@pytest.mark.parametrize('memory_budget_mb', [256, 0.001])
+def test_label_series_matches_a_naive_loop(memory_budget_mb):
+    df = _bars()
+    aapl = df[df['symbol'] == 'AAPL']
+    close = aapl['close'].to_numpy()
+    session, _ = session_keys(aapl['timestamp'].to_numpy())
+
+    # A tiny budget labels the rows in several blocks
+    labels = label_series(close, session, memory_budget_mb=memory_budget_mb, **PARAMS)
+    _assert_matches(labels, _naive(close, session, **PARAMS))
+
+
+def test_label_frame_matches_a_naive_loop_per_symbol():
+    df = _bars().sample(frac=1.0, random_state=1)
+    labels = label_frame(df, workers=2, **PARAMS)
+    assert list(labels.columns) == LABEL_COLS and labels.index.equals(df.index)
+
+    for symbol in SYMBOLS:
+        bars = df[df['symbol'] == symbol].sort_values('timestamp')
+        session, _ = session_keys(bars['timestamp'].to_numpy())
+        expected = _naive(bars['close'].to_numpy(), session, **PARAMS)
+        _assert_matches({name: labels.loc[bars.index, name].to_numpy() for name in LABEL_COLS}, expected)
+
+
+def test_add_labels_target_is_a_triple_barrier_gain():
+    df = _bars()
+    add_labels(df, **PARAMS)
+    labeled = df['tb_label'].notna()
+    gain = (df['tb_label'] == 1) | ((df['tb_label'] == 0) & (df['tb_ret'] > 0))
+    assert (df.loc[labeled, 'target'] == gain[labeled].astype(int)).all()
+    assert df.loc[~labeled, 'target'].isna().all()
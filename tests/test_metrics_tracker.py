@@ -0,0 +1,106 @@
+"""
+MetricsTracker: rolling statistics, snapshot and Prometheus rendering
+"""
+
+import json
+import math
+import urllib.request
+
+import numpy as np
+import pytest
+
+from monitoring.metrics_tracker import MetricsTracker, RollingWindow
+
+
+def test_rolling_window_matches_numpy_on_large_values():
+    # Large PnL with a tiny spread: a running sum of squares cancels to a variance 16x too big here
+    rng = np.random.default_rng(0)
+    values = 1e6 + rng.standard_normal(5_000) * 1e-2
+    window = RollingWindow(50)
+    for x in values:
+        window.push(x)
+    tail = values[-50:]
+    assert len(window) == 50
+    assert window.mean() == pytest.approx(tail.mean(), abs=1e-9)
+    assert window.std() == pytest.approx(tail.std(ddof=1), rel=1e-5)
+
+
+def test_rolling_window_small_samples():
+    window = RollingWindow(3)
+    assert window.mean() == 0.0 and window.std() == 0.0
+    window.push(2.0)
+    assert window.mean() == 2.0 and window.std() == 0.0
+    for x in (4.0, 6.0, 8.0):
+        window.push(x)
+    assert window.mean() == pytest.approx(6.0)
+    assert window.std() == pytest.approx(2.0)
+
+
+def test_opening_fills_move_exposure_but_not_pnl_stats():
+    tracker = MetricsTracker()
+    tracker.record_fill('AAPL', None, quantity=2, price=100.0, action='BUY')
+    tracker.record_fill('AAPL', 10.0, quantity=2, price=105.0, action='SELL')
+    tracker.record_fill('MSFT', -4.0, quantity=1, price=50.0, action='SELL')
+
+    snap = tracker.snapshot()
+    assert snap['fills'] == 3 and snap['trades'] == 2
+    assert snap['wins'] == 1 and snap['losses'] == 1 and snap['win_rate'] == 0.5
+    assert snap['total_pnl'] == pytest.approx(6.0)
+    assert snap['mean_pnl'] == pytest.approx(3.0)
+    assert snap['std_pnl'] == pytest.approx(np.std([10.0, -4.0], ddof=1))
+    assert snap['max_drawdown'] == pytest.approx(4.0)
+    assert snap['positions'] == {'AAPL': 0, 'MSFT': -1}
+    assert snap['exposure'] == {'AAPL': 0.0, 'MSFT': -50.0}
+    assert snap['gross_exposure'] == 50.0
+    json.dumps(snap)
+
+
+def test_record_metrics_folds_in_only_new_trades():
+    tracker = MetricsTracker()
+    trades = [{'symbol': 'AAPL', 'pnl': 5.0, 'quantity': 1, 'price': 10.0, 'action': 'SELL'}]
+    tracker.record_metrics(trades, 5.0)
+    trades.append({'symbol': 'AAPL', 'pnl': -1.0, 'quantity': 1, 'price': 10.0, 'action': 'BUY'})
+    stats = tracker.record_metrics(trades, 4.0)
+    assert stats['trades'] == 2 and stats['total_pnl'] == 4.0
+
+
+def test_prometheus_rendering():
+    tracker = MetricsTracker()
+    tracker.record_fill('AAPL', 10.0, quantity=1, price=100.0, action='BUY')
+    tracker.record_fill('MSFT', None, quantity=2, price=50.0, action='SELL')
+    tracker.set_gauge('drift_psi_max', math.inf)
+    tracker.set_gauge('drift_psi', 0.5, labels={'feature': 'rsi'})
+    tracker.set_gauge('drift_psi', math.nan, labels={'feature': 'a"b'})
+
+    text = tracker.to_prometheus()
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert 'argo_fills_total 2.0' in lines and 'argo_trades_total 1.0' in lines
+    assert '# TYPE argo_fills_total counter' in lines
+    assert 'argo_exposure{symbol="AAPL"} 100.0' in lines
+    assert 'argo_exposure{symbol="MSFT"} -100.0' in lines
+    assert 'argo_drift_psi_max +Inf' in lines
+    assert 'argo_drift_psi{feature="rsi"} 0.5' in lines
+    assert 'argo_drift_psi{feature="a\\"b"} NaN' in lines
+    for family in ('argo_exposure', 'argo_drift_psi'):
+        assert lines.count(f"# TYPE {family} gauge") == 1
+    # Every sample line is "name[{labels}] value" with a parseable value
+    for line in lines:
+        if not line.startswith('#'):
+            float(line.rsplit(' ', 1)[1].replace('Inf', 'inf'))
+
+
+def test_serve_exposes_metrics_and_snapshot_on_loopback():
+    tracker = MetricsTracker()
+    tracker.record_fill('AAPL', 1.0, quantity=1, price=10.0, action='BUY')
+    server = tracker.serve(port=0)
+    try:
+        host, port = server.server_address[:2]
+        assert host == '127.0.0.1'
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as r:
+            assert 'argo_trades_total 1.0' in r.read().decode()
+        with urllib.request.urlopen(f"http://{host}:{port}/snapshot") as r:
+            assert json.loads(r.read())['trades'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
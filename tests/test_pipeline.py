@@ -0,0 +1,51 @@
+"""
+The pipeline's combine stage writes the same output as `argo features`
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_features
+from datapipeline import pipeline, quality
+from datapipeline.cross_sectional import CS_FEATURE_COLS
+
+
+def _bars(symbol, n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-02 14:30', periods=n, freq='1min'),
+        'symbol': symbol,
+        'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+        'volume': rng.integers(100, 1000, n).astype(float),
+    })
+
+
+@pytest.fixture
+def offline(monkeypatch, tmp_path):
+    data = {s: _bars(s, seed=i) for i, s in enumerate(['AAPL', 'MSFT', 'NVDA'])}
+    monkeypatch.setattr(run_features, 'load_bars', lambda symbol, client=None: data[symbol].copy())
+    monkeypatch.setattr(run_features, 'SCALER_PATH', str(tmp_path / 'scaler_pipeline.json'))
+    monkeypatch.setattr(pipeline, 'symbol_data_stats', lambda symbol: {'rows': len(data[symbol])})
+    monkeypatch.setattr(quality, 'load_quarantine', lambda path=None: {})
+    return list(data)
+
+
+@pytest.mark.parametrize('cross_sectional', [False, True])
+def test_combine_matches_run_features(offline, tmp_path, cross_sectional):
+    features_csv = tmp_path / 'features.csv'
+    run_features.main(symbols=offline, output_csv=features_csv, scaler_path=tmp_path / 'scaler.json',
+                      cross_sectional=cross_sectional, cache=False)
+
+    pipeline_csv = tmp_path / 'pipeline.csv'
+    dag = pipeline.build_pipeline(symbols=offline, output_csv=str(pipeline_csv), cache_dir=tmp_path / 'cache',
+                                  cross_sectional=cross_sectional, cache=False)
+    result = dag.run(targets=['combine'])['combine']
+
+    expected = pd.read_csv(features_csv)
+    actual = pd.read_csv(pipeline_csv)
+    assert result['rows'] == len(expected) > 0
+    assert set(CS_FEATURE_COLS).issubset(actual.columns) == cross_sectional
+    pd.testing.assert_frame_equal(actual, expected)
+    assert (tmp_path / 'scaler.json').read_text() == (tmp_path / 'scaler_pipeline.json').read_text()
@@ -0,0 +1,71 @@
+"""
+Session completeness against the NYSE calendar
+"""
+
+import numpy as np
+import pandas as pd
+
+from datapipeline.quality import HALF_DAY_MINUTES, SESSION_MINUTES, calendar_minutes, scan_frame, summarize
+
+
+def _days(*dates):
+    return (pd.to_datetime(list(dates)) - pd.Timestamp(0)).days.to_numpy()
+
+
+def _session(symbol, day, minutes=SESSION_MINUTES):
+    """`minutes` one-minute bars from 09:30 New York time, as UTC"""
+    local = pd.Timestamp(f"{day} 09:30", tz='America/New_York') + pd.to_timedelta(np.arange(minutes), unit='m')
+    close = 100.0 + 0.01 * np.sin(np.arange(minutes))
+    return pd.DataFrame({
+        'timestamp': local.tz_convert('UTC').tz_localize(None), 'symbol': symbol,
+        'open': close, 'high': close + 0.05, 'low': close - 0.05, 'close': close, 'volume': 1_000.0,
+    })
+
+
+def _scan(sessions):
+    return scan_frame(pd.concat([_session(*s) for s in sessions], ignore_index=True))
+
+
+def test_calendar_knows_weekends_holidays_and_early_closes():
+    minutes = calendar_minutes(_days('2024-07-03', '2024-07-04', '2024-07-06', '2024-11-29', '2024-12-24',
+                                     '2024-12-26', '2022-01-03', '2023-01-02', '2025-01-09'))
+    np.testing.assert_array_equal(minutes, [HALF_DAY_MINUTES, 0, 0, HALF_DAY_MINUTES, HALF_DAY_MINUTES,
+                                            SESSION_MINUTES, SESSION_MINUTES, 0, 0])
+
+
+def test_a_cut_session_and_a_missing_day_of_a_lone_symbol_are_quarantined():
+    # Mon-Fri; Tuesday stops at 13:00 and Wednesday has no bars at all
+    result = _scan([('AAA', '2024-03-04'), ('AAA', '2024-03-05', HALF_DAY_MINUTES),
+                    ('AAA', '2024-03-07'), ('AAA', '2024-03-08')])
+    row = result['report'].loc['AAA']
+    assert row['missing_sessions'] == 1 and row['incomplete_sessions'] == 2
+    assert row['completeness'] == round((3 * SESSION_MINUTES + HALF_DAY_MINUTES) / (5 * SESSION_MINUTES), 4)
+    assert set(result['quarantine']['AAA'].split(',')) == {'incomplete', 'missing_sessions'}
+
+
+def test_early_closes_and_holidays_are_not_held_against_a_symbol():
+    # Wed 3 July 2024 closes at 13:00, Thu 4 July is a holiday, the weekend has no session
+    result = _scan([('AAA', '2024-07-02'), ('AAA', '2024-07-03', HALF_DAY_MINUTES),
+                    ('AAA', '2024-07-05'), ('AAA', '2024-07-08')])
+    row = result['report'].loc['AAA']
+    assert row['completeness'] == 1.0 and row['sessions'] == 4
+    assert not result['quarantine']
+
+
+def test_a_session_no_peer_traded_is_excused():
+    # An unscheduled closure the calendar does not list: nobody has bars on Wednesday
+    sessions = [(symbol, day) for symbol in ('AAA', 'BBB') for day in ('2024-03-04', '2024-03-05', '2024-03-07')]
+    result = _scan(sessions)
+    assert not result['quarantine']
+    assert (result['report']['missing_sessions'] == 0).all()
+
+
+def test_query_bounds_clip_the_edge_sessions():
+    days = _days('2024-03-04', '2024-03-05')
+    # Scanned from Monday 12:00 to Tuesday 11:00 New York time (EST, UTC-5)
+    bounds = (pd.Timestamp('2024-03-04 17:00'), pd.Timestamp('2024-03-05 16:00'))
+    bars = np.array([[240, 90]])
+    result = summarize(['AAA'], days, bars, rows=[330], duplicates=[0], ohlc_violations=[0], spikes=[0],
+                       max_z=[0.0], bounds=bounds)
+    assert result['report'].loc['AAA', 'completeness'] == 1.0
+    assert not result['quarantine']
@@ -0,0 +1,125 @@
+"""
+RiskGuardrails: day rollover, snapshot/restore and check_batch ordering
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from models.risk_guardrails import (MARKET_TZ, REASON_CIRCUIT_BREAKER, REASON_LOW_CONFIDENCE, REASON_NO_SIZE,
+                                    REASON_OK, REASON_SYMBOL_LOSS, REASON_TRADE_BUDGET, RiskGuardrails)
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock(datetime(2024, 1, 2, 10, 0, tzinfo=MARKET_TZ))
+
+
+def test_counters_roll_over_at_market_midnight(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_trade('AAPL', -150.0)
+    assert not guardrails.check_can_trade('AAPL', 0.9)
+
+    clock.now = datetime(2024, 1, 2, 23, 59, tzinfo=MARKET_TZ)
+    assert guardrails.state()['trades_today'] == 1
+    clock.now = datetime(2024, 1, 3, 0, 1, tzinfo=MARKET_TZ)
+    assert guardrails.check_can_trade('AAPL', 0.9)
+    assert guardrails.state() == {'trading_day': '2024-01-03', 'daily_pnl': 0.0, 'trades_today': 0,
+                                  'per_symbol_loss': {}}
+
+
+def test_trades_stamped_on_an_earlier_day_are_ignored(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_trade('AAPL', -50.0, at=datetime(2024, 1, 1, 15, 0, tzinfo=MARKET_TZ))
+    assert guardrails.state()['trades_today'] == 0
+    # UTC 03:00 on the 3rd is still the 2nd in New York
+    guardrails.record_trade('AAPL', -50.0, at=datetime.fromisoformat('2024-01-03T03:00:00+00:00'))
+    assert guardrails.state()['trades_today'] == 1
+
+
+def test_open_and_close_split_the_budget_from_pnl(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_open('AAPL')
+    guardrails.record_close('AAPL', -30.0)
+    state = guardrails.state()
+    assert state['trades_today'] == 1 and state['daily_pnl'] == -30.0
+    assert state['per_symbol_loss'] == {'AAPL': -30.0}
+
+
+def test_snapshot_restores_the_same_day_only(tmp_path, clock):
+    path = tmp_path / 'risk_state.json'
+    guardrails = RiskGuardrails(snapshot_path=path, clock=clock, snapshot_interval=0)
+    guardrails.record_trade('AAPL', -120.0)
+    guardrails.record_trade('MSFT', 40.0)
+    guardrails.flush()
+
+    restored = RiskGuardrails(snapshot_path=path, clock=clock)
+    assert restored.state() == guardrails.state()
+    assert not restored.check_can_trade('AAPL', 0.9)
+
+    clock.now = datetime(2024, 1, 3, 9, 30, tzinfo=MARKET_TZ)
+    assert RiskGuardrails(snapshot_path=path, clock=clock).state()['trades_today'] == 0
+
+
+def test_throttled_snapshots_are_written_by_flush(tmp_path, clock):
+    path = tmp_path / 'risk_state.json'
+    guardrails = RiskGuardrails(snapshot_path=path, clock=clock, snapshot_interval=3600)
+    guardrails.record_trade('AAPL', 1.0)
+    guardrails.record_trade('AAPL', 2.0)  # inside the interval: deferred
+    assert RiskGuardrails(snapshot_path=path, clock=clock).state()['trades_today'] == 1
+
+    guardrails.flush()
+    assert RiskGuardrails(snapshot_path=path, clock=clock).state()['trades_today'] == 2
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_unreadable_snapshot_starts_fresh(tmp_path, clock):
+    path = tmp_path / 'risk_state.json'
+    path.write_text('{not json')
+    assert RiskGuardrails(snapshot_path=path, clock=clock).state()['trades_today'] == 0
+
+
+def test_check_batch_reason_codes(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_trade('TSLA', -150.0)
+    accept, reasons = guardrails.check_batch(['AAPL', 'MSFT', 'GOOGL', 'TSLA'], [0.9, 0.51, 0.9, 0.9],
+                                             [1, 1, 0, 1])
+    np.testing.assert_array_equal(reasons, [REASON_OK, REASON_LOW_CONFIDENCE, REASON_NO_SIZE, REASON_SYMBOL_LOSS])
+    np.testing.assert_array_equal(accept, [True, False, False, False])
+
+
+def test_check_batch_agrees_with_check_can_trade(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_trade('TSLA', -150.0)
+    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA']
+    confidences = [0.9, 0.5, 0.9, 0.6]
+    accept, _ = guardrails.check_batch(symbols, confidences, np.ones(4))
+    assert accept.tolist() == [guardrails.check_can_trade(s, c) for s, c in zip(symbols, confidences)]
+
+
+def test_check_batch_spends_the_budget_by_confidence(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.MAX_TRADES_PER_DAY = 3
+    guardrails.record_open('AAPL')
+    # Two slots left: the two most confident eligible signals win, ties keep input order
+    accept, reasons = guardrails.check_batch(['A', 'B', 'C', 'D', 'E'], [0.6, 0.9, 0.3, 0.7, 0.7], np.ones(5))
+    np.testing.assert_array_equal(accept, [False, True, False, True, False])
+    np.testing.assert_array_equal(reasons, [REASON_TRADE_BUDGET, REASON_OK, REASON_LOW_CONFIDENCE, REASON_OK,
+                                            REASON_TRADE_BUDGET])
+
+
+def test_circuit_breaker_blocks_every_row(clock):
+    guardrails = RiskGuardrails(snapshot_path=None, clock=clock)
+    guardrails.record_trade('AAPL', -600.0)
+    accept, reasons = guardrails.check_batch(['AAPL', 'MSFT'], [0.9, 0.4], [1, 1])
+    assert not accept.any()
+    np.testing.assert_array_equal(reasons, [REASON_CIRCUIT_BREAKER, REASON_LOW_CONFIDENCE])
@@ -0,0 +1,132 @@
+"""
+SecretCache over file, env and stub backends: TTL, background refresh, idle expiry
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from config.secrets import EnvSecretsBackend, FileSecretsBackend, SecretCache
+
+
+class _CountingBackend:
+    """Stub backend returning a new version on every fetch"""
+
+    def __init__(self, value=None, delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def fetch(self, secret_name, region=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.fail:
+            raise RuntimeError('backend down')
+        return self.value if self.value is not None else {'name': secret_name, 'version': calls}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_file_backend(tmp_path):
+    path = tmp_path / 'secrets.json'
+    path.write_text(json.dumps({'alpaca-paper-trading': {'api_key': 'k'}, 'token': 'abc'}))
+    cache = SecretCache(FileSecretsBackend(str(path)))
+    try:
+        secret = cache.get('alpaca-paper-trading', 'us-west-2')
+        assert secret == {'api_key': 'k'}
+        secret['api_key'] = 'mutated'
+        assert cache.get('alpaca-paper-trading', 'us-west-2') == {'api_key': 'k'}
+        assert cache.get('token', 'us-west-2') == 'abc'
+        with pytest.raises(RuntimeError, match='not found'):
+            cache.get('missing', 'us-west-2')
+    finally:
+        cache.close()
+
+
+def test_env_backend_accepts_json_and_bare_strings(monkeypatch):
+    monkeypatch.setenv('ARGO_SECRET_ALPACA_PAPER_TRADING', '{"api_key": "k"}')
+    monkeypatch.setenv('ARGO_SECRET_WEBHOOK_TOKEN', 'not-json')
+    cache = SecretCache(EnvSecretsBackend())
+    try:
+        assert cache.get('alpaca-paper-trading', None) == {'api_key': 'k'}
+        assert cache.get('webhook-token', None) == 'not-json'
+        with pytest.raises(RuntimeError, match='ARGO_SECRET_NOPE'):
+            cache.get('nope', None)
+    finally:
+        cache.close()
+
+
+def test_hits_are_served_from_cache_and_concurrent_misses_share_a_fetch():
+    backend = _CountingBackend(delay=0.05)
+    cache = SecretCache(backend, ttl=60, refresh_ahead=5)
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('s', 'r'))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert backend.calls == 1
+        assert all(r == {'name': 's', 'version': 1} for r in results)
+
+        cache.invalidate('s', 'r')
+        assert cache.get('s', 'r')['version'] == 2
+    finally:
+        cache.close()
+
+
+def test_entries_are_refreshed_ahead_of_expiry():
+    backend = _CountingBackend()
+    cache = SecretCache(backend, ttl=0.2, refresh_ahead=0.15, idle_ttl=60)
+    try:
+        assert cache.get('s', 'r')['version'] == 1
+        assert _wait_for(lambda: backend.calls >= 2)
+        # Readers see the refreshed value without fetching themselves
+        calls = backend.calls
+        assert cache.get('s', 'r')['version'] >= 2
+        assert backend.calls - calls <= 1
+    finally:
+        cache.close()
+
+
+def test_a_failed_refresh_keeps_the_old_value_until_expiry():
+    backend = _CountingBackend()
+    cache = SecretCache(backend, ttl=0.3, refresh_ahead=0.25, idle_ttl=60)
+    try:
+        assert cache.get('s', 'r')['version'] == 1
+        backend.fail = True
+        assert _wait_for(lambda: backend.calls >= 2)
+        assert cache.get('s', 'r')['version'] == 1
+        time.sleep(0.3)
+        with pytest.raises(RuntimeError, match='backend down'):
+            cache.get('s', 'r')
+    finally:
+        cache.close()
+
+
+def test_unread_entries_are_dropped_instead_of_refreshed():
+    backend = _CountingBackend()
+    cache = SecretCache(backend, ttl=0.1, refresh_ahead=0.05, idle_ttl=0.15)
+    try:
+        cache.get('s', 'r')
+        assert _wait_for(lambda: not cache._entries)
+        calls = backend.calls
+        time.sleep(0.3)
+        assert backend.calls == calls
+        # The next read fetches again and restarts the refresh cycle
+        assert cache.get('s', 'r')['version'] == calls + 1
+    finally:
+        cache.close()
@@ -0,0 +1,115 @@
+"""
+TradeLogger: group commit by size and interval, flush(), Parquet sink and the sync fallback
+"""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from monitoring.trade_logger import TradeLogger
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_trades_are_buffered_until_a_batch_fills(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    with TradeLogger(path, flush_records=3, flush_interval_ms=60_000, fsync='never') as log:
+        log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test')
+        log.log_trade('MSFT', 'SELL', 1, 200.0, 0.7, 'test')
+        time.sleep(0.05)
+        assert _lines(path) == []
+
+        log.log_trade('GOOGL', 'BUY', 1, 300.0, 0.8, 'test')
+        assert _wait_for(lambda: len(_lines(path)) == 3)
+    assert [t['symbol'] for t in _lines(path)] == ['AAPL', 'MSFT', 'GOOGL']
+
+
+def test_a_partial_batch_is_committed_after_the_interval(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    with TradeLogger(path, flush_records=100, flush_interval_ms=20, fsync='never') as log:
+        log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test')
+        assert _wait_for(lambda: len(_lines(path)) == 1)
+
+
+def test_flush_commits_right_away(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    with TradeLogger(path, flush_records=100, flush_interval_ms=60_000, fsync='never') as log:
+        log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test', pnl=np.float64(1.5))
+        t0 = time.monotonic()
+        assert log.flush(timeout=5)
+        assert time.monotonic() - t0 < 1.0
+        assert _lines(path)[0]['pnl'] == 1.5
+        assert log.flush(timeout=1)  # nothing pending
+
+
+def test_close_drains_the_buffer(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    log = TradeLogger(path, flush_records=1000, flush_interval_ms=60_000)
+    for i in range(250):
+        log.log_trade(f"SYM{i}", 'BUY', 1, 10.0, 0.6, 'test')
+    log.close()
+    assert len(_lines(path)) == 250
+    with pytest.raises(RuntimeError):
+        log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test')
+
+
+def test_an_unserializable_record_does_not_stop_the_writer(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    with TradeLogger(path, flush_records=1, fsync='never') as log:
+        log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, {'nested': object()})
+        log.log_trade('MSFT', 'BUY', 1, 100.0, 0.6, 'test')
+        assert log.flush(timeout=5)
+        assert log._writer.is_alive()
+    assert [t['symbol'] for t in _lines(path)] == ['AAPL', 'MSFT']
+
+
+def test_a_dead_writer_falls_back_to_synchronous_writes(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    log = TradeLogger(path, flush_records=100, flush_interval_ms=60_000, fsync='never')
+    log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test')
+    # Stop the writer without draining, as if it had crashed
+    with log._cond:
+        log._closed = True
+        log._cond.notify_all()
+    log._writer.join()
+    log._closed = False
+    log._buffer.append({'timestamp': '2024-01-02T10:00:00', 'symbol': 'LEFT', 'action': 'BUY'})
+
+    log.log_trade('MSFT', 'SELL', 1, 200.0, 0.7, 'test')
+    assert [t['symbol'] for t in _lines(path)][-2:] == ['LEFT', 'MSFT']
+    log.close()
+
+
+def test_parquet_sink_rolls_one_file_per_day(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    log = TradeLogger(tmp_path / 'trades.jsonl', flush_records=1000, flush_interval_ms=60_000,
+                      fsync='never', parquet_dir=tmp_path / 'parquet')
+    log.log_trade('AAPL', 'BUY', 1, 100.0, 0.6, 'test')
+    log.log_trade('MSFT', 'SELL', 2, 200.0, 0.7, 'test', pnl=-3.0)
+    log.close()
+
+    files = sorted((tmp_path / 'parquet').glob('trades_*.parquet'))
+    assert len(files) == 1
+    table = pq.read_table(files[0])
+    assert table.column('symbol').to_pylist() == ['AAPL', 'MSFT']
+    assert table.column('pnl').to_pylist() == [None, -3.0]
+
+    batch = [{'timestamp': '2024-01-02T15:59:00', 'symbol': 'AAPL', 'quantity': 1.0},
+             {'timestamp': '2024-01-03T09:30:00', 'symbol': 'AAPL', 'quantity': 1.0}]
+    log.parquet_sink.write(batch)
+    log.parquet_sink.close()
+    assert {f.name[:17] for f in (tmp_path / 'parquet').glob('*.parquet')} >= {'trades_2024-01-02',
+                                                                                  'trades_2024-01-03'}